@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('cache', 'cache'), ('src\\data', 'src\\data'), ('src\\dashboard', 'src\\dashboard'), ('src\\utils', 'src\\utils')],
-    hiddenimports=['pandas', 'numpy', 'matplotlib', 'pandas_market_calendars', 'matplotlib.backends.backend_tkagg', 'yfinance', 'tkinter', 'urllib3', 'requests'],
+    hiddenimports=['pandas', 'numpy', 'matplotlib', 'pandas_market_calendars', 'matplotlib.backends.backend_tkagg', 'yfinance', 'tkinter', 'urllib3', 'requests', 'pyarrow', 'pyarrow.feather'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
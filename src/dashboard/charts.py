@@ -1,15 +1,22 @@
-# Substituir import de investpy por investiny
-import investiny as inv
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 import pandas as pd
 from datetime import datetime, timedelta
-import yfinance as yf
 import numpy as np
 import matplotlib.dates as mdates
 import tkinter as tk
 from tkinter import Canvas, Frame, StringVar, OptionMenu
 
+from data.history_cache import get_histories
+
+def get_price_history(stock, start_date, end_date):
+    """Busca o histórico de uma ação pelo cache de históricos compartilhado"""
+    code = stock if stock.endswith('.SA') else f"{stock}.SA"
+    stock_df = get_histories([code], start_date, end_date).get(code)
+    if stock_df is None or stock_df.empty:
+        raise Exception(f"Nenhum dado disponível para {stock}")
+    return stock_df
+
 class StockChart:
     def __init__(self, master):
         self.master = master
@@ -44,31 +51,11 @@ class StockChart:
         plt.clf()
 
         # Fetch stock data
-        stock_data = inv.get_historical_data(
-            symbol=f"{stock}.SA",
-            country="brazil",
-            from_date=int(datetime(2022, 1, 1).timestamp()),
-            to_date=int(datetime(2023, 1, 1).timestamp()),
-            interval="1d"
-        )
-        compared_stock_data = inv.get_historical_data(
-            symbol=f"{compared_stock}.SA",
-            country="brazil",
-            from_date=int(datetime(2022, 1, 1).timestamp()),
-            to_date=int(datetime(2023, 1, 1).timestamp()),
-            interval="1d"
-        )
-
-        stock_df = pd.DataFrame(stock_data['quotes'])
-        stock_df['date'] = pd.to_datetime(stock_df['date'], unit='s')
-        stock_df.set_index('date', inplace=True)
-
-        compared_stock_df = pd.DataFrame(compared_stock_data['quotes'])
-        compared_stock_df['date'] = pd.to_datetime(compared_stock_df['date'], unit='s')
-        compared_stock_df.set_index('date', inplace=True)
+        stock_df = get_price_history(stock, datetime(2022, 1, 1), datetime(2023, 1, 1))
+        compared_stock_df = get_price_history(compared_stock, datetime(2022, 1, 1), datetime(2023, 1, 1))
 
-        plt.plot(stock_df.index, stock_df['close'], label=stock)
-        plt.plot(compared_stock_df.index, compared_stock_df['close'], label=compared_stock)
+        plt.plot(stock_df.index, stock_df['Close'], label=stock)
+        plt.plot(compared_stock_df.index, compared_stock_df['Close'], label=compared_stock)
 
         plt.title('Comparative Stock Prices')
         plt.xlabel('Date')
@@ -87,32 +74,12 @@ def plot_comparison_chart(stock1, stock2):
     
     try:
         # Buscar dados das ações
-        stock_data1 = inv.get_historical_data(
-            symbol=f"{stock1}.SA",
-            country="brazil",
-            from_date=int(datetime(2022, 1, 1).timestamp()),
-            to_date=int(datetime(2023, 1, 1).timestamp()),
-            interval="1d"
-        )
-        stock_data2 = inv.get_historical_data(
-            symbol=f"{stock2}.SA",
-            country="brazil",
-            from_date=int(datetime(2022, 1, 1).timestamp()),
-            to_date=int(datetime(2023, 1, 1).timestamp()),
-            interval="1d"
-        )
-
-        stock_df1 = pd.DataFrame(stock_data1['quotes'])
-        stock_df1['date'] = pd.to_datetime(stock_df1['date'], unit='s')
-        stock_df1.set_index('date', inplace=True)
-
-        stock_df2 = pd.DataFrame(stock_data2['quotes'])
-        stock_df2['date'] = pd.to_datetime(stock_df2['date'], unit='s')
-        stock_df2.set_index('date', inplace=True)
+        stock_df1 = get_price_history(stock1, datetime(2022, 1, 1), datetime(2023, 1, 1))
+        stock_df2 = get_price_history(stock2, datetime(2022, 1, 1), datetime(2023, 1, 1))
         
         # Plotar os dados
-        plt.plot(stock_df1.index, stock_df1['close'], label=stock1)
-        plt.plot(stock_df2.index, stock_df2['close'], label=stock2)
+        plt.plot(stock_df1.index, stock_df1['Close'], label=stock1)
+        plt.plot(stock_df2.index, stock_df2['Close'], label=stock2)
         
         plt.title(f'Comparação: {stock1} vs {stock2}')
         plt.xlabel('Data')
@@ -137,36 +104,16 @@ def update_chart(stock, compared_stock=None):
     
     try:
         # Buscar dados das ações
-        stock_data = inv.get_historical_data(
-            symbol=f"{stock}.SA",
-            country="brazil",
-            from_date=int(datetime(2022, 1, 1).timestamp()),
-            to_date=int(datetime(2023, 1, 1).timestamp()),
-            interval="1d"
-        )
-
-        stock_df = pd.DataFrame(stock_data['quotes'])
-        stock_df['date'] = pd.to_datetime(stock_df['date'], unit='s')
-        stock_df.set_index('date', inplace=True)
+        stock_df = get_price_history(stock, datetime(2022, 1, 1), datetime(2023, 1, 1))
         
         # Plotar os dados da ação principal
-        plt.plot(stock_df.index, stock_df['close'], label=stock)
+        plt.plot(stock_df.index, stock_df['Close'], label=stock)
         
         # Se tiver uma ação para comparação e for diferente da principal, plotar também
         if compared_stock != stock:
-            compared_stock_data = inv.get_historical_data(
-                symbol=f"{compared_stock}.SA",
-                country="brazil",
-                from_date=int(datetime(2022, 1, 1).timestamp()),
-                to_date=int(datetime(2023, 1, 1).timestamp()),
-                interval="1d"
-            )
-
-            compared_stock_df = pd.DataFrame(compared_stock_data['quotes'])
-            compared_stock_df['date'] = pd.to_datetime(compared_stock_df['date'], unit='s')
-            compared_stock_df.set_index('date', inplace=True)
+            compared_stock_df = get_price_history(compared_stock, datetime(2022, 1, 1), datetime(2023, 1, 1))
 
-            plt.plot(compared_stock_df.index, compared_stock_df['close'], label=compared_stock)
+            plt.plot(compared_stock_df.index, compared_stock_df['Close'], label=compared_stock)
 
         plt.title(f'Dados da ação: {stock}')
         plt.xlabel('Data')
@@ -190,20 +137,15 @@ def create_comparison_chart(stock_codes, parent_frame):
         end_date = datetime.now()
         start_date = end_date - timedelta(days=365)
         
-        # Buscar dados históricos
-        historical_data = yf.download(
-            yahoo_codes, 
-            start=start_date,
-            end=end_date,
-            progress=False
-        )
+        # Buscar dados históricos (ações já carregadas vêm do cache, sem acesso à rede)
+        frames = get_histories(yahoo_codes, start_date, end_date)
         
-        if historical_data.empty:
+        if not frames:
             print("Nenhum dado histórico disponível para as ações selecionadas")
             return None
             
         # Extrair preços de fechamento
-        close_prices = historical_data['Close']
+        close_prices = pd.DataFrame({code: frames[code]['Close'] for code in yahoo_codes if code in frames})
         
         # Normalizar preços (base 100)
         normalized_prices = pd.DataFrame()
@@ -1,4 +1,6 @@
 import os
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 import pandas as pd
@@ -7,11 +9,41 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolb
 import numpy as np
 
 from .charts import create_comparison_chart, create_return_comparison_chart
+from data.stock_data import calculate_returns
+from data.intraday import get_intraday_tracker, apply_intraday_metrics
+
+# Intervalo entre verificações de novas ações durante o carregamento progressivo
+STREAM_POLL_MS = 1000
+
+# Tabela virtualizada: altura mínima de cada linha (pixels; a altura real é medida
+# a partir da fonte e da escala da tela) e primeira linha da grade usada pelos
+# dados (0: cabeçalhos, 1: mensagem de status)
+TABLE_ROW_HEIGHT = 24
+FIRST_DATA_GRID_ROW = 2
+
+# Linhas criadas antes de a janela ter tamanho definido
+DEFAULT_VISIBLE_ROWS = 30
+
+# Dimensões das barras de rentabilidade (pixels), desenhadas em um único canvas
+BAR_WIDTH = 200
+BAR_HEIGHT = 15
 
 class BrazilStocksDashboard:
-    def __init__(self, master, performance_data):
+    def __init__(self, master, performance_data, row_source=None):
+        """
+        Args:
+            master: Janela Tk do dashboard
+            performance_data: DataFrame com os dados das ações (pode começar vazio)
+            row_source: Fila opcional com listas de linhas (dicionários) que chegam
+                enquanto o carregamento continua, ou um DataFrame que substitui todos
+                os dados (atualização de cache obsoleto); None na fila indica o fim
+        """
         self.master = master
-        self.performance_data = performance_data
+        self.performance_data = performance_data if performance_data is not None else pd.DataFrame()
+        self.row_source = row_source
+        # Modo intradiário (data_fetch_interval do config.json em barras de minutos)
+        self.intraday_tracker = get_intraday_tracker()
+        self.intraday_updates = queue.Queue()
         self.master.title("Dashboard de Ações Brasileiras - B3")
         self.master.geometry("1280x800")
         
@@ -25,8 +57,108 @@ class BrazilStocksDashboard:
         
         self.create_widgets()
         
-        # Diagnóstico de dados
-        self.verify_duplicate_data()
+        if self.row_source is not None:
+            # Diagnóstico de dados fica para o fim do carregamento progressivo
+            self.stocks_frame.config(text=self._stocks_frame_title())
+            self.master.after(STREAM_POLL_MS, self._poll_row_source)
+        else:
+            # Diagnóstico de dados
+            self.verify_duplicate_data()
+        
+        if self.intraday_tracker is not None:
+            self.master.after(STREAM_POLL_MS, self._start_intraday_refresh)
+        
+    def _start_intraday_refresh(self):
+        """Busca as barras intradiárias novas em segundo plano"""
+        codes = list(self.performance_data['code']) if 'code' in self.performance_data.columns else []
+        
+        def refresh_thread():
+            try:
+                self.intraday_tracker.update(codes)
+                self.intraday_updates.put(self.intraday_tracker.metrics(codes))
+            except Exception as e:
+                print(f"Erro na atualização intradiária: {e}")
+                self.intraday_updates.put(None)
+        
+        threading.Thread(target=refresh_thread, daemon=True, name="intraday-refresh").start()
+        self.master.after(STREAM_POLL_MS, self._poll_intraday_updates)
+        
+    def _poll_intraday_updates(self):
+        """Aplica as métricas intradiárias quando a atualização termina e agenda a próxima"""
+        try:
+            metrics = self.intraday_updates.get_nowait()
+        except queue.Empty:
+            self.master.after(STREAM_POLL_MS, self._poll_intraday_updates)
+            return
+        
+        if metrics is not None and not metrics.empty:
+            self.performance_data = apply_intraday_metrics(self.performance_data, metrics)
+            self._redraw_stock_table()
+        self.master.after(self.intraday_tracker.refresh_seconds * 1000, self._start_intraday_refresh)
+        
+    def _poll_row_source(self):
+        """Incorpora as ações que chegaram desde a última verificação"""
+        rows = []
+        replaced = False
+        finished = False
+        while True:
+            try:
+                batch = self.row_source.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                finished = True
+                break
+            if isinstance(batch, pd.DataFrame):
+                # Dados atualizados substituem tudo o que foi recebido até aqui
+                self.performance_data = batch
+                rows = []
+                replaced = True
+            else:
+                rows.extend(batch)
+        
+        if rows:
+            self.append_stock_rows(rows)
+        elif replaced:
+            self._redraw_stock_table()
+        
+        if finished:
+            self.row_source = None
+            self.verify_duplicate_data()
+        else:
+            self.master.after(STREAM_POLL_MS, self._poll_row_source)
+        self.stocks_frame.config(text=self._stocks_frame_title())
+        
+    def _stocks_frame_title(self):
+        """Título do quadro da tabela, indicando carregamento em andamento ou dados obsoletos"""
+        count = len(self.performance_data)
+        if self.performance_data.attrs.get('stale'):
+            cache_time = self.performance_data.attrs.get('cache_time')
+            title = f"Ações ({count}) - dados de {cache_time:%d/%m %H:%M}" if cache_time else f"Ações ({count}) - dados desatualizados"
+            return title + (", atualizando..." if self.row_source is not None else "")
+        if self.row_source is not None:
+            return f"Ações (carregando... {count} recebidas)"
+        return f"Ações ({count})"
+        
+    def append_stock_rows(self, rows):
+        """Mescla novas linhas nos dados (a linha mais recente de cada ação prevalece) e redesenha a tabela"""
+        new_data = pd.DataFrame(rows)
+        if new_data.empty:
+            return
+        if not self.performance_data.empty:
+            new_data = pd.concat([self.performance_data, new_data], ignore_index=True)
+        self.performance_data = new_data.drop_duplicates(subset='code', keep='last').reset_index(drop=True)
+        self._redraw_stock_table()
+        
+    def _redraw_stock_table(self):
+        """Redesenha a tabela depois que self.performance_data foi alterado"""
+        # Novos setores podem ter aparecido
+        if 'sector' in self.performance_data.columns:
+            sector_values = [str(s).strip() for s in self.performance_data['sector'].dropna().unique() if str(s).strip()]
+            self.sector_combobox.config(values=['Todos'] + sorted(set(sector_values)))
+        
+        # Dados novos, mesma ordenação e filtro: manter a posição de rolagem
+        self.update_table_with_sorted_data(keep_position=True)
         
     def create_widgets(self):
         """Cria todos os widgets do dashboard - versão simplificada sem painel de gráficos"""
@@ -66,27 +198,17 @@ class BrazilStocksDashboard:
         
         # Verificar se há dados
         if data.empty:
-            print("Aviso: Conjunto de dados vazio")
             return data
         
-        # Registrar o total de linhas antes da filtragem
-        total_rows = len(data)
-        print(f"Total de linhas antes do filtro de setor: {total_rows}")
-        
         # Aplicar filtro de setor se não for "Todos"
         if hasattr(self, 'sector_var') and self.sector_var.get() != 'Todos':
             selected_sector = self.sector_var.get()
-            print(f"Filtrando pelo setor: '{selected_sector}'")
             
             # Verificar se a coluna sector existe
             if 'sector' not in data.columns:
                 print("Erro: coluna 'sector' não encontrada nos dados")
                 return data
             
-            # DEBUG: Mostrar alguns setores da base para comparação
-            sample_sectors = data['sector'].dropna().unique()[:5]
-            print(f"Amostra de setores na base: {sample_sectors}")
-            
             # Normalizar valores para comparação - crucial para correspondência exata
             data['normalized_sector'] = data['sector'].fillna('').astype(str).str.strip()
             normalized_selected = selected_sector.strip()
@@ -96,7 +218,6 @@ class BrazilStocksDashboard:
             
             # Se não encontrar resultados, tentar correspondência parcial
             if filtered_data.empty:
-                print(f"Nenhum resultado com correspondência exata para '{selected_sector}'")
                 # Tentar correspondência parcial (contains)
                 filtered_data = data[data['normalized_sector'].str.contains(normalized_selected, case=False, na=False)].copy()
             
@@ -107,15 +228,6 @@ class BrazilStocksDashboard:
             if 'normalized_sector' in data.columns:
                 data.drop('normalized_sector', axis=1, inplace=True)
             
-            # Resultado final
-            num_filtered = len(filtered_data)
-            print(f"Filtro aplicado: {num_filtered} de {total_rows} ações no setor '{selected_sector}'")
-            
-            # Se não encontrou nada, mostrar alerta
-            if num_filtered == 0:
-                print(f"ALERTA: Nenhuma ação encontrada para o setor '{selected_sector}'")
-                print(f"Setores disponíveis: {data['sector'].dropna().unique()}")
-            
             return filtered_data
         
         # Se não há filtro, retornar todos os dados
@@ -124,12 +236,7 @@ class BrazilStocksDashboard:
     def apply_filter(self):
         """Aplica os filtros atuais e atualiza a interface - versão revisada"""
         # Atualizar status antes de aplicar o filtro
-        status_label = ttk.Label(
-            self.scrollable_frame, 
-            text="Aplicando filtros...", 
-            font=("Arial", 10, "italic")
-        )
-        status_label.grid(row=1, column=0, columnspan=14, padx=10, pady=5)
+        self._set_table_status("Aplicando filtros...", font=("Arial", 10, "italic"))
         self.scrollable_frame.update_idletasks()
         
         # Obter texto do filtro
@@ -138,22 +245,14 @@ class BrazilStocksDashboard:
         
         print(f"Aplicando filtros - Texto: '{self.filter_text}', Setor: '{selected_sector}'")
         
-        # Limpar widgets existentes exceto cabeçalhos
-        for widget in self.scrollable_frame.winfo_children():
-            if hasattr(widget, 'grid_info') and widget.grid_info():
-                if int(widget.grid_info().get('row', 0)) > 0:  # Preservar cabeçalhos (linha 0)
-                    widget.destroy()
-        
         # Obter dados filtrados
         filtered_data = self.get_filtered_data()
         
         # Atualizar interface com resultado da filtragem
         if filtered_data.empty:
-            ttk.Label(
-                self.scrollable_frame, 
-                text=f"Nenhum resultado para: Texto='{self.filter_text}', Setor='{selected_sector}'", 
-                font=("Arial", 12)
-            ).grid(row=1, column=0, columnspan=13, padx=10, pady=30)
+            self._set_table_status(f"Nenhum resultado para: Texto='{self.filter_text}', Setor='{selected_sector}'",
+                                   font=("Arial", 12))
+            self._show_table_rows(filtered_data)
             return
         
         # Mostrar resultados da filtragem
@@ -162,16 +261,11 @@ class BrazilStocksDashboard:
             result_text += f" para '{self.filter_text}'"
         if selected_sector != 'Todos':
             result_text += f" no setor '{selected_sector}'"
-            
-        ttk.Label(
-            self.scrollable_frame, 
-            text=result_text, 
-            font=("Arial", 9, "italic")
-        ).grid(row=1, column=0, columnspan=14, padx=10, pady=5)
+        self._set_table_status(result_text)
         
         # Ordenar e mostrar dados filtrados
         sorted_data = filtered_data.sort_values(by='code')
-        self._populate_table_batch(sorted_data, 1, 50, offset=1)  # Começar da linha 2 por causa do status
+        self._show_table_rows(sorted_data)
 
     def clear_filter(self):
         """Limpa todos os filtros e restaura a visualização original - versão revisada"""
@@ -180,44 +274,21 @@ class BrazilStocksDashboard:
         self.filter_entry.delete(0, tk.END)
         self.sector_var.set("Todos")
         
-        # Mostrar status de limpeza
-        status_label = ttk.Label(
-            self.scrollable_frame, 
-            text="Limpando filtros...", 
-            font=("Arial", 10, "italic")
-        )
-        status_label.grid(row=1, column=0, columnspan=14, padx=10, pady=5)
-        self.scrollable_frame.update_idletasks()
-        
-        # Limpar completamente a tabela (exceto cabeçalhos)
-        for widget in self.scrollable_frame.winfo_children():
-            if hasattr(widget, 'grid_info') and widget.grid_info():
-                if int(widget.grid_info().get('row', 0)) > 0:  # Preservar cabeçalhos (linha 0)
-                    widget.destroy()
-        
         # Recarregar todos os dados
         all_data = self.performance_data.copy()
         
         # Verificar se há dados
         if all_data.empty:
-            ttk.Label(
-                self.scrollable_frame, 
-                text="Nenhum dado disponível", 
-                font=("Arial", 12)
-            ).grid(row=1, column=0, columnspan=14, padx=10, pady=10)
+            self._set_table_status("Nenhum dado disponível", font=("Arial", 12))
+            self._show_table_rows(all_data)
             return
         
         # Exibir status de recarregamento
-        ttk.Label(
-            self.scrollable_frame, 
-            text=f"Mostrando todas as {len(all_data)} ações", 
-            font=("Arial", 9, "italic")
-        ).grid(row=1, column=0, columnspan=14, padx=10, pady=5)
+        self._set_table_status(f"Mostrando todas as {len(all_data)} ações")
         
         # Ordenar e mostrar todos os dados
         sorted_data = all_data.sort_values(by='code')
-        self._populate_table_batch(sorted_data, 1, 50, offset=1)  # Começar da linha 2 por causa do status
-    
+        self._show_table_rows(sorted_data)
 
     def setup_sector_filter(self, parent_frame):
         """Configura o filtro de setores e seletor de período para barras visuais"""
@@ -264,6 +335,8 @@ class BrazilStocksDashboard:
             'Anual': 'yearly_return',
             'YTD': 'ytd_return'
         }
+        if self.intraday_tracker is not None:
+            self.period_column_map['Intradiário'] = 'intraday_return'
         
         # Combobox para seleção de período
         self.visual_period_var = tk.StringVar(value='Mensal')
@@ -300,60 +373,29 @@ class BrazilStocksDashboard:
         """Método interno para aplicar o filtro com o setor específico"""
         print(f"Aplicando filtro para setor: '{selected_sector}' (interno)")
         
-        # Limpar tabela existente
-        for widget in self.scrollable_frame.winfo_children():
-            if hasattr(widget, 'grid_info') and widget.grid_info():
-                if int(widget.grid_info().get('row', 0)) > 0:
-                    widget.destroy()
-        
         # Mostrar mensagem de carregamento
-        loading_label = ttk.Label(
-            self.scrollable_frame, 
-            text=f"Filtrando ações do setor: {selected_sector}...", 
-            font=("Arial", 10, "italic")
-        )
-        loading_label.grid(row=1, column=0, columnspan=14, padx=10, pady=5)
-        self.scrollable_frame.update()
+        self._set_table_status(f"Filtrando ações do setor: {selected_sector}...", font=("Arial", 10, "italic"))
+        self.scrollable_frame.update_idletasks()
         
         # Forçar a filtragem específica do setor selecionado
         filtered_data = self.filter_by_specific_sector(selected_sector)
         
-        # Limpar tabela novamente
-        for widget in self.scrollable_frame.winfo_children():
-            if hasattr(widget, 'grid_info') and widget.grid_info():
-                if int(widget.grid_info().get('row', 0)) > 0:
-                    widget.destroy()
-        
         # Verificar resultado
         if filtered_data.empty:
-            ttk.Label(
-                self.scrollable_frame, 
-                text=f"Nenhuma ação encontrada no setor '{selected_sector}'", 
-                font=("Arial", 12)
-            ).grid(row=1, column=0, columnspan=14, padx=10, pady=30)
+            self._set_table_status(f"Nenhuma ação encontrada no setor '{selected_sector}'", font=("Arial", 12))
+            self._show_table_rows(filtered_data)
             return
         
         # Mensagem de resultado
         result_text = f"Mostrando {len(filtered_data)} ações do setor '{selected_sector}'"
         if selected_sector == 'Todos':
             result_text = f"Mostrando todas as {len(filtered_data)} ações"
+        self._set_table_status(result_text)
         
-        ttk.Label(
-            self.scrollable_frame, 
-            text=result_text, 
-            font=("Arial", 9, "italic")
-        ).grid(row=1, column=0, columnspan=14, padx=10, pady=5)
-        
-        # Preencher tabela com dados filtrados
-        if hasattr(self, 'sort_column') and self.sort_column in filtered_data.columns:
-            sorted_data = filtered_data.sort_values(
-                by=self.sort_column,
-                ascending=self.sort_ascending,
-                na_position='last'
-            )
-        else:
-            sorted_data = filtered_data.sort_values(by='code')
-        self._populate_table_batch(sorted_data, 1, 100, offset=1)
+        # Preencher tabela com dados filtrados (filter_by_specific_sector preserva a ordenação atual)
+        if not (hasattr(self, 'sort_column') and self.sort_column in filtered_data.columns):
+            filtered_data = filtered_data.sort_values(by='code')
+        self._show_table_rows(filtered_data)
 
         # Atualizar cabeçalhos para refletir ordenação atual
         self._setup_table_headers()
@@ -375,21 +417,10 @@ class BrazilStocksDashboard:
             print("Erro: coluna 'sector' não encontrada nos dados")
             return data
         
-        # DEBUG: Mostrar alguns setores para diagnóstico
-        print(f"Filtrando especificamente pelo setor: '{selected_sector}'")
-        unique_sectors = data['sector'].dropna().unique()
-        print(f"Setores disponíveis ({len(unique_sectors)}): {unique_sectors}")
-        
         # Normalizar valores para comparação
         data['normalized_sector'] = data['sector'].fillna('').astype(str).str.strip()
         normalized_selected = selected_sector.strip()
         
-        # Verificar cada linha para diagnóstico
-        sample_size = min(5, len(data))
-        sample_rows = data.sample(sample_size)
-        for idx, row in sample_rows.iterrows():
-            print(f"Amostra {row['code']}: setor={row['sector']}, normalizado={row['normalized_sector']}")
-        
         # Aplicar filtro com correspondência exata
         filtered_data = data[data['normalized_sector'] == normalized_selected].copy()
         
@@ -401,9 +432,6 @@ class BrazilStocksDashboard:
         if 'normalized_sector' in data.columns:
             data.drop('normalized_sector', axis=1, inplace=True)
         
-        # Resultado final
-        print(f"Filtro específico aplicado: {len(filtered_data)} ações encontradas para setor '{selected_sector}'")
-        
         # Preservar ordenação atual se definida
         if hasattr(self, 'sort_column') and self.sort_column in filtered_data.columns:
             filtered_data = filtered_data.sort_values(
@@ -419,38 +447,15 @@ class BrazilStocksDashboard:
         # Redefinir seleção de setor
         self.sector_var.set("Todos")
         
-        # Mostrar status
-        for widget in self.scrollable_frame.winfo_children():
-            if hasattr(widget, 'grid_info') and widget.grid_info():
-                if int(widget.grid_info().get('row', 0)) > 0:
-                    widget.destroy()
-        
-        ttk.Label(
-            self.scrollable_frame, 
-            text="Carregando todas as ações...", 
-            font=("Arial", 10, "italic")
-        ).grid(row=1, column=0, columnspan=14, padx=10, pady=5)
-        self.scrollable_frame.update()
-        
         # Obter todos os dados
         all_data = self.performance_data.copy()
         
-        # Limpar tabela novamente
-        for widget in self.scrollable_frame.winfo_children():
-            if hasattr(widget, 'grid_info') and widget.grid_info():
-                if int(widget.grid_info().get('row', 0)) > 0:
-                    widget.destroy()
-        
         # Mostrar mensagem de resultado
-        ttk.Label(
-            self.scrollable_frame, 
-            text=f"Mostrando todas as {len(all_data)} ações", 
-            font=("Arial", 9, "italic")
-        ).grid(row=1, column=0, columnspan=14, padx=10, pady=5)
+        self._set_table_status(f"Mostrando todas as {len(all_data)} ações")
         
         # Preencher tabela
-        sorted_data = all_data.sort_values(by='code')
-        self._populate_table_batch(sorted_data, 1, 100, offset=1)
+        sorted_data = all_data.sort_values(by='code') if not all_data.empty else all_data
+        self._show_table_rows(sorted_data)
         
     def setup_scrollable_stock_table(self):
         """Versão otimizada da tabela de ações com rolagem mais suave"""
@@ -458,18 +463,38 @@ class BrazilStocksDashboard:
         table_container = ttk.Frame(self.stocks_frame)
         table_container.pack(fill=tk.BOTH, expand=True, pady=5)
         
-        # Criar canvas com scrollbar
+        # Estado da tabela virtualizada: apenas as linhas visíveis têm widgets
+        # (self.row_pool), que recebem os dados de self.table_data a partir de
+        # self.first_visible_row a cada rolagem
+        self.table_data = pd.DataFrame()
+        self.first_visible_row = 0
+        self.row_pool = []
+        self.row_height = TABLE_ROW_HEIGHT  # medida ao criar a primeira linha
+        self.slot_by_code = {}       # ação -> linha do pool que a exibe (apenas ações visíveis)
+        self.selected_codes = set()  # ações selecionadas (Ctrl+clique seleciona várias)
+        self.status_label = None
+        self.header_labels = []
+        self._resize_job = None
+        
+        # Tooltips: um único Toplevel reaproveitado e um único handler de movimento
+        # do mouse, que identifica linha e coluna pelo widget sob o cursor
+        self.tooltip_targets = {}   # widget -> texto (ou função) de widgets fixos
+        self.cell_positions = {}    # célula da tabela -> (linha no pool, coluna)
+        self.tooltip_window = None
+        self.tooltip_key = None
+        
+        # Criar canvas com scrollbar; a rolagem vertical percorre os dados, não o canvas
         self.canvas = tk.Canvas(table_container, borderwidth=0)
-        scrollbar = ttk.Scrollbar(table_container, orient="vertical", command=self.canvas.yview)
+        scrollbar = ttk.Scrollbar(table_container, orient="vertical", command=self._on_table_scrollbar)
+        self.table_scrollbar = scrollbar
         
         # Frame dentro do canvas
         self.scrollable_frame = ttk.Frame(self.canvas)
         
         # Configurações gerais do canvas
         self.scrollable_frame.bind("<Configure>", self._on_frame_configure)
-        canvas_window = self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.bind('<Configure>', lambda e: self.canvas.itemconfig(canvas_window, width=e.width))
-        self.canvas.configure(yscrollcommand=scrollbar.set)
+        self.canvas_window = self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
+        self.canvas.bind('<Configure>', self._on_canvas_configure)
         
         # Empacotar os componentes
         self.canvas.pack(side="left", fill="both", expand=True)
@@ -486,12 +511,18 @@ class BrazilStocksDashboard:
         # Configura cabeçalhos
         self._setup_table_headers()
         
-        # Guardar referência para scroll incrível
+        # Coluna de barras de rentabilidade: um único canvas ao lado das linhas de widgets
+        self.create_performance_bar_column()
+        
+        # Preencher as linhas visíveis
         self.populate_stock_table()
         
-        # Armazenar atributos para calcular scroll eficiente
-        self.last_visible_range = (0, 50)  # Inicializar com valores padrão
-        self.all_stock_data = self.performance_data  # Armazenar cópia de todos os dados
+        # Adicionar binding global para Enter
+        self.master.bind("<Return>", lambda e: self.show_selected_stock_graph())
+        
+        # Tooltips delegados: eventos de todos os widgets passam pela janela principal
+        self.master.bind("<Motion>", self._on_tooltip_motion, add="+")
+        self.master.bind("<Leave>", self._on_tooltip_leave, add="+")
 
     def _on_frame_configure(self, event=None):
         """Configura a região de rolagem corretamente"""
@@ -526,172 +557,245 @@ class BrazilStocksDashboard:
         else:  # Windows
             delta = int(event.delta/40) * 3  # Aumentar velocidade
         
-        self.canvas.yview_scroll(-delta, "units")
+        self._scroll_table_rows(-delta)
         return "break"  # Impedir propagação do evento
 
-    def _check_scroll_end(self, event=None):
-        """Verifica se o usuário chegou próximo ao final do scroll para carregar mais dados"""
-        if not hasattr(self, 'canvas'):
+    def _on_canvas_configure(self, event):
+        """Acompanha a largura do canvas e ajusta a quantidade de linhas à altura visível"""
+        self.canvas.itemconfig(self.canvas_window, width=event.width)
+        if self._resize_job is None:
+            self._resize_job = self.master.after_idle(self._resize_row_pool)
+
+    def _fitting_row_count(self):
+        """Quantidade de linhas de widgets necessária para cobrir a área visível"""
+        height = self.canvas.winfo_height()
+        if height <= 1:
+            return DEFAULT_VISIBLE_ROWS
+        bbox = self.scrollable_frame.grid_bbox(0, 0, 0, FIRST_DATA_GRID_ROW - 1)
+        header_height = bbox[1] + bbox[3] if bbox else 0
+        # Uma linha extra, parcialmente visível na borda inferior
+        return max(1, (height - header_height) // self.row_height + 1)
+
+    def _visible_row_count(self):
+        """Linhas de dados inteiramente visíveis (limita a rolagem ao fim dos dados)"""
+        if not self.row_pool:
+            return 0
+        bbox = self.scrollable_frame.grid_bbox(0, FIRST_DATA_GRID_ROW)
+        top = bbox[1] if bbox else 0
+        height = self.canvas.winfo_height()
+        if height <= 1:
+            return len(self.row_pool)
+        return max(1, min(len(self.row_pool), (height - top) // self.row_height))
+
+    def _resize_row_pool(self):
+        """Cria ou remove apenas as linhas de widgets que mudaram com a altura da área visível"""
+        self._resize_job = None
+        if not self.row_pool:
             return
-            
-        # Se estiver próximo ao final, carregar mais dados
-        bottom = self.canvas.yview()[1]
-        if bottom > 0.9:  # Se estiver nos últimos 10% do scroll
-            current_visible = self.last_visible_range[1]
-            # Carregar mais 50 linhas
-            new_end = min(current_visible + 50, len(self.all_stock_data))
-            if new_end > current_visible:
-                self.populate_visible_rows(current_visible, new_end)
+        count = self._fitting_row_count()
+        if count > len(self.row_pool):
+            self._build_row_pool(count - len(self.row_pool))
+        elif count < len(self.row_pool):
+            for slot in self.row_pool[count:]:
+                for widget in slot['cells']:
+                    self.cell_positions.pop(str(widget), None)
+                    widget.destroy()
+                self.bar_canvas.delete(*slot['bar_items'])
+                self.scrollable_frame.grid_rowconfigure(slot['grid_row'], minsize=0)
+            del self.row_pool[count:]
+            self._resize_performance_bar_column()
+        self._set_first_visible_row(self.first_visible_row, force=True)
+
+    def _scroll_table_rows(self, delta):
+        """Rola a tabela em delta linhas de dados"""
+        self._set_first_visible_row(self.first_visible_row + delta)
+
+    def _on_table_scrollbar(self, action, value, unit=None):
+        """Comando da barra de rolagem vertical ('moveto' fração ou 'scroll' n unidades/páginas)"""
+        if action == 'moveto':
+            first = float(value) * len(self.table_data)
+        else:
+            step = int(value) * (self._visible_row_count() if unit == 'pages' else 1)
+            first = self.first_visible_row + step
+        self._set_first_visible_row(first)
+
+    def _set_first_visible_row(self, first, force=False):
+        """Posiciona a janela de linhas visíveis e reassocia os dados às linhas de widgets"""
+        max_first = max(0, len(self.table_data) - self._visible_row_count())
+        first = max(0, min(int(first), max_first))
+        if force or first != self.first_visible_row:
+            self.first_visible_row = first
+            self._bind_visible_rows()
+        self._update_table_scrollbar()
+
+    def _update_table_scrollbar(self):
+        total = len(self.table_data)
+        if total == 0:
+            self.table_scrollbar.set(0, 1)
+            return
+        visible = self._visible_row_count()
+        self.table_scrollbar.set(self.first_visible_row / total,
+                                 min(1.0, (self.first_visible_row + visible) / total))
 
     def populate_stock_table(self):
         """Preenche a tabela com todas as ações - versão corrigida e otimizada"""
-        # Limpar widgets existentes exceto cabeçalhos
-        for widget in self.scrollable_frame.winfo_children():
-            if hasattr(widget, 'grid_info'):
-                if int(widget.grid_info().get('row', 0)) > 0:  # Preservar cabeçalhos (linha 0)
-                    widget.destroy()
-        
         # Obter dados filtrados (usando o método corrigido)
         filtered_data = self.get_filtered_data()
         
         # Verificar se há dados
         if filtered_data.empty:
-            ttk.Label(self.scrollable_frame, text="Nenhum dado disponível", font=("Arial", 12)).grid(
-                row=1, column=0, padx=10, pady=10, columnspan=13)
+            self._set_table_status("Nenhum dado disponível", font=("Arial", 12))
+            self._show_table_rows(filtered_data)
             return
         
         print(f"Total de ações após filtros: {len(filtered_data)}")
         
         # Ordenar por código para facilitar localização
         sorted_data = filtered_data.sort_values(by='code')
-        
-        # Processar em lotes para melhor desempenho
-        self._populate_table_batch(sorted_data, 0, 50)
+        self._set_table_status("")
+        self._show_table_rows(sorted_data)
 
-    def _populate_table_batch(self, data, start_idx, batch_size, offset=0):
-        """Versão que inclui barras de rentabilidade horizontal"""
-        end_idx = min(start_idx + batch_size, len(data))
-        batch = data.iloc[start_idx:end_idx]
-        
-        # Determinar qual coluna de rentabilidade está selecionada para visualização
-        selected_return_col = self.selected_metric if hasattr(self, 'selected_metric') else 'monthly_return'
-        
-        for i, (_, row) in enumerate(batch.iterrows(), start_idx + 1):
-            # Calcular a linha real na grid considerando o offset
-            grid_row = i + offset
-            
-            try:
-                # Obter dados básicos
-                ticker = str(row['code']) if 'code' in row else "N/A"
-                
-                # Executar diagnóstico para ações problemáticas conhecidas
-                problematic_tickers = ["ELET6", "ENEV3", "ENGI11", "CMIG4", "CPFE3"]
-                if ticker in problematic_tickers:
-                    self.debug_value_issues(ticker, row, ["daily_return", "monthly_return", 
-                                                        "quarterly_return", "yearly_return"])
-                
-                # Verificar se os dados estão em branco ou zerados
-                visual_value = self.safe_get_value(row, selected_return_col)
-                
-                # Debug para valores problemáticos
-                if pd.isna(visual_value) or visual_value == 0.0:
-                    print(f"Atenção: {ticker} tem valor {selected_return_col}={visual_value}")
-                
-                # Obter valores com segurança
-                price = self.safe_get_value(row, 'current_price')
-                open_price = self.safe_get_value(row, 'open_price')
-                low_price = self.safe_get_value(row, 'low_price')
-                high_price = self.safe_get_value(row, 'high_price') 
-                close_price = self.safe_get_value(row, 'close_price')
-                
-                financial_volume = self.safe_get_value(row, 'volume')
-                trades_volume = self.safe_get_value(row, 'trades') if 'trades' in row else 0.0
-                
-                # Retornos
-                daily_change = self.safe_get_value(row, 'daily_return')
-                monthly_change = self.safe_get_value(row, 'monthly_return')
-                quarterly_change = self.safe_get_value(row, 'quarterly_return')
-                yearly_change = self.safe_get_value(row, 'yearly_return')
-                ytd_change = self.safe_get_value(row, 'ytd_return')
-                
-                # Obter o valor para a barra visual
-                visual_value = self.safe_get_value(row, selected_return_col)
-                
-                # Obter o setor para tooltip
-                sector_value = row['sector'] if 'sector' in row else "N/A"
-                
-                # Adicionar cada célula à tabela
-                ticker_label = ttk.Label(self.scrollable_frame, text=ticker)
-                ticker_label.grid(row=grid_row, column=0, padx=5, pady=2, sticky="w")
-                
-                # Adicionar tooltip com setor
-                self.add_tooltip(ticker_label, f"Setor: {sector_value}")
-                
-                # Adicionar demais campos
-                ttk.Label(self.scrollable_frame, text=f"R$ {price:.2f}").grid(
-                    row=grid_row, column=1, padx=5, pady=2, sticky="e")
-                ttk.Label(self.scrollable_frame, text=f"R$ {open_price:.2f}").grid(
-                    row=grid_row, column=2, padx=5, pady=2, sticky="e")
-                ttk.Label(self.scrollable_frame, text=f"R$ {low_price:.2f}").grid(
-                    row=grid_row, column=3, padx=5, pady=2, sticky="e")
-                ttk.Label(self.scrollable_frame, text=f"R$ {high_price:.2f}").grid(
-                    row=grid_row, column=4, padx=5, pady=2, sticky="e")
-                ttk.Label(self.scrollable_frame, text=f"R$ {close_price:.2f}").grid(
-                    row=grid_row, column=5, padx=5, pady=2, sticky="e")
-                
-                # Formatação para volumes
-                vol_text = f"R$ {financial_volume/1_000_000:.2f}M" if financial_volume >= 1_000_000 else \
-                         f"R$ {financial_volume/1_000:.2f}K" if financial_volume > 0 else "R$ 0.00"
-                
-                ttk.Label(self.scrollable_frame, text=vol_text).grid(
-                    row=grid_row, column=6, padx=5, pady=2, sticky="e")
-                
-                # Formatação melhorada para quantidade de negócios
-                trades_volume = self.safe_get_value(row, 'trades') if 'trades' in row else 0.0
-
-                # Formatação melhorada para quantidade de negócios (mais legível)
-                if trades_volume > 1_000_000:
-                    trades_text = f"{trades_volume/1_000_000:.2f}M"
-                elif trades_volume > 1_000:
-                    trades_text = f"{trades_volume/1_000:.1f}K"
-                elif trades_volume > 0:
-                    trades_text = f"{trades_volume:.0f}"
-                else:
-                    trades_text = "N/A"
+    def _set_table_status(self, text, font=("Arial", 9, "italic")):
+        """Mostra uma mensagem na linha de status da tabela (abaixo dos cabeçalhos)"""
+        if self.status_label is None:
+            self.status_label = ttk.Label(self.scrollable_frame, text=text, font=font)
+            self.status_label.grid(row=1, column=0, columnspan=14, padx=10, pady=5)
+        else:
+            self.status_label.configure(text=text, font=font)
 
-                trades_label = ttk.Label(self.scrollable_frame, text=trades_text)
-                trades_label.grid(row=grid_row, column=7, padx=5, pady=2, sticky="e")
+    def _show_table_rows(self, data, keep_position=False):
+        """
+        Exibe os dados (já filtrados e ordenados) na tabela
+        
+        Uma nova ordenação ou filtro volta à primeira linha; com keep_position=True
+        (dados atualizados durante o carregamento ou no modo intradiário) a posição
+        de rolagem é mantida, limitada à nova quantidade de linhas. As linhas de
+        widgets existentes são reaproveitadas: apenas textos e cores mudam.
+        """
+        self.table_data = data.reset_index(drop=True)
+        if not self.row_pool:
+            self.row_height = self._measure_row_height()
+            self._build_row_pool(self._fitting_row_count())
+        self._set_first_visible_row(self.first_visible_row if keep_position else 0, force=True)
 
-                # Adicionar tooltip com informação adicional
-                if trades_volume > 0:
-                    self.add_tooltip(trades_label, f"Total de {trades_volume:,.0f} negociações")
-                
-                # Formatar as variações com cores
-                self.create_change_label(self.scrollable_frame, daily_change, row=grid_row, column=8)
-                self.create_change_label(self.scrollable_frame, monthly_change, row=grid_row, column=9)
-                self.create_change_label(self.scrollable_frame, quarterly_change, row=grid_row, column=10)
-                self.create_change_label(self.scrollable_frame, yearly_change, row=grid_row, column=11)
-                self.create_change_label(self.scrollable_frame, ytd_change, row=grid_row, column=12)
-                
-                # NOVO: Adicionar barra visual de rentabilidade
-                self.create_performance_bar(
-                    self.scrollable_frame, visual_value, 
-                    max_value=30, row=grid_row, column=13
-                )
-                
-            except Exception as e:
-                print(f"Erro ao adicionar ação {i} ({ticker if 'ticker' in locals() else 'desconhecida'}): {e}")
-                import traceback
-                traceback.print_exc()
+    def _build_row_pool(self, count):
+        """Acrescenta count linhas de widgets, reutilizadas por todas as ações durante a rolagem"""
+        for _ in range(count):
+            grid_row = FIRST_DATA_GRID_ROW + len(self.row_pool)
+            self.scrollable_frame.grid_rowconfigure(grid_row, minsize=self.row_height)
+            self.row_pool.append(self._create_row_slot(grid_row))
+        self._resize_performance_bar_column()
+
+    def _measure_row_height(self):
+        """
+        Mede a altura das linhas da tabela em uma célula de teste, após o layout
+        
+        A altura acompanha a fonte e a escala da tela (DPI); todas as linhas usam
+        essa mesma altura, da qual dependem a rolagem e as barras do canvas único.
+        """
+        probe = ttk.Label(self.scrollable_frame, text="Ág")
+        probe.update_idletasks()
+        height = probe.winfo_reqheight()
+        probe.destroy()
+        return max(TABLE_ROW_HEIGHT, height)
+
+    def _create_row_slot(self, grid_row):
+        """Cria os widgets de uma linha da tabela, inicialmente vazios"""
+        slot = {'grid_row': grid_row, 'code': None, 'shown': [None] * 13, 'bar_shown': None}
+        
+        cells = []
+        for column in range(13):
+            # Ação à esquerda, valores numéricos à direita
+            label = ttk.Label(self.scrollable_frame, text="")
+            label.grid(row=grid_row, column=column, padx=10 if column >= 8 else 5, pady=0,
+                       sticky="w" if column == 0 else "e")
+            self.cell_positions[str(label)] = (grid_row - FIRST_DATA_GRID_ROW, column)
+            cells.append(label)
+        slot['cells'] = cells
+        
+        # Barra visual de rentabilidade (itens no canvas da coluna de barras)
+        self.create_performance_bar(slot, grid_row - FIRST_DATA_GRID_ROW)
+        
+        self.add_selection_bindings(cells[0], grid_row)
+        return slot
+
+    def _bind_visible_rows(self):
+        """Associa as ações da janela visível às linhas de widgets"""
+        # O tooltip aberto se referia à ação que estava na linha antes da rolagem
+        self.hide_tooltip()
+        self.slot_by_code = {}
+        for i, slot in enumerate(self.row_pool):
+            index = self.first_visible_row + i
+            if index < len(self.table_data):
+                self._bind_row(slot, self.table_data.iloc[index])
+                self.slot_by_code[slot['code']] = slot
+            else:
+                self._clear_row_slot(slot)
+
+    def _clear_row_slot(self, slot):
+        slot['code'] = None
+        background = self._row_background(False)
+        for column in range(len(slot['cells'])):
+            self._configure_cell(slot, column, "", "black", background)
+        if slot['bar_shown'] is not None:
+            slot['bar_shown'] = None
+            self.draw_performance_bar(slot, None)
+
+    def _configure_cell(self, slot, column, text, color, background):
+        """Atualiza uma célula apenas se o texto ou as cores mudaram"""
+        state = (text, color, background)
+        if slot['shown'][column] != state:
+            slot['shown'][column] = state
+            slot['cells'][column].configure(text=text, foreground=color, background=background)
+
+    def _bind_row(self, slot, row):
+        """Preenche uma linha de widgets com os dados de uma ação"""
+        # Determinar qual coluna de rentabilidade está selecionada para visualização
+        selected_return_col = self.selected_metric if hasattr(self, 'selected_metric') else 'monthly_return'
         
-        # Se ainda há mais dados para mostrar, agendar o próximo lote
-        if end_idx < len(data):
-            self.master.after(10, lambda: self._populate_table_batch(data, end_idx, batch_size, offset))
+        ticker = str(row['code']) if 'code' in row else "N/A"
+        
+        # Obter valores com segurança
+        price = self.safe_get_value(row, 'current_price')
+        open_price = self.safe_get_value(row, 'open_price')
+        low_price = self.safe_get_value(row, 'low_price')
+        high_price = self.safe_get_value(row, 'high_price')
+        close_price = self.safe_get_value(row, 'close_price')
+        financial_volume = self.safe_get_value(row, 'volume')
+        trades_volume = self.safe_get_value(row, 'trades') if 'trades' in row else 0.0
+        
+        # Formatação para volumes
+        vol_text = f"R$ {financial_volume/1_000_000:.2f}M" if financial_volume >= 1_000_000 else \
+                 f"R$ {financial_volume/1_000:.2f}K" if financial_volume > 0 else "R$ 0.00"
+        
+        # Formatação para quantidade de negócios (mais legível)
+        if trades_volume > 1_000_000:
+            trades_text = f"{trades_volume/1_000_000:.2f}M"
+        elif trades_volume > 1_000:
+            trades_text = f"{trades_volume/1_000:.1f}K"
+        elif trades_volume > 0:
+            trades_text = f"{trades_volume:.0f}"
         else:
-            # Terminou, adicionar bindings
-            self.add_selection_bindings()
-            self.scrollable_frame.update_idletasks()
-            print("Tabela preenchida com sucesso!")
+            trades_text = "N/A"
+        
+        texts = [(ticker, "black"), (f"R$ {price:.2f}", "black"), (f"R$ {open_price:.2f}", "black"),
+                 (f"R$ {low_price:.2f}", "black"), (f"R$ {high_price:.2f}", "black"),
+                 (f"R$ {close_price:.2f}", "black"), (vol_text, "black"), (trades_text, "black")]
+        
+        # Variações com cores
+        for column in ['daily_return', 'monthly_return', 'quarterly_return', 'yearly_return', 'ytd_return']:
+            texts.append(self.format_change(self.safe_get_value(row, column)))
+        
+        background = self._row_background(ticker in self.selected_codes)
+        for column, (text, color) in enumerate(texts):
+            self._configure_cell(slot, column, text, color, background)
+        
+        visual_value = self.safe_get_value(row, selected_return_col)
+        slot['code'] = ticker
+        bar_state = (visual_value, self.sort_column == selected_return_col)
+        if slot['bar_shown'] != bar_state:
+            slot['bar_shown'] = bar_state
+            self.draw_performance_bar(slot, visual_value)
 
     def safe_get_value(self, row, column_name):
         """Extrai com segurança um valor numérico de uma linha do DataFrame"""
@@ -734,38 +838,24 @@ class BrazilStocksDashboard:
             print(f"Erro ao processar {row.get('code','desconhecido')}.{column_name}: {str(e)}")
             return 0.0
 
-    def add_selection_bindings(self):
-        """Adiciona eventos de clique para seleção de ações na tabela - versão simplificada"""
-        # Verificar quantas linhas existem no frame scrollable
-        total_rows = self.scrollable_frame.grid_size()[1]
-        
-        # Limpar bindings anteriores para evitar duplicação
-        self.click_bindings = []  # Para manter referências
-        
-        for row in range(1, total_rows):
-            # Para a primeira coluna apenas (suficiente para o evento)
-            widgets = self.scrollable_frame.grid_slaves(row=row, column=0)
-            if widgets:
-                widget = widgets[0]
-                # Remover bindings anteriores
-                widget.unbind("<Button-1>")
-                widget.unbind("<Double-Button-1>")
-                widget.unbind("<Return>")
-                
-                # Adicionar novos bindings
-                widget.bind("<Button-1>", lambda e, r=row: self._handle_single_click(r))
-                widget.bind("<Double-Button-1>", lambda e, r=row: self._handle_double_click(r))
-                # Adicionar binding para Enter para facilitar o uso com teclado
-                widget.bind("<Return>", lambda e, r=row: self._handle_double_click(r))
-                
-                self.click_bindings.append((widget, row))
-        
-        # Adicionar binding global para Enter
-        self.master.bind("<Return>", lambda e: self.show_selected_stock_graph())
+    def add_selection_bindings(self, widget, row):
+        """Adiciona eventos de clique para seleção de ações a uma linha da tabela"""
+        widget.bind("<Button-1>", lambda e, r=row: self._handle_single_click(r))
+        widget.bind("<Control-Button-1>", lambda e, r=row: self._handle_single_click(r, add=True))
+        widget.bind("<Double-Button-1>", lambda e, r=row: self._handle_double_click(r))
+        # Adicionar binding para Enter para facilitar o uso com teclado
+        widget.bind("<Return>", lambda e, r=row: self._handle_double_click(r))
 
-    def _handle_single_click(self, row):
-        """Função dedicada para tratar cliques simples"""
-        self.select_stock_row(row)
+    def _slot_at(self, row):
+        """Linha do pool de widgets na linha row do grid, ou None"""
+        slot_index = row - FIRST_DATA_GRID_ROW
+        if 0 <= slot_index < len(self.row_pool):
+            return self.row_pool[slot_index]
+        return None
+
+    def _handle_single_click(self, row, add=False):
+        """Função dedicada para tratar cliques simples (add=True: Ctrl+clique, seleção múltipla)"""
+        self.select_stock_row(row, add=add)
         # Armazenar a última linha selecionada para uso em outros contextos
         self.last_selected_row = row
 
@@ -775,55 +865,67 @@ class BrazilStocksDashboard:
         self.select_stock_row(row)
         
         # Obter ticker para feedback
-        ticker_widget = self.scrollable_frame.grid_slaves(row=row, column=0)
-        if ticker_widget:
-            ticker = ticker_widget[0].cget('text')
-            print(f"Linha selecionada: {ticker}")
-
-    def select_stock_row(self, row):
-        """Destaca a linha selecionada"""
-        # Resetar cores de todas as linhas
-        for r in range(1, self.scrollable_frame.grid_size()[1]):
-            for c in range(self.scrollable_frame.grid_size()[0]):
-                widget = self.scrollable_frame.grid_slaves(row=r, column=c)
-                if widget:
-                    widget[0].configure(background=self.master.cget('bg'))
-        
-        # Destacar a linha selecionada
-        for col in range(self.scrollable_frame.grid_size()[0]):
-            widget = self.scrollable_frame.grid_slaves(row=row, column=col)
-            if widget:
-                widget[0].configure(background='#e0e0ff')  # Cor de destaque leve
+        slot = self._slot_at(row)
+        if slot and slot['code']:
+            print(f"Linha selecionada: {slot['code']}")
+
+    def select_stock_row(self, row, add=False):
+        """
+        Destaca a linha selecionada
+        
+        A seleção guarda as ações (self.selected_codes), não as linhas de widgets, e
+        apenas as linhas visíveis que mudam de estado são repintadas.
+        
+        Args:
+            row: Linha do grid clicada
+            add: Se True, inverte a seleção da ação mantendo as demais selecionadas
+        """
+        slot = self._slot_at(row)
+        if slot is None or not slot['code']:
+            return
+        code = slot['code']
+        
+        if add:
+            if code in self.selected_codes:
+                self.selected_codes.discard(code)
+                self._highlight_code(code, False)
+            else:
+                self.selected_codes.add(code)
+                self._highlight_code(code, True)
+            return
+        
+        # Seleção simples: desmarcar as demais ações e marcar apenas esta
+        for other in self.selected_codes - {code}:
+            self._highlight_code(other, False)
+        self.selected_codes = {code}
+        self._highlight_code(code, True)
+
+    def _row_background(self, selected):
+        return '#e0e0ff' if selected else self.master.cget('bg')  # Cor de destaque leve
+
+    def _highlight_code(self, code, selected):
+        """Repinta a linha de uma ação, se ela estiver visível"""
+        slot = self.slot_by_code.get(code)
+        if slot is None:
+            return
+        background = self._row_background(selected)
+        for column, shown in enumerate(slot['shown']):
+            text, color = shown[:2] if shown else ("", "black")
+            self._configure_cell(slot, column, text, color, background)
 
     def toggle_stock_selection(self, row):
         """Mostra o gráfico de rentabilidade da ação selecionada com duplo clique - versão melhorada"""
-        # Obter o ticker da ação a partir da primeira coluna
-        ticker_widget = self.scrollable_frame.grid_slaves(row=row, column=0)
-        if not ticker_widget:
-            print(f"Não foi encontrado widget na linha {row}, coluna 0")
+        # Obter o ticker da ação exibida na linha
+        slot = self._slot_at(row)
+        if slot is None or not slot['code']:
+            print(f"Nenhuma ação exibida na linha {row}")
             return
             
-        ticker = ticker_widget[0].cget('text')
+        ticker = slot['code']
         print(f"Ação selecionada: {ticker}")
         
-        # Destacar a linha selecionada (resetar destaques primeiro)
-        for r in range(1, self.scrollable_frame.grid_size()[1]):
-            for c in range(self.scrollable_frame.grid_size()[0]):
-                try:
-                    widget = self.scrollable_frame.grid_slaves(row=r, column=c)
-                    if widget:
-                        widget[0].configure(background=self.master.cget('bg'))
-                except Exception as e:
-                    print(f"Erro ao limpar destaque: {e}")
-        
-        # Destacar linha da ação atual
-        for col in range(self.scrollable_frame.grid_size()[0]):
-            try:
-                widget = self.scrollable_frame.grid_slaves(row=row, column=col)
-                if widget:
-                    widget[0].configure(background='#e0e0ff')  # Cor de destaque leve
-            except Exception as e:
-                print(f"Erro ao destacar célula: {e}")
+        # Destacar a linha selecionada (desmarcando as demais)
+        self.select_stock_row(row)
         
         # Mostrar mensagem de carregamento primeiro
         for widget in self.chart_display.winfo_children():
@@ -839,14 +941,15 @@ class BrazilStocksDashboard:
         self.master.after(100, lambda: self.show_stock_performance_with_error_handling(ticker, loading_label))
 
 
+    def format_change(self, value):
+        """Texto e cor de uma variação percentual"""
+        if pd.isna(value):
+            return "N/A", "black"
+        return f"{value:.2f}%", "green" if value > 0 else "red" if value < 0 else "black"
+
     def create_change_label(self, parent, value, row, column):
         """Cria um label formatado para mostrar variação percentual com cores"""
-        if pd.isna(value):
-            text = "N/A"
-            color = "black"
-        else:
-            text = f"{value:.2f}%"
-            color = "green" if value > 0 else "red" if value < 0 else "black"
+        text, color = self.format_change(value)
         
         label = ttk.Label(parent, text=text, foreground=color)
         label.grid(row=row, column=column, padx=10, pady=2, sticky="e")
@@ -889,11 +992,16 @@ class BrazilStocksDashboard:
             self.clear_data_cache()  # Reutiliza método existente para limpar cache e reiniciar
 
     def _setup_table_headers(self):
-        """Configura os cabeçalhos da tabela de ações com ordenação interativa"""
+        """
+        Configura os cabeçalhos da tabela de ações com ordenação interativa
+        
+        Os widgets são criados na primeira chamada; as seguintes apenas atualizam os
+        textos (indicador de ordenação e período da coluna de barras).
+        """
         selected_metric = self.selected_metric if hasattr(self, 'selected_metric') else 'monthly_return'
         selected_period = self.visual_period_var.get() if hasattr(self, 'visual_period_var') else "Mensal"
         
-        headers = [
+        self.table_headers = [
             {"name": "Ação", "column": "code", "width": 10},
             {"name": "Preço", "column": "current_price", "width": 10},
             {"name": "Abertura", "column": "open_price", "width": 10},
@@ -910,88 +1018,134 @@ class BrazilStocksDashboard:
             {"name": f"Rentabilidade {selected_period}", "column": selected_metric, "width": 20},  
         ]
         
-        for col, header in enumerate(headers):
-            # Criar um frame para o cabeçalho para poder adicionar indicador de ordenação
-            header_frame = ttk.Frame(self.scrollable_frame)
-            header_frame.grid(row=0, column=col, padx=9, pady=9, sticky="w")
-            
+        if not self.header_labels:
+            for col, header in enumerate(self.table_headers):
+                # Criar um frame para o cabeçalho para poder adicionar indicador de ordenação
+                header_frame = ttk.Frame(self.scrollable_frame)
+                header_frame.grid(row=0, column=col, padx=9, pady=9, sticky="w")
+                
+                header_label = ttk.Label(
+                    header_frame, 
+                    font=("Arial", 10, "bold"),
+                    width=header.get('width', 10),
+                    cursor="hand2"  # Todas as colunas agora são clicáveis
+                )
+                header_label.pack(side=tk.LEFT)
+                
+                # Vincular evento de clique para ordenação (a coluna de barras muda com o período)
+                header_label.bind("<Button-1>", lambda e, col=col: self.sort_table_by_column(self.table_headers[col]["column"]))
+                
+                # Adicionar tooltips explicativos (o texto acompanha o cabeçalho atual)
+                self.add_tooltip(header_label, lambda col=col: self._header_tooltip(self.table_headers[col]))
+                self.header_labels.append(header_label)
+        
+        for header_label, header in zip(self.header_labels, self.table_headers):
             # Verificar se esta coluna é a de ordenação atual
             sort_indicator = ""
             if hasattr(self, 'sort_column') and self.sort_column == header["column"]:
                 sort_indicator = " ▲" if self.sort_ascending else " ▼"
-                
-            header_label = ttk.Label(
-                header_frame, 
-                text=f"{header['name']}{sort_indicator}",
-                font=("Arial", 10, "bold"),
-                width=header.get('width', 10),
-                cursor="hand2"  # Todas as colunas agora são clicáveis
-            )
-            header_label.pack(side=tk.LEFT)
-            
-            # Vincular evento de clique para ordenação
-            header_label.bind("<Button-1>", lambda e, col=header["column"]: self.sort_table_by_column(col))
-            
-            # Adicionar tooltips explicativos
-            tooltip_text = f"Clique para ordenar por {header['name']}"
-            if header["name"] == "D %":
-                tooltip_text = "Variação percentual no último dia útil (clique para ordenar)"
-            elif header["name"] == "M %":
-                tooltip_text = "Variação percentual no último mês (clique para ordenar)"
-            elif header["name"] == "T %":
-                tooltip_text = "Variação percentual nos últimos 3 meses (clique para ordenar)"
-            elif header["name"] == "A %":
-                tooltip_text = "Variação percentual nos últimos 12 meses (clique para ordenar)"
-            elif header["name"] == "YTD %":
-                tooltip_text = "Variação percentual desde o início do ano (clique para ordenar)"
-            elif "Rentabilidade" in header["name"]:
-                tooltip_text = f"Visualização gráfica da rentabilidade {selected_period.lower()} (clique para ordenar)"
-                
-            self.add_tooltip(header_label, tooltip_text)
+            header_label.config(text=f"{header['name']}{sort_indicator}")
+
+    def _header_tooltip(self, header):
+        """Texto explicativo de um cabeçalho da tabela"""
+        tooltip_text = f"Clique para ordenar por {header['name']}"
+        if header["name"] == "D %":
+            tooltip_text = "Variação percentual no último dia útil (clique para ordenar)"
+        elif header["name"] == "M %":
+            tooltip_text = "Variação percentual no último mês (clique para ordenar)"
+        elif header["name"] == "T %":
+            tooltip_text = "Variação percentual nos últimos 3 meses (clique para ordenar)"
+        elif header["name"] == "A %":
+            tooltip_text = "Variação percentual nos últimos 12 meses (clique para ordenar)"
+        elif header["name"] == "YTD %":
+            tooltip_text = "Variação percentual desde o início do ano (clique para ordenar)"
+        elif "Rentabilidade" in header["name"]:
+            selected_period = self.visual_period_var.get() if hasattr(self, 'visual_period_var') else "Mensal"
+            tooltip_text = f"Visualização gráfica da rentabilidade {selected_period.lower()} (clique para ordenar)"
+        return tooltip_text
 
     def add_tooltip(self, widget, text):
-        """Adiciona tooltip a um widget com tratamento de erros"""
-        def enter(event):
-            # Criar janela popup com verificação de erros
-            try:
-                # Verificar se o widget ainda existe e tem bbox
-                if not widget.winfo_exists():
-                    return
-                    
-                bbox = widget.bbox("insert")
-                if not bbox:  # Se bbox for None, usar coordenadas alternativas
-                    x = widget.winfo_rootx() + 20
-                    y = widget.winfo_rooty() + 20
-                else:
-                    x, y, _, _ = bbox
-                    x += widget.winfo_rootx() + 25
-                    y += widget.winfo_rooty() + 20
-                
-                # Remover popup existente
+        """Registra o tooltip de um widget fixo (text pode ser uma função), exibido pelo controlador único"""
+        self.tooltip_targets[str(widget)] = text
+
+    def _row_at(self, index):
+        """Linha de self.table_data exibida na posição index do pool, ou None"""
+        data_index = self.first_visible_row + index
+        if 0 <= index < len(self.row_pool) and data_index < len(self.table_data):
+            return self.table_data.iloc[data_index]
+        return None
+
+    def _cell_tooltip(self, index, column):
+        """Texto do tooltip de uma célula da tabela, a partir dos dados da ação exibida"""
+        row = self._row_at(index)
+        if row is None:
+            return ""
+        if column == 0:
+            return f"Setor: {row['sector'] if 'sector' in row else 'N/A'}"
+        if column == 7:
+            trades = self.safe_get_value(row, 'trades') if 'trades' in row else 0.0
+            return f"Total de {trades:,.0f} negociações" if trades > 0 else ""
+        if column == 13:
+            selected_return_col = self.selected_metric if hasattr(self, 'selected_metric') else 'monthly_return'
+            return self._performance_bar_tooltip(self.safe_get_value(row, selected_return_col))
+        return ""
+
+    def _tooltip_at(self, event):
+        """
+        Identifica o alvo de tooltip sob o cursor
+        
+        Returns:
+            tuple: (chave do alvo, texto), ou (None, "") fora de qualquer alvo
+        """
+        name = str(event.widget)
+        position = self.cell_positions.get(name)
+        if position is not None:
+            return position, self._cell_tooltip(*position)
+        if hasattr(self, 'bar_canvas') and name == str(self.bar_canvas):
+            index = event.y // self.row_height
+            return (index, 13), self._cell_tooltip(index, 13)
+        text = self.tooltip_targets.get(name)
+        if text is None:
+            return None, ""
+        return name, text() if callable(text) else text
+
+    def _on_tooltip_motion(self, event):
+        """Handler único de movimento do mouse: mostra, move ou esconde o tooltip"""
+        try:
+            key, text = self._tooltip_at(event)
+            if key == self.tooltip_key:
+                return
+            if not text:
                 self.hide_tooltip()
-                
-                # Criar novo popup
-                self.popup = tk.Toplevel(widget)
-                self.popup.wm_overrideredirect(True)
-                self.popup.wm_geometry(f"+{x}+{y}")
-                
-                label = ttk.Label(self.popup, text=text, background="#ffffe0", 
-                                relief="solid", borderwidth=1, font=("Arial", 9))
-                label.pack(ipadx=5, ipady=2)
-            except Exception as e:
-                print(f"Erro ao mostrar tooltip: {e}")
-        
-        def leave(event):
+                return
+            self.show_tooltip(text, event.x_root + 20, event.y_root + 20)
+            self.tooltip_key = key
+        except Exception as e:
+            print(f"Erro ao mostrar tooltip: {e}")
+
+    def _on_tooltip_leave(self, event):
+        """Esconde o tooltip quando o cursor sai da janela"""
+        if str(event.widget) == str(self.master):
             self.hide_tooltip()
-        
-        widget.bind("<Enter>", enter)
-        widget.bind("<Leave>", leave)
+
+    def show_tooltip(self, text, x, y):
+        """Mostra o tooltip na posição indicada, criando a janela apenas na primeira vez"""
+        if self.tooltip_window is None:
+            self.tooltip_window = tk.Toplevel(self.master)
+            self.tooltip_window.wm_overrideredirect(True)
+            self.tooltip_label = ttk.Label(self.tooltip_window, background="#ffffe0", 
+                                           relief="solid", borderwidth=1, font=("Arial", 9))
+            self.tooltip_label.pack(ipadx=5, ipady=2)
+        self.tooltip_label.config(text=text)
+        self.tooltip_window.wm_geometry(f"+{x}+{y}")
+        self.tooltip_window.deiconify()
+        self.tooltip_window.lift()
 
     def hide_tooltip(self):
-        """Esconde o tooltip atual se existir"""
-        if hasattr(self, 'popup') and self.popup:
-            self.popup.destroy()
-            self.popup = None
+        """Esconde o tooltip atual se existir (a janela é mantida para ser reaproveitada)"""
+        if self.tooltip_key is not None:
+            self.tooltip_key = None
+            self.tooltip_window.withdraw()
 
     def sort_table_by_column(self, column):
         """Ordena a tabela por uma coluna específica, alternando entre ascendente e descendente"""
@@ -1009,14 +1163,12 @@ class BrazilStocksDashboard:
         # Aplicar a ordenação e atualizar a tabela
         self.update_table_with_sorted_data()
 
-    def update_table_with_sorted_data(self):
-        """Atualiza a tabela com dados ordenados pela coluna selecionada"""
-        # Limpar widgets existentes exceto cabeçalhos
-        for widget in self.scrollable_frame.winfo_children():
-            if hasattr(widget, 'grid_info') and widget.grid_info():
-                if int(widget.grid_info().get('row', 0)) > 0:  # Preservar cabeçalhos
-                    widget.destroy()
+    def update_table_with_sorted_data(self, keep_position=False):
+        """
+        Atualiza a tabela com dados ordenados pela coluna selecionada
         
+        keep_position=True (atualização dos dados, não da ordenação) mantém a rolagem.
+        """
         # Obter dados filtrados atuais
         if hasattr(self, 'sector_var') and self.sector_var.get() != 'Todos':
             filtered_data = self.filter_by_specific_sector(self.sector_var.get())
@@ -1025,11 +1177,8 @@ class BrazilStocksDashboard:
         
         # Verificar se temos dados
         if filtered_data.empty:
-            ttk.Label(
-                self.scrollable_frame, 
-                text="Nenhum dado disponível para exibição",
-                font=("Arial", 12)
-            ).grid(row=1, column=0, columnspan=13, padx=10, pady=30)
+            self._set_table_status("Nenhum dado disponível para exibição", font=("Arial", 12))
+            self._show_table_rows(filtered_data, keep_position)
             return
         
         # Ordenar dados com base na coluna e direção selecionadas
@@ -1056,6 +1205,7 @@ class BrazilStocksDashboard:
             "quarterly_return": "Rentabilidade trimestral",
             "yearly_return": "Rentabilidade anual", 
             "ytd_return": "Rentabilidade YTD",
+            "intraday_return": "Rentabilidade intradiária",
             "trades": "Quantidade de Negócios",  # Adicionado
             "volume": "Volume Financeiro"  # Adicionado
         }
@@ -1068,50 +1218,52 @@ class BrazilStocksDashboard:
         
         result_text += f" - Ordenado por {column_display} {'(crescente) ↑' if self.sort_ascending else '(decrescente) ↓'}"
         
-        ttk.Label(
-            self.scrollable_frame, 
-            text=result_text, 
-            font=("Arial", 9, "italic")
-        ).grid(row=1, column=0, columnspan=14, padx=10, pady=5)
+        self._set_table_status(result_text)
         
         # Preencher tabela com dados ordenados
-        self._populate_table_batch(sorted_data, 1, 100, offset=1)
+        self._show_table_rows(sorted_data, keep_position)
         
-        # Atualizar os cabeçalhos para mostrar qual coluna está ordenada
+        # Atualizar os cabeçalhos (coluna ordenada e período da coluna de barras)
         self._setup_table_headers()
-        
-        # Atualizar cabeçalho da coluna de barras para mostrar o período atual
-        self.update_bar_column_header()
-    
-    def update_bar_column_header(self):
-        """Atualiza o cabeçalho da coluna de barras para mostrar o período atual"""
-        if not hasattr(self, 'scrollable_frame'):
-            return
-            
-        # Obter o widget do cabeçalho da coluna de barras (última coluna)
-        header_widgets = self.scrollable_frame.grid_slaves(row=0, column=13)
-        if not header_widgets:
-            return
-            
-        # Procurar pelo label dentro do frame do cabeçalho
-        header_frame = header_widgets[0]
-        for widget in header_frame.winfo_children():
-            if isinstance(widget, ttk.Label):
-                # Obter o período atual selecionado
-                period = self.visual_period_var.get() if hasattr(self, 'visual_period_var') else "Mensal"
-                widget.config(text=f"Rentabilidade {period}")
-                
-                # Atualizar tooltip
-                self.add_tooltip(widget, f"Visualização gráfica da rentabilidade {period.lower()}")
-                break
 
-    def create_performance_bar(self, parent, value, max_value=30, row=0, column=0):
-        """Cria uma barra horizontal para visualizar a rentabilidade"""
-        frame = ttk.Frame(parent)
-        frame.grid(row=row, column=column, padx=5, pady=2, sticky="w")
-        
-        # Definir tamanho da barra
-        bar_width = 200  # largura total disponível
+    def create_performance_bar_column(self):
+        """Cria o canvas da coluna de barras, compartilhado por todas as linhas da tabela"""
+        self.bar_canvas = tk.Canvas(self.scrollable_frame, width=BAR_WIDTH, height=self.row_height,
+                                    bd=0, highlightthickness=0)
+        self.bar_canvas.grid(row=FIRST_DATA_GRID_ROW, column=13, rowspan=1, padx=5, pady=0, sticky="nw")
+
+    def _resize_performance_bar_column(self):
+        """Faz o canvas de barras ocupar exatamente as linhas de widgets existentes"""
+        rows = max(1, len(self.row_pool))
+        self.bar_canvas.configure(height=rows * self.row_height)
+        self.bar_canvas.grid(row=FIRST_DATA_GRID_ROW, column=13, rowspan=rows, padx=5, pady=0, sticky="nw")
+
+    def create_performance_bar(self, slot, index):
+        """Cria, ocultos, os itens da barra de rentabilidade de uma linha da tabela"""
+        top = index * self.row_height + (self.row_height - BAR_HEIGHT) // 2
+        center = BAR_WIDTH / 2
+        canvas = self.bar_canvas
+        slot['bar_top'] = top
+        slot['bar_items'] = (
+            # Fundo, linha central (zero), barra e valor
+            canvas.create_rectangle(0, top, BAR_WIDTH, top + BAR_HEIGHT, outline="", state="hidden"),
+            canvas.create_line(center, top, center, top + BAR_HEIGHT, fill="gray", state="hidden"),
+            canvas.create_rectangle(center, top + 3, center, top + 12, outline="", state="hidden"),
+            canvas.create_text(center, top + 7.5, font=("Arial", 8, "bold"), state="hidden")
+        )
+
+    def draw_performance_bar(self, slot, value, max_value=30):
+        """
+        Atualiza a barra de rentabilidade de uma linha (None oculta a barra)
+        
+        Apenas coordenadas, cores e texto dos itens existentes mudam; nenhum item é criado.
+        """
+        canvas = self.bar_canvas
+        background, zero_line, bar, label = slot['bar_items']
+        if value is None:
+            for item in slot['bar_items']:
+                canvas.itemconfig(item, state="hidden")
+            return
         
         # Garantir que o valor está dentro dos limites
         if pd.isna(value):
@@ -1121,54 +1273,43 @@ class BrazilStocksDashboard:
         capped_value = max(min(value, max_value), -max_value)
         
         # Calcular tamanho da barra proporcional ao valor
-        bar_size = int(abs(capped_value) / max_value * (bar_width/2))
-        
-        # Criar canvas para desenhar a barra
-        canvas = tk.Canvas(frame, width=bar_width, height=15, bd=0, highlightthickness=0)
-        canvas.pack(side=tk.LEFT)
+        bar_size = int(abs(capped_value) / max_value * (BAR_WIDTH/2))
+        top = slot['bar_top']
+        center = BAR_WIDTH / 2
         
-        # Desenhar fundo claro para melhor visibilidade
+        # Fundo claro para melhor visibilidade (destacado quando ordenado pela métrica)
         bg_color = "#f0f0ff" if (hasattr(self, 'sort_column') and 
                                self.sort_column == self.selected_metric) else "#f8f8f8"
-        canvas.create_rectangle(0, 0, bar_width, 15, fill=bg_color, outline="")
+        canvas.itemconfig(background, fill=bg_color, state="normal")
+        canvas.itemconfig(zero_line, state="normal")
         
-        # Linha central (zero)
-        canvas.create_line(bar_width/2, 0, bar_width/2, 15, fill="gray")
-        
-        # Desenhar a barra
+        # Barra positiva (à direita, verde) ou negativa (à esquerda, vermelha)
         if value > 0:
-            # Barra positiva (à direita)
-            canvas.create_rectangle(
-                bar_width/2, 3, 
-                bar_width/2 + bar_size, 12, 
-                fill="#4CAF50", outline="")  # Verde mais suave
+            canvas.coords(bar, center, top + 3, center + bar_size, top + 12)
+            canvas.itemconfig(bar, fill="#4CAF50", state="normal")
         elif value < 0:
-            # Barra negativa (à esquerda)
-            canvas.create_rectangle(
-                bar_width/2 - bar_size, 3, 
-                bar_width/2, 12, 
-                fill="#F44336", outline="")  # Vermelho mais suave
-        
-        # Adicionar valor como texto
-        text_x = bar_width/2 + 5 if value >= 0 else bar_width/2 - 5
-        value_text = f"{value:.1f}%" if not pd.isna(value) else "N/A"
-        value_color = "#006400" if value > 0 else "#8B0000" if value < 0 else "black"
-        
-        # Adicionar o texto diretamente no canvas
-        canvas.create_text(
-            text_x, 7.5, 
-            text=value_text,
-            fill=value_color,
-            font=("Arial", 8, "bold"),
-            anchor="w" if value >= 0 else "e"
+            canvas.coords(bar, center - bar_size, top + 3, center, top + 12)
+            canvas.itemconfig(bar, fill="#F44336", state="normal")
+        else:
+            canvas.itemconfig(bar, state="hidden")
+        
+        # Valor como texto
+        text_x = center + 5 if value >= 0 else center - 5
+        canvas.coords(label, text_x, top + 7.5)
+        canvas.itemconfig(
+            label,
+            text=f"{value:.1f}%",
+            fill="#006400" if value > 0 else "#8B0000" if value < 0 else "black",
+            anchor="w" if value >= 0 else "e",
+            state="normal"
         )
-        
-        # Adicionar tooltip com valor exato
-        if not pd.isna(value):
-            period = self.visual_period_var.get() if hasattr(self, 'visual_period_var') else "Mensal"
-            self.add_tooltip(canvas, f"Rentabilidade {period.lower()}: {value:.2f}%")
-        
-        return frame
+
+    def _performance_bar_tooltip(self, value):
+        """Tooltip com o valor exato da barra de rentabilidade"""
+        if value is None or pd.isna(value):
+            return ""
+        period = self.visual_period_var.get() if hasattr(self, 'visual_period_var') else "Mensal"
+        return f"Rentabilidade {period.lower()}: {value:.2f}%"
 
     def _on_period_selected(self, event=None):
         """Atualiza a visualização quando o período é alterado - versão completamente corrigida"""
@@ -1202,8 +1343,7 @@ class BrazilStocksDashboard:
         
         # Atualizar a interface
         try:
-            self._setup_table_headers()  # Atualizar cabeçalhos
-            self.update_bar_column_header()  # Atualizar título da coluna de barras
+            self._setup_table_headers()  # Atualizar cabeçalhos (inclui o período da coluna de barras)
             self.update_table_with_sorted_data()  # Atualizar tabela
         finally:
             # Restaurar binding após um pequeno delay
@@ -1267,13 +1407,16 @@ class BrazilStocksDashboard:
         """Verifica dados brutos da fonte para um ticker específico"""
         try:
             from data.stock_data import fetch_stock_data
+            from data.history_cache import get_history_cache
             print(f"\nVERIFICANDO DADOS BRUTOS para {ticker}:")
             
             # Adicionar .SA se não estiver presente
             full_ticker = f"{ticker}.SA" if not ticker.endswith('.SA') else ticker
             
-            # Buscar dados diretamente
-            raw_data = fetch_stock_data(full_ticker)
+            # Usar o histórico já carregado; buscar diretamente apenas se não estiver em cache
+            raw_data = get_history_cache().get(full_ticker)
+            if raw_data is None:
+                raw_data = fetch_stock_data(full_ticker)
             
             # Correção: Pandas DataFrame tem apenas .empty (não tem is_empty)
             if raw_data is None or raw_data.empty:
@@ -1291,50 +1434,3 @@ class BrazilStocksDashboard:
                     print(f"Variação diária calculada: {daily_change:.2f}%")
         except Exception as e:
             print(f"Erro ao verificar dados brutos para {ticker}: {str(e)}")
-
-def calculate_returns(historical_data):
-    """Calcula os retornos para diferentes períodos com verificações adicionais"""
-    returns = {
-        'daily': 0.0,
-        'weekly': 0.0,
-        'monthly': 0.0,
-        'quarterly': 0.0,
-        'yearly': 0.0
-    }
-    
-    try:
-        # Verifica se há dados suficientes
-        if historical_data.empty or len(historical_data) < 2:
-            print("Dados históricos insuficientes para calcular retornos")
-            return returns
-        
-        # Ordena os dados por data para garantir cálculos corretos
-        historical_data = historical_data.sort_index()
-        
-        # Calcula a variação diária (desde o dia anterior)
-        if len(historical_data) >= 2:
-            latest = historical_data['Close'].iloc[-1]
-            previous = historical_data['Close'].iloc[-2]
-            returns['daily'] = ((latest / previous) - 1) * 100
-            
-        # Calcula variações de períodos maiores com verificação de dados suficientes
-        periods = {
-            'weekly': 5,      # ~5 dias úteis
-            'monthly': 21,    # ~21 dias úteis
-            'quarterly': 63,  # ~63 dias úteis
-            'yearly': 252     # ~252 dias úteis
-        }
-        
-        for period_name, days in periods.items():
-            if len(historical_data) > days:
-                latest = historical_data['Close'].iloc[-1]
-                past = historical_data['Close'].iloc[-min(days, len(historical_data)-1)]
-                returns[period_name] = ((latest / past) - 1) * 100
-                print(f"Calculado {period_name} para histórico de {len(historical_data)} dias: {returns[period_name]:.2f}%")
-            else:
-                print(f"Dados insuficientes para {period_name}: {len(historical_data)} < {days}")
-        
-        return returns
-    except Exception as e:
-        print(f"Erro ao calcular retornos: {str(e)}")
-        return returns
\ No newline at end of file
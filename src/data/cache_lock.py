@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import threading
+import logging
+
+from .settings import CACHE_DIR
+
+class CacheLease:
+    def __init__(self, cache_dir=CACHE_DIR, name="refresh", lease_seconds=120):
+        """
+        Concessão (lease) entre processos sobre o diretório de cache
+
+        Apenas o processo que detém a concessão atualiza o cache; as demais
+        instâncias esperam a atualização terminar ou usam a geração anterior.
+        A concessão é um arquivo criado com O_CREAT | O_EXCL (atômico tanto no
+        Windows quanto em POSIX) e renovado periodicamente pelo dono. Se o dono
+        morrer sem liberá-la, ela expira após lease_seconds sem renovação.
+
+        Args:
+            cache_dir: Diretório de cache compartilhado
+            name: Nome da concessão (um arquivo <name>.lock por recurso)
+            lease_seconds: Tempo sem renovação após o qual a concessão é considerada abandonada
+        """
+        self.lock_file = os.path.join(cache_dir, f"{name}.lock")
+        self.lease_seconds = lease_seconds
+        self.owner = f"{os.getpid()}-{threading.get_ident()}-{time.time_ns()}"
+        self.held = False
+        self._stop_heartbeat = threading.Event()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _is_expired(self):
+        try:
+            return time.time() - os.path.getmtime(self.lock_file) > self.lease_seconds
+        except FileNotFoundError:
+            return True
+
+    @staticmethod
+    def _read_lease(path):
+        """
+        Identidade de um arquivo de concessão: (dono, horário da última renovação)
+
+        O dono é None se o arquivo ainda não foi escrito (ou está corrompido).
+
+        Returns:
+            tuple ou None: None se o arquivo não existe
+        """
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                owner = json.load(f).get('owner')
+        except Exception:
+            owner = None
+        return owner, mtime
+
+    def _break_expired(self, expired_lease):
+        """
+        Remove uma concessão abandonada; apenas um processo consegue renomeá-la
+
+        Entre a verificação e a renomeação, outro processo pode ter removido a
+        concessão abandonada e criado uma nova. Por isso o arquivo renomeado é
+        lido de novo: só é apagado se ainda for a mesma concessão expirada (mesmo
+        dono e mesmo horário); caso contrário é devolvido ao lugar.
+
+        Args:
+            expired_lease: Identidade (_read_lease) da concessão vista como expirada
+        """
+        stale_file = f"{self.lock_file}.{self.owner}.stale"
+        try:
+            os.rename(self.lock_file, stale_file)
+        except OSError:
+            return
+
+        if self._read_lease(stale_file) == expired_lease:
+            try:
+                os.remove(stale_file)
+                logging.info(f"Concessão abandonada removida: {self.lock_file}")
+            except OSError:
+                pass
+            return
+
+        # Concessão viva de outro processo: devolver sem sobrescrever uma eventual nova
+        try:
+            os.link(stale_file, self.lock_file)
+        except OSError:
+            logging.info(f"Concessão renovada por outro processo durante a remoção: {self.lock_file}")
+        try:
+            os.remove(stale_file)
+        except OSError:
+            pass
+
+    def acquire(self):
+        """Tenta obter a concessão sem bloquear; retorna True se obtida"""
+        for _ in range(2):
+            try:
+                fd = os.open(self.lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                lease = self._read_lease(self.lock_file)
+                if lease is None:
+                    continue
+                if time.time() - lease[1] <= self.lease_seconds:
+                    return False
+                self._break_expired(lease)
+                continue
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'owner': self.owner, 'pid': os.getpid(), 'acquired_at': time.time()}, f)
+            self.held = True
+            self._stop_heartbeat.clear()
+            threading.Thread(target=self._heartbeat, daemon=True, name="cache-lease").start()
+            return True
+        return False
+
+    def _heartbeat(self):
+        """Renova a concessão enquanto ela estiver sendo usada"""
+        while not self._stop_heartbeat.wait(self.lease_seconds / 4):
+            # Não renovar a concessão de outro processo se esta tiver sido perdida
+            if not self._owns_lock_file():
+                logging.error(f"Concessão do cache perdida: {self.lock_file}")
+                return
+            try:
+                os.utime(self.lock_file)
+            except OSError:
+                return
+
+    def _owns_lock_file(self):
+        try:
+            with open(self.lock_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('owner') == self.owner
+        except Exception:
+            return False
+
+    def release(self):
+        """Libera a concessão, se ainda for deste processo"""
+        if not self.held:
+            return
+        self._stop_heartbeat.set()
+        self.held = False
+        if self._owns_lock_file():
+            try:
+                os.remove(self.lock_file)
+            except OSError as e:
+                logging.error(f"Erro ao liberar concessão do cache: {str(e)}")
+
+    def wait_released(self, timeout=None, poll_seconds=1.0):
+        """
+        Espera outra instância liberar a concessão (ou deixá-la expirar)
+
+        Returns:
+            bool: True se a concessão foi liberada, False se o tempo de espera acabou
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while os.path.exists(self.lock_file) and not self._is_expired():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(poll_seconds)
+        return True
@@ -0,0 +1,110 @@
+import os
+import re
+import json
+import time
+import hashlib
+import shutil
+from datetime import datetime
+import logging
+
+# Arquivos temporários gravados por save(): <ticker>.json.<pid>.tmp
+TMP_FILE_PATTERN = re.compile(r"^.+\.json\.\d+\.tmp$")
+
+# Idade mínima de um temporário para ser considerado resto de gravação interrompida (segundos)
+STALE_TMP_SECONDS = 600
+
+class FetchCheckpoint:
+    def __init__(self, cache_dir, expires_at):
+        """
+        Pontos de controle por ação de uma busca em andamento
+
+        Cada ação processada é gravada em seu próprio arquivo assim que fica
+        pronta, de forma atômica e com um checksum. Se o programa for fechado no
+        meio da busca, a próxima execução reaproveita as ações já gravadas e
+        busca apenas as que faltam ou cujo arquivo está corrompido.
+
+        Args:
+            cache_dir: Diretório onde os pontos de controle serão armazenados
+            expires_at: Função que recebe o horário de gravação e retorna quando os dados
+                deixam de ser atuais (a mesma validade do cache de desempenho,
+                StockDataCache.expires_at), de modo que pontos de controle gravados
+                antes de um fechamento de pregão não entram em uma busca posterior
+        """
+        self.checkpoint_dir = os.path.join(cache_dir, "checkpoints")
+        self.expires_at = expires_at
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+
+    def _path(self, ticker):
+        return os.path.join(self.checkpoint_dir, f"{ticker}.json")
+
+    @staticmethod
+    def _checksum(row):
+        payload = json.dumps(row, sort_keys=True, default=float)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def save(self, ticker, row):
+        """Grava a linha de resultado de uma ação (dicionário) de forma atômica"""
+        entry = {
+            'ticker': ticker,
+            'saved_at': datetime.now().isoformat(),
+            'checksum': self._checksum(row),
+            'row': row
+        }
+        path = self._path(ticker)
+        tmp_file = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, default=float)
+            os.replace(tmp_file, path)
+        except Exception as e:
+            logging.error(f"Erro ao gravar ponto de controle de {ticker}: {str(e)}")
+
+    def load_all(self):
+        """
+        Carrega os pontos de controle válidos
+
+        Entradas corrompidas (JSON inválido ou checksum divergente) e expiradas
+        são removidas para que as ações sejam buscadas novamente.
+
+        Returns:
+            dict: ticker -> linha de resultado
+        """
+        rows = {}
+        now = datetime.now()
+        for file_name in os.listdir(self.checkpoint_dir):
+            path = os.path.join(self.checkpoint_dir, file_name)
+            if not file_name.endswith('.json'):
+                # Restos de gravações interrompidas; temporários recentes podem ser de outro processo
+                if TMP_FILE_PATTERN.match(file_name):
+                    try:
+                        if time.time() - os.path.getmtime(path) > STALE_TMP_SECONDS:
+                            os.remove(path)
+                    except OSError:
+                        pass
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+                if entry['checksum'] != self._checksum(entry['row']):
+                    raise ValueError("checksum divergente")
+                if self.expires_at(datetime.fromisoformat(entry['saved_at'])) <= now:
+                    self._discard(path)
+                    continue
+                rows[entry['ticker']] = entry['row']
+            except Exception as e:
+                logging.info(f"Ponto de controle inválido descartado ({file_name}): {str(e)}")
+                self._discard(path)
+        return rows
+
+    @staticmethod
+    def _discard(path):
+        # Outro processo (ou um clear() concorrente) pode já ter removido o arquivo
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self):
+        """Remove todos os pontos de controle (a busca foi concluída)"""
+        shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
@@ -0,0 +1,175 @@
+import threading
+import heapq
+import itertools
+import time
+from concurrent.futures import Future
+
+# Valores padrão do agendador compartilhado de buscas
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_REQUESTS_PER_SECOND = 2.0
+
+class RetryLater(Exception):
+    """
+    Sinaliza ao agendador que a tarefa deve ser repetida mais tarde
+
+    O worker não dorme: a tarefa volta para a fila com um horário mínimo de
+    execução e o worker segue para a próxima tarefa disponível.
+    """
+    def __init__(self, delay, kwargs=None):
+        super().__init__(f"Nova tentativa em {delay}s")
+        self.delay = delay
+        self.kwargs = kwargs or {}
+
+class TokenBucket:
+    def __init__(self, rate_per_second=DEFAULT_REQUESTS_PER_SECOND, capacity=None):
+        """
+        Limitador de taxa do tipo token bucket, compartilhado entre threads
+
+        Args:
+            rate_per_second: Quantidade de requisições liberadas por segundo
+            capacity: Rajada máxima permitida (padrão: uma requisição por segundo de taxa, mínimo 1)
+        """
+        self.rate = float(rate_per_second)
+        self.capacity = float(capacity if capacity is not None else max(1.0, self.rate))
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def acquire(self, tokens=1):
+        """Bloqueia até que haja tokens disponíveis e os consome"""
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+class FetchScheduler:
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, requests_per_second=DEFAULT_REQUESTS_PER_SECOND):
+        """
+        Pool persistente de workers para as buscas de dados
+
+        Todos os workers consomem a mesma fila: quem fica livre pega a próxima
+        tarefa, então uma ação lenta ocupa apenas um worker e não segura as demais.
+        A fila é ordenada pelo horário mínimo de execução de cada tarefa, de modo
+        que novas tentativas (RetryLater) só são pegas quando vencem.
+
+        Args:
+            max_workers: Quantidade de threads do pool
+            requests_per_second: Orçamento global de requisições por segundo
+        """
+        self.max_workers = max_workers
+        self.limiter = TokenBucket(requests_per_second)
+        self.tasks = []  # heap de (horário mínimo, sequência, tarefa)
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.workers = []
+        self.lock = threading.Lock()
+        self.shutting_down = False
+
+    def _ensure_workers(self):
+        with self.lock:
+            while len(self.workers) < self.max_workers:
+                worker = threading.Thread(target=self._worker_loop, daemon=True,
+                                          name=f"fetch-worker-{len(self.workers)}")
+                self.workers.append(worker)
+                worker.start()
+
+    def _push(self, not_before, task):
+        with self.condition:
+            heapq.heappush(self.tasks, (not_before, next(self.sequence), task))
+            self.condition.notify()
+
+    def _next_task(self):
+        """Espera a próxima tarefa vencida; retorna None quando o agendador é encerrado"""
+        with self.condition:
+            while True:
+                if self.tasks:
+                    not_before, _, task = self.tasks[0]
+                    wait = not_before - time.monotonic()
+                    if wait <= 0:
+                        heapq.heappop(self.tasks)
+                        return task
+                    self.condition.wait(wait)
+                elif self.shutting_down:
+                    return None
+                else:
+                    self.condition.wait()
+
+    def _worker_loop(self):
+        while True:
+            task = self._next_task()
+            if task is None:
+                return
+            future, func, args, kwargs = task
+            if not future.running() and not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(*args, **kwargs))
+            except RetryLater as retry:
+                # Reagendar sem bloquear o worker; o mesmo Future continua pendente
+                self._push(time.monotonic() + retry.delay, (future, func, args, {**kwargs, **retry.kwargs}))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def submit(self, func, *args, **kwargs):
+        """Agenda uma tarefa no pool e retorna um Future com o resultado"""
+        return self.submit_at(0, func, *args, **kwargs)
+
+    def submit_at(self, delay, func, *args, **kwargs):
+        """Agenda uma tarefa para ser executada depois de delay segundos"""
+        if self.shutting_down:
+            raise RuntimeError("Agendador de buscas encerrado")
+        self._ensure_workers()
+        future = Future()
+        self._push(time.monotonic() + delay, (future, func, args, kwargs))
+        return future
+
+    def pending_count(self):
+        """Quantidade de tarefas aguardando execução (incluindo novas tentativas)"""
+        with self.condition:
+            return len(self.tasks)
+
+    def throttle(self):
+        """Aguarda um token do limitador global antes de uma requisição de rede"""
+        self.limiter.acquire()
+
+    def shutdown(self):
+        """Encerra os workers depois que as tarefas pendentes terminarem"""
+        with self.condition:
+            self.shutting_down = True
+            self.condition.notify_all()
+        with self.lock:
+            self.workers = []
+
+# Instância compartilhada por todos os caminhos de busca
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_fetch_scheduler():
+    """Retorna o agendador de buscas compartilhado, criando-o na primeira chamada"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = FetchScheduler()
+        return _scheduler
+
+def configure_fetch_scheduler(max_workers=DEFAULT_MAX_WORKERS, requests_per_second=DEFAULT_REQUESTS_PER_SECOND):
+    """Substitui o agendador compartilhado por um com novos limites"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is not None:
+            _scheduler.shutdown()
+        _scheduler = FetchScheduler(max_workers, requests_per_second)
+        return _scheduler
+
+def throttle():
+    """Atalho para aguardar o limitador global de requisições"""
+    get_fetch_scheduler().throttle()
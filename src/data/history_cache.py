@@ -0,0 +1,148 @@
+import threading
+from collections import OrderedDict
+import pandas as pd
+import logging
+
+from .providers import get_default_provider, ProviderUnavailable
+from .snapshot_client import get_snapshot_client
+
+# Memória máxima ocupada pelos históricos em cache (bytes)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+class HistoryCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Cache em memória, compartilhado pelo processo, dos históricos de preços por ação
+
+        Cada ação guarda um único DataFrame e o intervalo de datas que ele cobre.
+        Consultas a qualquer subintervalo são respondidas recortando esse
+        DataFrame, sem acesso à rede. Quando o total ultrapassa max_bytes, as
+        ações usadas há mais tempo são descartadas (LRU).
+
+        Args:
+            max_bytes: Memória máxima ocupada pelos históricos
+        """
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # ticker -> (início, fim, DataFrame, bytes)
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _day(value):
+        return pd.Timestamp(value).normalize()
+
+    def get(self, ticker, start_date=None, end_date=None):
+        """
+        Histórico da ação no intervalo pedido, ou None se o cache não cobre o intervalo
+
+        A cobertura é comparada por dia: um histórico buscado hoje atende a
+        qualquer consulta que termine hoje.
+        """
+        with self.lock:
+            entry = self.entries.get(ticker)
+            if entry is None:
+                return None
+            covered_start, covered_end, data, _ = entry
+            if start_date is not None and self._day(start_date) < covered_start:
+                return None
+            if end_date is not None and self._day(end_date) > covered_end:
+                return None
+            self.entries.move_to_end(ticker)
+        return data.loc[start_date:end_date] if start_date is not None or end_date is not None else data
+
+    def put(self, ticker, data, start_date, end_date):
+        """
+        Armazena o histórico de uma ação, que cobre de start_date a end_date
+
+        Se o intervalo novo se sobrepõe ao já armazenado, os dois são unidos.
+        """
+        if data is None or data.empty:
+            return
+        start, end = self._day(start_date), self._day(end_date)
+        with self.lock:
+            entry = self.entries.pop(ticker, None)
+            if entry is not None:
+                covered_start, covered_end, cached, nbytes = entry
+                self.total_bytes -= nbytes
+                if start <= covered_end and covered_start <= end:
+                    data = pd.concat([cached, data])
+                    data = data[~data.index.duplicated(keep='last')].sort_index()
+                    start, end = min(start, covered_start), max(end, covered_end)
+
+            nbytes = int(data.memory_usage(deep=True).sum())
+            self.entries[ticker] = (start, end, data, nbytes)
+            self.total_bytes += nbytes
+
+            # Descartar as ações menos usadas recentemente (mantendo ao menos a atual)
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                _, (_, _, _, evicted_bytes) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_bytes
+
+    def invalidate(self, ticker=None):
+        """Remove uma ação do cache (ou todas, se ticker for None)"""
+        with self.lock:
+            if ticker is None:
+                self.entries.clear()
+                self.total_bytes = 0
+            elif ticker in self.entries:
+                self.total_bytes -= self.entries.pop(ticker)[3]
+
+# Instância compartilhada por todos os módulos
+_history_cache = None
+_history_cache_lock = threading.Lock()
+
+def get_history_cache():
+    """Retorna o cache de históricos compartilhado, criando-o na primeira chamada"""
+    global _history_cache
+    with _history_cache_lock:
+        if _history_cache is None:
+            _history_cache = HistoryCache()
+        return _history_cache
+
+def get_histories(tickers, start_date, end_date, use_server=True):
+    """
+    Históricos de várias ações, buscando na rede apenas as que não estão em cache
+
+    Com um servidor de snapshots configurado (ver data.snapshot_client), as ações
+    ausentes são pedidas a ele antes de recorrer ao provedor de dados.
+
+    Args:
+        tickers: Lista de códigos de ações (com sufixo .SA)
+        start_date: Data inicial
+        end_date: Data final
+        use_server: Se False, ignora o servidor de snapshots (usado pelo próprio servidor)
+
+    Returns:
+        dict: Mapeia cada ticker ao seu DataFrame OHLCV (apenas ações com dados)
+    """
+    history_cache = get_history_cache()
+    frames = {}
+    missing = []
+    for ticker in tickers:
+        cached = history_cache.get(ticker, start_date, end_date)
+        if cached is not None and not cached.empty:
+            frames[ticker] = cached
+        else:
+            missing.append(ticker)
+
+    client = get_snapshot_client() if use_server and missing else None
+    if client is not None:
+        try:
+            for ticker in list(missing):
+                data = client.get_history(ticker, start_date, end_date)
+                if data is not None and not data.empty:
+                    history_cache.put(ticker, data, start_date, end_date)
+                    frames[ticker] = data
+                    missing.remove(ticker)
+        except Exception as e:
+            logging.error(f"Servidor de snapshots indisponível para históricos: {str(e)}")
+
+    if missing:
+        try:
+            for ticker, data in get_default_provider().get_history(missing, start_date, end_date).items():
+                history_cache.put(ticker, data, start_date, end_date)
+                frames[ticker] = data
+        except ProviderUnavailable as e:
+            logging.error(f"Históricos indisponíveis para {len(missing)} ações: {str(e)}")
+
+    return frames
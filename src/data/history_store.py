@@ -0,0 +1,166 @@
+import os
+import json
+import pickle
+import threading
+import pandas as pd
+from datetime import timedelta
+import logging
+
+from .settings import CACHE_DIR
+
+class HistoryStore:
+    def __init__(self, cache_dir=CACHE_DIR, max_history_days=450):
+        """
+        Armazena o histórico OHLCV de cada ação em disco para buscas incrementais
+
+        Args:
+            cache_dir: Diretório base do cache
+            max_history_days: Quantidade máxima de dias de histórico mantida por ação
+        """
+        self.history_dir = os.path.join(cache_dir, "history")
+        self.index_file = os.path.join(self.history_dir, "history_index.json")
+        self.max_history = timedelta(days=max_history_days)
+        self.lock = threading.Lock()
+        self.index_dirty = False
+
+        os.makedirs(self.history_dir, exist_ok=True)
+
+        # Índice com a data da última barra armazenada de cada ação
+        self.last_dates = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                return {ticker: pd.Timestamp(value) for ticker, value in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logging.error(f"Erro ao carregar índice do histórico: {str(e)}")
+            return {}
+
+    def _save_index(self):
+        # Chamado com self.lock adquirido
+        tmp_file = f"{self.index_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({ticker: value.isoformat() for ticker, value in self.last_dates.items()}, f)
+        os.replace(tmp_file, self.index_file)
+        self.index_dirty = False
+
+    def flush_index(self):
+        """Grava o índice, se houver alterações pendentes de append(..., flush_index=False)"""
+        with self.lock:
+            if self.index_dirty:
+                try:
+                    self._save_index()
+                except Exception as e:
+                    logging.error(f"Erro ao salvar índice do histórico: {str(e)}")
+
+    def _ticker_file(self, ticker):
+        return os.path.join(self.history_dir, f"{ticker}.pkl")
+
+    @staticmethod
+    def _flatten_columns(data):
+        """Remove o nível de ticker que o yfinance adiciona mesmo em downloads de uma ação"""
+        if isinstance(data.columns, pd.MultiIndex):
+            level = 0 if 'Close' in data.columns.get_level_values(0) else 1
+            data = data.copy()
+            data.columns = data.columns.get_level_values(level)
+        return data
+
+    def last_date(self, ticker):
+        """Data da última barra armazenada, ou None se não houver histórico"""
+        return self.last_dates.get(ticker)
+
+    def fetch_start(self, ticker, default_start):
+        """
+        Data inicial da próxima busca para a ação
+
+        A última barra armazenada é buscada de novo, pois pode ter sido gravada
+        com o pregão ainda em andamento.
+        """
+        last = self.last_date(ticker)
+        if last is None or last < pd.Timestamp(default_start):
+            return default_start
+        return last.to_pydatetime()
+
+    def load(self, ticker):
+        """Carrega o histórico armazenado de uma ação"""
+        path = self._ticker_file(ticker)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            logging.error(f"Erro ao carregar histórico de {ticker}: {str(e)}")
+            return None
+
+    def append(self, ticker, new_data, replace=False, flush_index=True):
+        """
+        Junta as novas barras ao histórico armazenado e salva o resultado
+
+        Leitura, junção, gravação do arquivo e atualização do índice acontecem
+        sob o mesmo lock, para que escritas concorrentes não deixem o índice e
+        os arquivos inconsistentes.
+
+        Args:
+            ticker: Código da ação
+            new_data: DataFrame com as barras recém-baixadas
+            replace: Se True, descarta o histórico anterior
+            flush_index: Se False, o índice só é gravado em flush_index() (buscas em lote)
+
+        Returns:
+            DataFrame: Histórico completo após a junção
+        """
+        new_data = self._flatten_columns(new_data)
+
+        with self.lock:
+            stored = None if replace else self.load(ticker)
+
+            if stored is not None and not stored.empty:
+                merged = pd.concat([stored, new_data])
+                merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+            else:
+                merged = new_data.sort_index()
+
+            if merged.empty:
+                return merged
+
+            # Descartar barras além da janela máxima para o arquivo não crescer sem limite
+            merged = merged[merged.index >= merged.index[-1] - self.max_history]
+
+            try:
+                tmp_file = f"{self._ticker_file(ticker)}.tmp"
+                with open(tmp_file, 'wb') as f:
+                    pickle.dump(merged, f)
+                os.replace(tmp_file, self._ticker_file(ticker))
+
+                self.last_dates[ticker] = merged.index[-1]
+                self.index_dirty = True
+                if flush_index:
+                    self._save_index()
+            except Exception as e:
+                logging.error(f"Erro ao salvar histórico de {ticker}: {str(e)}")
+
+        return merged
+
+    def clear(self):
+        """Remove todo o histórico armazenado"""
+        with self.lock:
+            for name in os.listdir(self.history_dir):
+                os.remove(os.path.join(self.history_dir, name))
+            self.last_dates = {}
+            self.index_dirty = False
+        logging.info("Histórico removido")
+
+# Instância compartilhada por todos os caminhos de busca
+_history_store = None
+_history_store_lock = threading.Lock()
+
+def get_history_store():
+    """Retorna o armazenamento de histórico compartilhado, criando-o na primeira chamada"""
+    global _history_store
+    with _history_store_lock:
+        if _history_store is None:
+            _history_store = HistoryStore()
+        return _history_store
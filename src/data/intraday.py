@@ -0,0 +1,287 @@
+import threading
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+import logging
+
+from .providers import get_default_provider, OHLCV_COLUMNS
+from .settings import CONFIG_FILE, load_config
+
+# Intervalos intradiários suportados (segundos por barra)
+INTRADAY_INTERVALS = {'1m': 60, '2m': 120, '5m': 300, '15m': 900, '30m': 1800}
+
+# Duração aproximada de um pregão da B3 com leilões, para dimensionar o buffer
+SESSION_MINUTES = 8 * 60
+
+# Ações por requisição nas atualizações intradiárias
+INTRADAY_CHUNK_SIZE = 50
+
+# Colunas acrescentadas às linhas de desempenho no modo intradiário
+INTRADAY_COLUMNS = ['intraday_return', 'vwap', 'intraday_high', 'intraday_low', 'intraday_range']
+
+def get_fetch_interval(config_file=CONFIG_FILE):
+    """Intervalo das barras configurado em data_fetch_interval ('1d' por padrão)"""
+    return str(load_config(config_file).get('data_fetch_interval', '1d')).strip() or '1d'
+
+def is_intraday(interval):
+    return interval in INTRADAY_INTERVALS
+
+class IntradayBuffer:
+    def __init__(self, capacity):
+        """
+        Buffer circular das barras intradiárias de uma ação
+
+        Guarda as últimas capacity barras em arrays numpy pré-alocados e mantém
+        agregados do pregão corrente (abertura, máxima, mínima, soma de
+        preço×volume e volume), atualizados apenas com as barras novas. Assim
+        retorno intradiário, VWAP e amplitude custam O(barras novas) por
+        atualização, independentemente de quantas barras o pregão já tem.
+
+        Args:
+            capacity: Quantidade máxima de barras mantidas
+        """
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype='datetime64[ns]')
+        self.values = np.full((capacity, len(OHLCV_COLUMNS)), np.nan)
+        self.next_slot = 0
+        self.count = 0
+        self.last_time = None
+        self._reset_session(None)
+
+    def _reset_session(self, session):
+        self.session = session
+        self.session_open = np.nan
+        self.high = -np.inf
+        self.low = np.inf
+        self.price_volume = 0.0
+        self.volume = 0.0
+        self.last_close = np.nan
+
+    def _accumulate(self, bars, sign=1.0):
+        """Soma (ou subtrai, com sign=-1) a contribuição das barras ao VWAP"""
+        typical = (bars[:, 1] + bars[:, 2] + bars[:, 3]) / 3
+        volume = np.nan_to_num(bars[:, 4])
+        self.price_volume += sign * float(np.nansum(typical * volume))
+        self.volume += sign * float(volume.sum())
+        if sign > 0:
+            if np.isnan(self.session_open):
+                self.session_open = bars[0, 0]
+            self.high = max(self.high, float(np.nanmax(bars[:, 1])))
+            self.low = min(self.low, float(np.nanmin(bars[:, 2])))
+
+    def _write(self, times, bars):
+        if len(times) > self.capacity:
+            times, bars = times[-self.capacity:], bars[-self.capacity:]
+        slots = (self.next_slot + np.arange(len(times))) % self.capacity
+        self.times[slots] = times
+        self.values[slots] = bars
+        self.next_slot = int((self.next_slot + len(times)) % self.capacity)
+        self.count = min(self.count + len(times), self.capacity)
+
+    def append(self, data):
+        """
+        Acrescenta as barras de um DataFrame OHLCV, ignorando as já recebidas
+
+        A última barra recebida pode estar ainda em formação; se ela vier de novo,
+        é substituída (sua contribuição ao VWAP é desfeita antes de somar a nova).
+
+        Returns:
+            int: Quantidade de barras novas
+        """
+        if data is None or data.empty or 'Close' not in data.columns:
+            return 0
+        if not data.index.is_monotonic_increasing:
+            data = data.sort_index()
+        times = data.index.values.astype('datetime64[ns]')
+        bars = data.reindex(columns=OHLCV_COLUMNS).to_numpy(dtype=float)
+        valid = ~np.isnan(bars[:, 3])
+        if not valid.all():
+            times, bars = times[valid], bars[valid]
+
+        if self.last_time is not None:
+            start = int(np.searchsorted(times, self.last_time, side='left'))
+            if start < len(times) and times[start] == self.last_time:
+                slot = (self.next_slot - 1) % self.capacity
+                if times[start].astype('datetime64[D]') == self.session:
+                    self._accumulate(self.values[slot:slot + 1], sign=-1.0)
+                    self._accumulate(bars[start:start + 1])
+                    self.last_close = bars[start, 3]
+                self.values[slot] = bars[start]
+                start += 1
+            times, bars = times[start:], bars[start:]
+
+        if len(times) == 0:
+            return 0
+
+        self._write(times, bars)
+        sessions = times.astype('datetime64[D]')
+        if sessions[-1] != self.session:
+            self._reset_session(sessions[-1])
+        self._accumulate(bars[sessions == self.session])
+        self.last_time = times[-1]
+        self.last_close = bars[-1, 3]
+        return len(times)
+
+    def metrics(self):
+        """Retorno intradiário, VWAP e amplitude do pregão corrente"""
+        if self.session is None or np.isnan(self.last_close):
+            return None
+        return {
+            'current_price': float(self.last_close),
+            'intraday_return': float((self.last_close / self.session_open - 1) * 100) if self.session_open else 0.0,
+            'vwap': self.price_volume / self.volume if self.volume > 0 else float(self.last_close),
+            'intraday_high': self.high,
+            'intraday_low': self.low,
+            'intraday_range': (self.high - self.low) / self.low * 100 if self.low > 0 else 0.0,
+            'bar_time': pd.Timestamp(self.last_time)
+        }
+
+    def bars(self):
+        """Barras armazenadas, da mais antiga para a mais recente"""
+        order = (self.next_slot - self.count + np.arange(self.count)) % self.capacity
+        return pd.DataFrame(self.values[order], index=pd.DatetimeIndex(self.times[order]), columns=OHLCV_COLUMNS)
+
+class IntradayTracker:
+    def __init__(self, interval="1m", capacity=None, chunk_size=INTRADAY_CHUNK_SIZE):
+        """
+        Acompanha as barras intradiárias de várias ações
+
+        Cada atualização baixa as barras do dia em requisições multi-ticker e
+        entrega a cada IntradayBuffer apenas as barras que ele ainda não tem.
+
+        Args:
+            interval: Intervalo das barras ('1m', '5m', ...)
+            capacity: Barras mantidas por ação (padrão: um pregão inteiro)
+            chunk_size: Quantidade de ações por requisição
+        """
+        if not is_intraday(interval):
+            raise ValueError(f"Intervalo intradiário não suportado: {interval}")
+        self.interval = interval
+        self.capacity = capacity or SESSION_MINUTES * 60 // INTRADAY_INTERVALS[interval] + 1
+        self.chunk_size = chunk_size
+        self.buffers = {}
+        self.lock = threading.Lock()
+        self.update_lock = threading.Lock()
+
+    @property
+    def refresh_seconds(self):
+        """Intervalo entre atualizações (uma barra, no mínimo um minuto)"""
+        return max(INTRADAY_INTERVALS[self.interval], 60)
+
+    def _buffer(self, ticker):
+        with self.lock:
+            if ticker not in self.buffers:
+                self.buffers[ticker] = IntradayBuffer(self.capacity)
+            return self.buffers[ticker]
+
+    def fetch_start(self, ticker, session_start):
+        """
+        Início da próxima busca da ação: sua última barra menos um intervalo
+
+        A última barra pode estar em formação e é buscada de novo (o buffer a
+        substitui). Ações sem barras do pregão atual começam em session_start.
+        """
+        with self.lock:
+            buffer = self.buffers.get(ticker)
+        if buffer is None or buffer.last_time is None:
+            return session_start
+        start = pd.Timestamp(buffer.last_time) - pd.Timedelta(seconds=INTRADAY_INTERVALS[self.interval])
+        return max(start, session_start)
+
+    def update(self, tickers):
+        """
+        Busca as barras novas das ações
+
+        Cada ação é pedida apenas a partir da sua última barra armazenada. As
+        ações são ordenadas por esse início antes de serem divididas em lotes,
+        de modo que cada requisição multi-ticker cobre só alguns minutos.
+        Uma atualização já em andamento faz esta chamada retornar sem buscar.
+
+        Returns:
+            int: Quantidade total de barras novas
+        """
+        if not self.update_lock.acquire(blocking=False):
+            return 0
+        try:
+            tickers = [t if t.endswith('.SA') else f"{t}.SA" for t in tickers]
+            session_start = pd.Timestamp(datetime.now().replace(hour=0, minute=0, second=0, microsecond=0))
+            end_date = session_start + timedelta(days=1)
+            starts = {ticker: self.fetch_start(ticker, session_start) for ticker in tickers}
+            tickers = sorted(tickers, key=starts.get)
+            provider = get_default_provider()
+            new_bars = 0
+            for i in range(0, len(tickers), self.chunk_size):
+                chunk = tickers[i:i + self.chunk_size]
+                # Lote ordenado: o primeiro é o que tem o início mais antigo
+                start_date = starts[chunk[0]]
+                try:
+                    frames = provider.get_history(chunk, start_date.to_pydatetime(), end_date.to_pydatetime(),
+                                                  interval=self.interval)
+                except Exception as e:
+                    logging.error(f"Erro na atualização intradiária de {len(chunk)} ações: {str(e)}")
+                    continue
+                for ticker, data in frames.items():
+                    new_bars += self._buffer(ticker).append(data)
+            return new_bars
+        finally:
+            self.update_lock.release()
+
+    def metrics(self, tickers=None):
+        """
+        Métricas intradiárias por ação
+
+        Returns:
+            DataFrame: Indexado pelo código (sem .SA), com current_price e INTRADAY_COLUMNS
+        """
+        with self.lock:
+            buffers = dict(self.buffers)
+        if tickers is not None:
+            wanted = {t if t.endswith('.SA') else f"{t}.SA" for t in tickers}
+            buffers = {t: b for t, b in buffers.items() if t in wanted}
+        rows = {}
+        for ticker, buffer in buffers.items():
+            metrics = buffer.metrics()
+            if metrics is not None:
+                rows[ticker.replace('.SA', '')] = metrics
+        return pd.DataFrame.from_dict(rows, orient='index')
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+def get_intraday_tracker(interval=None):
+    """
+    Retorna o acompanhamento intradiário compartilhado, ou None fora do modo intradiário
+
+    Args:
+        interval: Intervalo das barras; por padrão, data_fetch_interval do config.json
+    """
+    global _tracker
+    interval = interval or get_fetch_interval()
+    if not is_intraday(interval):
+        return None
+    with _tracker_lock:
+        if _tracker is None or _tracker.interval != interval:
+            _tracker = IntradayTracker(interval)
+        return _tracker
+
+def apply_intraday_metrics(performance_data, metrics):
+    """
+    Atualiza as linhas de desempenho com as métricas intradiárias
+
+    current_price passa a ser o último negócio; as colunas INTRADAY_COLUMNS são
+    acrescentadas (ou substituídas). Ações sem barras mantêm os valores anteriores.
+    """
+    if metrics is None or metrics.empty or performance_data.empty or 'code' not in performance_data.columns:
+        return performance_data
+    updated = performance_data.copy()
+    codes = updated['code'].astype(str)
+    for column in ['current_price'] + INTRADAY_COLUMNS:
+        if column not in metrics.columns:
+            continue
+        new_values = codes.map(metrics[column])
+        if column in updated.columns:
+            updated[column] = new_values.fillna(updated[column])
+        else:
+            updated[column] = new_values
+    updated.attrs = dict(performance_data.attrs)
+    return updated
@@ -0,0 +1,73 @@
+import threading
+import pandas as pd
+from datetime import datetime, timedelta
+import logging
+
+# Nomes do calendário da B3 no pandas_market_calendars (varia entre versões)
+B3_CALENDAR_NAMES = ['BMF', 'B3']
+
+# Fallback sem pandas_market_calendars: dias úteis, fechamento aproximado neste horário local
+FALLBACK_CLOSE_HOUR = 18
+
+# Janela de busca do próximo pregão (cobre feriados prolongados como o Carnaval)
+SCHEDULE_LOOKAHEAD_DAYS = 14
+
+_calendar = None
+_calendar_loaded = False
+_calendar_lock = threading.Lock()
+
+def get_b3_calendar():
+    """Retorna o calendário de pregões da B3, ou None se pandas_market_calendars não estiver disponível"""
+    global _calendar, _calendar_loaded
+    with _calendar_lock:
+        if not _calendar_loaded:
+            _calendar_loaded = True
+            try:
+                import pandas_market_calendars as mcal
+            except ImportError:
+                logging.info("pandas_market_calendars não instalado; usando dias úteis para a validade do cache")
+                return None
+            for name in B3_CALENDAR_NAMES:
+                try:
+                    _calendar = mcal.get_calendar(name)
+                    break
+                except Exception:
+                    continue
+            if _calendar is None:
+                logging.error("Calendário da B3 não encontrado no pandas_market_calendars")
+        return _calendar
+
+def _local_timezone():
+    return datetime.now().astimezone().tzinfo
+
+def next_session_close(after):
+    """
+    Horário do primeiro fechamento de pregão da B3 depois de um instante
+
+    Args:
+        after: datetime local (sem fuso), como os usados pelo cache
+
+    Returns:
+        datetime: Fechamento do próximo pregão, em horário local sem fuso
+    """
+    calendar = get_b3_calendar()
+    if calendar is not None:
+        try:
+            local_tz = _local_timezone()
+            schedule = calendar.schedule(start_date=after.date(),
+                                         end_date=after.date() + timedelta(days=SCHEDULE_LOOKAHEAD_DAYS))
+            after_utc = pd.Timestamp(after).tz_localize(local_tz).tz_convert('UTC')
+            closes = schedule['market_close']
+            upcoming = closes[closes > after_utc]
+            if not upcoming.empty:
+                return upcoming.iloc[0].tz_convert(local_tz).tz_localize(None).to_pydatetime()
+        except Exception as e:
+            logging.error(f"Erro ao consultar o calendário da B3: {str(e)}")
+
+    # Fallback: próximo dia útil no horário aproximado de fechamento
+    close = after.replace(hour=FALLBACK_CLOSE_HOUR, minute=0, second=0, microsecond=0)
+    if close <= after:
+        close += timedelta(days=1)
+    while close.weekday() >= 5:
+        close += timedelta(days=1)
+    return close
@@ -1,8 +1,7 @@
-import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
-import time
-import random
+
+from .history_cache import get_histories
 
 def get_market_sectors():
     # Mapeamento manual de setores
@@ -41,13 +40,10 @@ def get_stock_performance(stock_code):
     start_date = end_date - timedelta(days=365)
     
     try:
-        # Adicionar um pequeno delay para evitar bloqueios
-        time.sleep(1 + random.random())
-        
-        # Obter dados históricos usando yfinance
-        df = yf.download(stock_code, start=start_date, end=end_date, progress=False)
+        # Obter dados históricos pelo cache compartilhado (rede apenas se não estiver carregado)
+        df = get_histories([stock_code], start_date, end_date).get(stock_code)
         
-        if df.empty:
+        if df is None or df.empty:
             return {
                 'year': 0,
                 'last_12_months': 0,
@@ -90,30 +86,17 @@ def compare_stock_performance(stock_code1, stock_code2):
     start_date = end_date - timedelta(days=365)
     
     try:
-        # Obter dados para ambas as ações usando yfinance
-        data = yf.download(
-            [stock_code1, stock_code2], 
-            start=start_date, 
-            end=end_date, 
-            progress=False
-        )
+        # Obter dados para ambas as ações pelo cache compartilhado
+        frames = get_histories([stock_code1, stock_code2], start_date, end_date)
         
-        if data.empty:
+        if not frames:
             return pd.DataFrame()
         
-        # Se há apenas uma ação, o formato é diferente
-        if isinstance(data.columns, pd.MultiIndex):
-            # Organizar dados em formato de comparação
-            close_prices = data['Close']
-            comparison_data = pd.DataFrame({
-                stock_code1.replace('.SA', ''): close_prices[stock_code1],
-                stock_code2.replace('.SA', ''): close_prices[stock_code2]
-            })
-        else:
-            # Se tivermos apenas uma ação válida
-            comparison_data = pd.DataFrame({
-                stock_code1.replace('.SA', ''): data['Close']
-            })
+        # Organizar dados em formato de comparação (apenas ações com dados)
+        comparison_data = pd.DataFrame({
+            code.replace('.SA', ''): frames[code]['Close']
+            for code in (stock_code1, stock_code2) if code in frames
+        })
         
         return comparison_data
     except Exception as e:
@@ -0,0 +1,89 @@
+"""
+Atualização do cache de desempenho sem interface gráfica
+
+Executa a mesma busca do dashboard e grava o cache, para ser agendada (cron,
+Agendador de Tarefas) após o fechamento da B3. Uso, a partir de src/:
+
+    python -m data.prefetch [--force] [--no-bulk] [--chunk-size N] [--hedge-after S] [--quiet]
+"""
+import sys
+import time
+import argparse
+from datetime import datetime
+
+from .stock_data import BULK_CHUNK_SIZE, refresh_performance_data, get_health_registry
+from .stock_cache import StockDataCache
+from .providers import configure_default_provider
+
+RETURN_COLUMNS = ['daily_return', 'weekly_return', 'monthly_return', 'quarterly_return', 'yearly_return', 'ytd_return']
+
+class ConsoleProgress:
+    def __init__(self, quiet=False, progress_step=10):
+        """
+        Substituto da tela de carregamento que escreve no console
+
+        Args:
+            quiet: Se True, mostra apenas o progresso, sem as mensagens de log
+            progress_step: Intervalo (em pontos percentuais) entre linhas de progresso
+        """
+        self.quiet = quiet
+        self.progress_step = progress_step
+        self.last_reported = -progress_step
+
+    def log(self, message):
+        if not self.quiet:
+            print(f"[{datetime.now():%H:%M:%S}] {message}", flush=True)
+
+    def update_progress(self, current, total):
+        progress_pct = (current / total) * 100 if total else 100
+        if progress_pct - self.last_reported >= self.progress_step or current == total:
+            self.last_reported = progress_pct
+            print(f"[{datetime.now():%H:%M:%S}] Progresso: {current}/{total} ({progress_pct:.0f}%)", flush=True)
+
+def format_report(performance_data, elapsed_seconds):
+    """Resumo da atualização: ações carregadas, qualidade dos retornos e validade do cache"""
+    lines = [f"Ações no cache: {len(performance_data)}",
+             f"Tempo total: {elapsed_seconds:.1f}s"]
+
+    for column in RETURN_COLUMNS:
+        if column in performance_data.columns:
+            valid = int((performance_data[column].abs() > 0.01).sum())
+            lines.append(f"  {column}: {valid}/{len(performance_data)} com dados válidos")
+
+    open_tickers = get_health_registry().open_tickers()
+    if open_tickers:
+        lines.append(f"Ações ignoradas por falhas recentes ({len(open_tickers)}): {', '.join(sorted(open_tickers))}")
+
+    cache = StockDataCache()
+    cache_time = performance_data.attrs.get('cache_time', datetime.now())
+    lines.append(f"Cache válido até: {cache.expires_at(cache_time):%d/%m/%Y %H:%M}")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Atualiza o cache de desempenho das ações da B3 sem interface gráfica")
+    parser.add_argument('--force', action='store_true', help="buscar mesmo que o cache atual ainda seja válido")
+    parser.add_argument('--no-bulk', action='store_true', help="buscar ação por ação em vez do download em massa")
+    parser.add_argument('--chunk-size', type=int, default=BULK_CHUNK_SIZE, help="ações por requisição no download em massa")
+    parser.add_argument('--quiet', action='store_true', help="mostrar apenas o progresso e o resumo")
+    parser.add_argument('--hedge-after', type=float, default=None, metavar='SEGUNDOS',
+                        help="consultar o provedor seguinte em paralelo se o principal demorar mais que isso "
+                             "(padrão: provider_hedge_seconds do config.json)")
+    args = parser.parse_args(argv)
+    if args.hedge_after is not None:
+        configure_default_provider(hedge_after=args.hedge_after)
+
+    progress = ConsoleProgress(quiet=args.quiet)
+    started = time.monotonic()
+    performance_data = refresh_performance_data(progress, bulk=not args.no_bulk,
+                                                bulk_chunk_size=args.chunk_size, force=args.force)
+    elapsed = time.monotonic() - started
+
+    if performance_data is None or performance_data.empty:
+        print("ERRO: Nenhum dado foi carregado; cache não atualizado", file=sys.stderr)
+        return 1
+
+    print(format_report(performance_data, elapsed))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+import threading
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .fetch_scheduler import throttle
+from .settings import load_config
+
+# Colunas OHLCV padronizadas retornadas por todos os provedores
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Trechos das mensagens de erro que indicam ação inexistente ou sem pregões
+NOT_FOUND_MARKERS = ('delisted', 'no price data', 'no data found', 'not found', '404')
+
+class ProviderUnavailable(Exception):
+    """
+    Nenhum provedor respondeu (rede, DNS, limite de requisições)
+
+    Diferente de uma resposta vazia, não diz nada sobre as ações pedidas.
+    """
+
+def is_not_found_error(message):
+    """True se a mensagem de erro indica ação inexistente, e não uma falha transitória"""
+    message = str(message).lower()
+    return any(marker in message for marker in NOT_FOUND_MARKERS)
+
+def split_multi_ticker_frame(data, tickers):
+    """Separa o resultado MultiIndex de um yf.download com várias ações em um DataFrame por ação"""
+    frames = {}
+    if data is None or data.empty:
+        return frames
+
+    # Download de uma única ação retorna colunas simples
+    if not isinstance(data.columns, pd.MultiIndex):
+        if len(tickers) == 1:
+            stock_data = data.dropna(how='all')
+            if not stock_data.empty:
+                frames[tickers[0]] = stock_data
+        return frames
+
+    # Descobrir em qual nível do MultiIndex estão os tickers (depende do group_by)
+    level = 0 if any(t in data.columns.get_level_values(0) for t in tickers) else 1
+    available = set(data.columns.get_level_values(level))
+
+    for ticker in tickers:
+        if ticker not in available:
+            continue
+        stock_data = data.xs(ticker, axis=1, level=level).dropna(how='all')
+        if not stock_data.empty:
+            frames[ticker] = stock_data
+
+    return frames
+
+class DataProvider:
+    """
+    Interface comum das fontes de dados de mercado
+
+    Todo provedor devolve um dicionário ticker -> DataFrame OHLCV indexado por data,
+    contendo apenas as ações para as quais obteve dados. cancel é um
+    threading.Event opcional: provedores que buscam ação por ação param de
+    buscar quando ele é sinalizado (requisição paralela já respondida).
+    """
+    name = "base"
+
+    def get_history(self, tickers, start, end, interval="1d", cancel=None):
+        raise NotImplementedError
+
+    def get_index_components(self, index_code):
+        """Retorna os componentes de um índice da B3 (lista vazia se não suportado)"""
+        return []
+
+class YahooProvider(DataProvider):
+    name = "yahoo"
+
+    def get_history(self, tickers, start, end, interval="1d", cancel=None):
+        import yfinance as yf
+
+        throttle()
+        data = yf.download(
+            tickers,
+            start=start,
+            end=end,
+            interval=interval,
+            progress=False,
+            ignore_tz=True,
+            group_by='ticker',
+            threads=True
+        )
+        frames = split_multi_ticker_frame(data, tickers)
+
+        # O yfinance não levanta exceções: os erros por ação ficam em yf.shared._ERRORS
+        if not frames:
+            errors = getattr(getattr(yf, 'shared', None), '_ERRORS', None) or {}
+            transient = [str(errors[t]) for t in tickers if t in errors and not is_not_found_error(errors[t])]
+            if transient:
+                raise ProviderUnavailable(f"Yahoo indisponível: {transient[0]}")
+        return frames
+
+    def get_index_components(self, index_code):
+        import yfinance as yf
+
+        throttle()
+        index = yf.Ticker(f"^{index_code}")
+        if hasattr(index, 'composition') and index.composition is not None:
+            return [stock for stock in index.composition if stock.endswith('.SA')]
+        return []
+
+class InvestinyProvider(DataProvider):
+    name = "investiny"
+
+    def get_history(self, tickers, start, end, interval="1d", cancel=None):
+        import investiny as inv
+
+        frames = {}
+        last_error = None
+        answered = False
+        for ticker in tickers:
+            if cancel is not None and cancel.is_set():
+                break
+            symbol = ticker if ticker.endswith('.SA') else f"{ticker}.SA"
+            try:
+                throttle()
+                raw = inv.get_historical_data(
+                    symbol=symbol,
+                    country="brazil",
+                    from_date=int(pd.Timestamp(start).timestamp()),
+                    to_date=int(pd.Timestamp(end).timestamp()),
+                    interval=interval
+                )
+                stock_df = pd.DataFrame(raw['quotes'])
+                answered = True
+                if stock_df.empty:
+                    continue
+                stock_df['date'] = pd.to_datetime(stock_df['date'], unit='s')
+                stock_df.set_index('date', inplace=True)
+                stock_df.index.name = 'Date'
+
+                # Padronizar nomes das colunas com os do Yahoo
+                stock_df = stock_df.rename(columns={c.lower(): c for c in OHLCV_COLUMNS})
+                frames[ticker] = stock_df[[c for c in OHLCV_COLUMNS if c in stock_df.columns]]
+            except Exception as e:
+                print(f"Erro ao obter {ticker} via investiny: {e}")
+                last_error = e
+                if is_not_found_error(e):
+                    answered = True
+
+        # Todas as ações falharam sem resposta do servidor: falha do provedor, não das ações
+        if not answered and last_error is not None:
+            raise ProviderUnavailable(f"investiny indisponível: {last_error}")
+        return frames
+
+class ProviderChain(DataProvider):
+    name = "chain"
+
+    def __init__(self, providers, hedge_after=None):
+        """
+        Encadeia provedores em ordem de preferência
+
+        Args:
+            providers: Lista de provedores; o primeiro é o principal
+            hedge_after: Se definido, segundos de espera pelo principal antes de disparar
+                o próximo provedor em paralelo e usar a resposta que chegar primeiro
+        """
+        self.providers = list(providers)
+        self.hedge_after = hedge_after
+        # Pool próprio para não competir com os workers do agendador de buscas
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="provider-hedge")
+
+    def _hedged_call(self, primary, secondary, tickers, start, end, interval):
+        """
+        Dispara o secundário se o principal demorar e usa o primeiro resultado não vazio
+
+        Quando o principal responde primeiro, o secundário é interrompido (cancel)
+        e não continua buscando ação por ação em segundo plano.
+
+        Returns:
+            tuple: (dicionário ticker -> DataFrame, último provedor consultado,
+                    exceção se nenhum dos consultados respondeu ou None)
+        """
+        primary_future = self.executor.submit(primary.get_history, tickers, start, end, interval)
+        done, _ = wait({primary_future}, timeout=self.hedge_after)
+        if done:
+            try:
+                return primary_future.result(), primary, None
+            except Exception as e:
+                return {}, primary, e
+
+        cancel = threading.Event()
+        pending = {
+            primary_future: primary,
+            self.executor.submit(secondary.get_history, tickers, start, end, interval, cancel): secondary
+        }
+        errors = []
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    provider = pending.pop(future)
+                    try:
+                        frames = future.result()
+                    except Exception as e:
+                        print(f"Erro em requisição paralela via {provider.name}: {e}")
+                        errors.append(e)
+                        continue
+                    if frames:
+                        return frames, provider, None
+            return {}, secondary, errors[-1] if len(errors) == 2 else None
+        finally:
+            cancel.set()
+
+    def get_history(self, tickers, start, end, interval="1d", cancel=None):
+        frames = {}
+        missing = list(tickers)
+        position = 0
+        answered = False
+        last_error = None
+
+        while missing and position < len(self.providers):
+            if cancel is not None and cancel.is_set():
+                break
+            provider = self.providers[position]
+            secondary = self.providers[position + 1] if position + 1 < len(self.providers) else None
+
+            try:
+                if self.hedge_after is not None and secondary is not None:
+                    result, responder, error = self._hedged_call(provider, secondary, missing, start, end, interval)
+                    # Se o secundário chegou a responder (ou falhar), não consultá-lo de novo
+                    if responder is secondary:
+                        position += 1
+                    if error is not None:
+                        raise error
+                else:
+                    result = provider.get_history(missing, start, end, interval)
+                answered = True
+            except Exception as e:
+                print(f"Erro no provedor {provider.name}: {e}")
+                last_error = e
+                result = {}
+
+            frames.update(result)
+            # Apenas as ações que faltaram seguem para o próximo provedor da cadeia
+            missing = [t for t in missing if t not in frames]
+            position += 1
+
+        # Nenhum provedor chegou a responder: sinalizar para não tratar como ação sem dados
+        if not answered and last_error is not None:
+            raise ProviderUnavailable(f"Nenhum provedor disponível: {last_error}")
+        return frames
+
+    def get_index_components(self, index_code):
+        for provider in self.providers:
+            try:
+                components = provider.get_index_components(index_code)
+                if components:
+                    return components
+            except Exception as e:
+                print(f"Erro ao obter componentes do índice {index_code} via {provider.name}: {e}")
+        return []
+
+# Provedor compartilhado por todos os caminhos de busca
+_default_provider = None
+_default_provider_lock = threading.Lock()
+
+def get_hedge_after():
+    """Espera antes da requisição paralela (provider_hedge_seconds do config.json), ou None"""
+    value = load_config().get('provider_hedge_seconds')
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        print(f"Valor inválido para provider_hedge_seconds: {value!r}")
+        return None
+
+def get_default_provider():
+    """Retorna a cadeia de provedores padrão (Yahoo, depois investiny)"""
+    global _default_provider
+    with _default_provider_lock:
+        if _default_provider is None:
+            _default_provider = ProviderChain([YahooProvider(), InvestinyProvider()], hedge_after=get_hedge_after())
+        return _default_provider
+
+def configure_default_provider(providers=None, hedge_after=None):
+    """Substitui a cadeia de provedores padrão (por padrão, Yahoo e depois investiny)"""
+    global _default_provider
+    with _default_provider_lock:
+        _default_provider = ProviderChain(providers or [YahooProvider(), InvestinyProvider()], hedge_after=hedge_after)
+        return _default_provider
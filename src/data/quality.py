@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+# Limites padrão do detector de dados genéricos
+DEFAULT_THRESHOLDS = {
+    'min_bars': 5,                  # Abaixo disso a ação não é avaliada
+    'min_variance': 0.00001,        # Variância mínima dos retornos diários
+    'identical_tolerance': 0.0001,  # Diferença máxima entre retornos considerados idênticos
+    'max_identical_ratio': 0.3,     # Fração máxima de retornos idênticos consecutivos
+    'max_flat_run': 15              # Maior sequência aceitável de pregões com preço inalterado
+}
+
+def _compact_rows(closes):
+    """Move os valores válidos de cada linha para a esquerda, preservando a ordem"""
+    valid = ~np.isnan(closes)
+    order = np.argsort(~valid, axis=1, kind='stable')
+    return np.take_along_axis(closes, order, axis=1), valid.sum(axis=1)
+
+def score_close_matrix(closes, **thresholds):
+    """
+    Avalia a qualidade dos dados de todas as ações de uma vez
+
+    Args:
+        closes: Matriz tickers x pregões com os fechamentos (NaN onde não há dado)
+        **thresholds: Substituições dos limites em DEFAULT_THRESHOLDS
+
+    Returns:
+        dict: Métricas por ação (vetores) e o veredito 'suspicious'
+    """
+    limits = {**DEFAULT_THRESHOLDS, **thresholds}
+    closes = np.asarray(closes, dtype=float)
+    n_tickers, n_days = closes.shape
+
+    # Cada ação é avaliada apenas sobre seus próprios pregões, como no cálculo por ação
+    compact, counts = _compact_rows(closes)
+    positions = np.arange(n_days)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = compact[:, 1:] / compact[:, :-1] - 1
+    returns_valid = (positions[1:] < counts[:, None]) & np.isfinite(returns)
+    returns = np.where(returns_valid, returns, np.nan)
+    n_returns = returns_valid.sum(axis=1)
+
+    # Variância dos retornos diários (ddof=1, como no pandas)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.nansum(returns, axis=1) / n_returns
+        variance = np.nansum((returns - mean[:, None]) ** 2, axis=1) / (n_returns - 1)
+    variance = np.where(n_returns > 1, variance, np.nan)
+
+    # Retornos idênticos consecutivos
+    identical = np.abs(np.diff(returns, axis=1)) < limits['identical_tolerance']
+    identical_count = identical.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        identical_ratio = np.where(n_returns > 0, identical_count / n_returns, 0.0)
+
+    # Maior sequência de pregões com preço inalterado
+    flat = returns_valid & (returns == 0)
+    flat_cumsum = np.cumsum(flat, axis=1)
+    flat_reset = np.maximum.accumulate(np.where(~flat, flat_cumsum, 0), axis=1)
+    longest_flat_run = (flat_cumsum - flat_reset).max(axis=1) if n_days > 1 else np.zeros(n_tickers, dtype=int)
+
+    evaluated = counts >= limits['min_bars']
+    low_variance = evaluated & (np.abs(np.nan_to_num(variance, nan=np.inf)) < limits['min_variance'])
+    repeated = evaluated & (identical_ratio > limits['max_identical_ratio'])
+    flat_segment = evaluated & (longest_flat_run > limits['max_flat_run'])
+
+    return {
+        'bars': counts,
+        'variance': variance,
+        'identical_count': identical_count,
+        'identical_ratio': identical_ratio,
+        'longest_flat_run': longest_flat_run,
+        'low_variance': low_variance,
+        'repeated_returns': repeated,
+        'flat_segment': flat_segment,
+        'suspicious': low_variance | repeated | flat_segment
+    }
+
+def detect_generic_data(close_matrix, **thresholds):
+    """
+    Detecta ações com dados genéricos/preenchidos em uma matriz de fechamentos alinhada
+
+    Args:
+        close_matrix: DataFrame com datas nas linhas e tickers nas colunas
+        **thresholds: Substituições dos limites em DEFAULT_THRESHOLDS
+
+    Returns:
+        DataFrame: Um ticker por linha com as métricas e o veredito 'suspicious'
+    """
+    if close_matrix is None or close_matrix.empty:
+        return pd.DataFrame(columns=['suspicious'])
+
+    close_matrix = close_matrix.sort_index()
+    scores = score_close_matrix(close_matrix.to_numpy(dtype=float).T, **thresholds)
+    return pd.DataFrame(scores, index=close_matrix.columns)
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+
+# Horizontes em dias corridos, comparados com o pregão mais próximo da data alvo
+PERIOD_DAYS = {
+    'weekly': 7,
+    'monthly': 30,
+    'quarterly': 90,
+    'yearly': 365
+}
+
+# Colunas retornadas pelo cálculo em lote (mesmas chaves de calculate_returns)
+RETURN_KEYS = ['daily', 'weekly', 'monthly', 'quarterly', 'yearly', 'ytd_return']
+
+def build_close_matrix(histories):
+    """
+    Alinha os preços de fechamento de várias ações em uma única matriz por data
+
+    Args:
+        histories: Dicionário ticker -> DataFrame OHLCV
+
+    Returns:
+        DataFrame: Datas nas linhas, tickers nas colunas (NaN onde não houve pregão)
+    """
+    closes = {ticker: df['Close'] for ticker, df in histories.items()
+              if df is not None and not df.empty and 'Close' in df.columns}
+    if not closes:
+        return pd.DataFrame()
+    return pd.DataFrame(closes).sort_index()
+
+def _nearest_valid(dates, prev_valid, next_valid, targets):
+    """
+    Para cada ação, posição do pregão válido mais próximo da sua data alvo
+
+    Empates são resolvidos pela data mais recente, como o método 'nearest' do pandas.
+    """
+    n_tickers, n_days = prev_valid.shape
+    rows = np.arange(n_tickers)
+
+    pos = np.searchsorted(dates, targets)
+    before = prev_valid[rows, np.clip(pos - 1, 0, n_days - 1)]
+    before = np.where(pos > 0, before, -1)
+    after = next_valid[rows, np.clip(pos, 0, n_days - 1)]
+    after = np.where(pos < n_days, after, n_days)
+
+    has_before = before >= 0
+    has_after = after < n_days
+    dist_before = np.where(has_before, targets - dates[np.clip(before, 0, n_days - 1)], np.iinfo(np.int64).max)
+    dist_after = np.where(has_after, dates[np.clip(after, 0, n_days - 1)] - targets, np.iinfo(np.int64).max)
+
+    return np.where(dist_after <= dist_before, after, before)
+
+def compute_returns_matrix(dates, closes):
+    """
+    Calcula os retornos de todas as ações de uma vez
+
+    Args:
+        dates: Vetor datetime64 ordenado com os pregões (colunas da matriz)
+        closes: Matriz tickers x pregões com os fechamentos (NaN onde não há dado)
+
+    Returns:
+        dict: Chave de retorno -> vetor com o retorno percentual de cada ação
+    """
+    dates = np.asarray(dates, dtype='datetime64[D]').astype(np.int64)
+    closes = np.asarray(closes, dtype=float)
+    n_tickers, n_days = closes.shape
+    rows = np.arange(n_tickers)
+    results = {key: np.zeros(n_tickers) for key in RETURN_KEYS}
+    if n_tickers == 0 or n_days == 0:
+        return results
+
+    # Posição do pregão válido anterior/posterior (inclusive) a cada coluna
+    valid = ~np.isnan(closes)
+    columns = np.arange(n_days)
+    prev_valid = np.maximum.accumulate(np.where(valid, columns, -1), axis=1)
+    next_valid = np.minimum.accumulate(np.where(valid, columns, n_days)[:, ::-1], axis=1)[:, ::-1]
+
+    # Ações com menos de dois pregões válidos ficam com retornos zerados
+    enough = valid.sum(axis=1) >= 2
+    last_pos = np.maximum(prev_valid[:, -1], 0)
+    latest_price = closes[rows, last_pos]
+    latest_date = dates[last_pos]
+
+    def pct_change(past_pos):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = (latest_price / closes[rows, past_pos] - 1) * 100
+        return np.where(enough & np.isfinite(change), change, 0.0)
+
+    # Retorno diário: pregão válido anterior ao último
+    prev_pos = np.maximum(prev_valid[rows, np.maximum(last_pos - 1, 0)], 0)
+    results['daily'] = pct_change(prev_pos)
+
+    for period_name, days in PERIOD_DAYS.items():
+        past_pos = _nearest_valid(dates, prev_valid, next_valid, latest_date - days)
+        results[period_name] = pct_change(np.clip(past_pos, 0, n_days - 1))
+
+    # YTD: apenas se o histórico começar antes do início do ano do último pregão
+    latest_years = latest_date.astype('datetime64[D]').astype('datetime64[Y]')
+    year_start = latest_years.astype('datetime64[D]').astype(np.int64)
+    first_date = dates[np.clip(next_valid[:, 0], 0, n_days - 1)]
+    ytd_pos = np.clip(_nearest_valid(dates, prev_valid, next_valid, year_start), 0, n_days - 1)
+    results['ytd_return'] = np.where(first_date <= year_start, pct_change(ytd_pos), 0.0)
+
+    return results
+
+def compute_returns(close_matrix):
+    """
+    Calcula os retornos de todas as ações de uma matriz de fechamentos alinhada
+
+    Args:
+        close_matrix: DataFrame com datas nas linhas e tickers nas colunas
+
+    Returns:
+        DataFrame: Um ticker por linha e uma coluna por horizonte de retorno
+    """
+    if close_matrix is None or close_matrix.empty:
+        return pd.DataFrame(columns=RETURN_KEYS)
+
+    close_matrix = close_matrix.sort_index()
+    results = compute_returns_matrix(close_matrix.index.values, close_matrix.to_numpy(dtype=float).T)
+    return pd.DataFrame(results, index=close_matrix.columns)[RETURN_KEYS]
+
+def returns_for_history(historical_data):
+    """Calcula os retornos de uma única ação a partir do seu DataFrame OHLCV"""
+    close_matrix = build_close_matrix({'_': historical_data})
+    if close_matrix.empty:
+        return {key: 0.0 for key in RETURN_KEYS}
+    return {key: float(value) for key, value in compute_returns(close_matrix).iloc[0].items()}
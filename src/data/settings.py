@@ -0,0 +1,24 @@
+import os
+import json
+import logging
+
+# Raiz do projeto, independente do diretório de trabalho (python src/main.py,
+# cd src; python -m data.prefetch, agendador de tarefas...)
+PROJECT_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+# config.json na raiz do projeto
+CONFIG_FILE = os.path.join(PROJECT_ROOT, "config.json")
+
+# Diretório de cache compartilhado por todos os armazenamentos e processos
+CACHE_DIR = os.path.join(PROJECT_ROOT, "cache")
+
+def load_config(config_file=CONFIG_FILE):
+    """Lê o config.json (dicionário vazio se ausente ou inválido)"""
+    try:
+        with open(config_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logging.error(f"Erro ao ler {config_file}: {str(e)}")
+        return {}
@@ -0,0 +1,153 @@
+"""
+Cliente do servidor de snapshots (ver data.snapshot_server)
+
+Quando a variável de ambiente PAINELB3_SERVER aponta para um servidor (ex.:
+http://192.168.0.10:8765), os dados de desempenho e os históricos são obtidos
+dele em vez de buscados no Yahoo por cada cópia do programa.
+"""
+import os
+import json
+import gzip
+import threading
+import urllib.request
+import urllib.error
+from urllib.parse import urlencode, quote
+from datetime import datetime
+import pandas as pd
+
+# pyarrow é opcional: com ele os dados trafegam em Arrow IPC; sem ele, em JSON colunar
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+SERVER_URL_ENV = "PAINELB3_SERVER"
+ARROW_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+JSON_CONTENT_TYPE = "application/json"
+CACHE_TIME_HEADER = "X-PainelB3-Cache-Time"
+REQUEST_TIMEOUT = 30
+
+def get_server_url():
+    """URL do servidor de snapshots configurado, ou None para buscar os dados localmente"""
+    url = os.environ.get(SERVER_URL_ENV, "").strip()
+    return url.rstrip('/') or None
+
+def encode_frame(data, content_type):
+    """Serializa um DataFrame (com índice) em Arrow IPC ou JSON colunar"""
+    if content_type == ARROW_CONTENT_TYPE:
+        table = pa.Table.from_pandas(data, preserve_index=True)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    frame = data.reset_index()
+    columns = {}
+    dtypes = {}
+    for column in frame.columns:
+        series = frame[column]
+        dtypes[str(column)] = str(series.dtype)
+        if pd.api.types.is_datetime64_any_dtype(series):
+            series = series.dt.strftime('%Y-%m-%dT%H:%M:%S')
+        columns[str(column)] = series.astype(object).where(series.notna(), None).tolist()
+    payload = {'index': [str(name) for name in data.index.names if name is not None] or ['index'],
+               'columns': columns, 'dtypes': dtypes}
+    return json.dumps(payload, default=float).encode('utf-8')
+
+def decode_frame(payload, content_type):
+    """Inverso de encode_frame"""
+    if content_type.startswith(ARROW_CONTENT_TYPE):
+        return pa.ipc.open_stream(pa.py_buffer(payload)).read_all().to_pandas()
+
+    decoded = json.loads(payload.decode('utf-8'))
+    frame = pd.DataFrame(decoded['columns'])
+    for column, dtype in decoded['dtypes'].items():
+        if dtype.startswith('datetime64'):
+            frame[column] = pd.to_datetime(frame[column])
+        elif dtype != 'object':
+            frame[column] = frame[column].astype(dtype)
+    index_columns = [column for column in decoded['index'] if column in frame.columns]
+    frame = frame.set_index(index_columns) if index_columns else frame
+    if index_columns == ['index']:
+        frame.index.name = None
+    return frame
+
+class SnapshotClient:
+    def __init__(self, server_url, timeout=REQUEST_TIMEOUT):
+        """
+        Cliente HTTP do servidor de snapshots
+
+        Guarda a última resposta de cada recurso com seu ETag; requisições
+        seguintes enviam If-None-Match e, se o servidor responder 304, a cópia
+        local é reutilizada sem transferir nem decodificar os dados de novo.
+
+        Args:
+            server_url: URL base do servidor (ex.: http://localhost:8765)
+            timeout: Tempo máximo de cada requisição, em segundos
+        """
+        self.server_url = server_url.rstrip('/')
+        self.timeout = timeout
+        self.responses = {}  # caminho -> (etag, DataFrame)
+        self.lock = threading.Lock()
+
+    def _get(self, path):
+        with self.lock:
+            previous = self.responses.get(path)
+        headers = {
+            'Accept': ARROW_CONTENT_TYPE if pa is not None else JSON_CONTENT_TYPE,
+            'Accept-Encoding': 'gzip'
+        }
+        if previous is not None:
+            headers['If-None-Match'] = previous[0]
+
+        request = urllib.request.Request(self.server_url + path, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = response.read()
+                if response.headers.get('Content-Encoding') == 'gzip':
+                    payload = gzip.decompress(payload)
+                data = decode_frame(payload, response.headers.get('Content-Type', JSON_CONTENT_TYPE))
+                cache_time = response.headers.get(CACHE_TIME_HEADER)
+                if cache_time:
+                    data.attrs['cache_time'] = datetime.fromisoformat(cache_time)
+                etag = response.headers.get('ETag')
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and previous is not None:
+                return previous[1].copy()
+            raise
+
+        if etag:
+            with self.lock:
+                self.responses[path] = (etag, data)
+        return data
+
+    def get_performance_data(self):
+        """DataFrame de desempenho atual do servidor"""
+        data = self._get("/performance")
+        data.attrs['stale'] = False
+        return data
+
+    def get_history(self, ticker, start_date, end_date):
+        """Histórico OHLCV de uma ação, ou None se o servidor não tiver dados dela"""
+        query = urlencode({'start': pd.Timestamp(start_date).strftime('%Y-%m-%d'),
+                           'end': pd.Timestamp(end_date).strftime('%Y-%m-%d')})
+        try:
+            return self._get(f"/history/{quote(ticker)}?{query}")
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+
+# Um cliente por URL, compartilhado pelo processo
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_snapshot_client(server_url=None):
+    """Retorna o cliente do servidor configurado, ou None se não houver servidor"""
+    server_url = server_url or get_server_url()
+    if not server_url:
+        return None
+    with _clients_lock:
+        if server_url not in _clients:
+            _clients[server_url] = SnapshotClient(server_url)
+        return _clients[server_url]
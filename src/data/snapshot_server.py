@@ -0,0 +1,275 @@
+"""
+Servidor local de snapshots dos dados de desempenho
+
+Executa a busca uma única vez e serve o DataFrame de desempenho e os
+históricos por ação via HTTP, para que todas as cópias do painel na rede
+compartilhem a mesma atualização. Uso, a partir de src/:
+
+    python -m data.snapshot_server [--host 127.0.0.1] [--port 8765] [--no-bulk] [--chunk-size N] [--hedge-after S]
+
+Por padrão o servidor só aceita conexões da própria máquina. Para compartilhar
+os dados na rede (sem autenticação), use --host 0.0.0.0 e, nas demais máquinas,
+defina PAINELB3_SERVER=http://<servidor>:8765 antes de abrir o painel (ver
+data.snapshot_client).
+
+Rotas:
+    GET /performance                              DataFrame de desempenho
+    GET /history/<ticker>?start=AAAA-MM-DD&end=AAAA-MM-DD   Histórico OHLCV da ação
+
+/history atende apenas ações do universo do painel (404 para as demais), e o
+período é limitado aos últimos HISTORY_DAYS dias (400 se ficar vazio), de modo
+que clientes na rede não disparam buscas arbitrárias nos provedores.
+
+As respostas são colunares (Arrow IPC, se o cliente aceitar e o pyarrow estiver
+instalado, ou JSON colunar), comprimidas com gzip quando o cliente aceita e
+identificadas por ETag, de modo que If-None-Match responde 304 sem reenviar os dados.
+"""
+import sys
+import gzip
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, unquote
+import pandas as pd
+import logging
+
+from .stock_data import BULK_CHUNK_SIZE, HISTORY_DAYS, get_stock_sectors, refresh_performance_data
+from .stock_cache import StockDataCache
+from .providers import configure_default_provider
+from .history_cache import get_histories
+from .snapshot_client import (pa, encode_frame, ARROW_CONTENT_TYPE, JSON_CONTENT_TYPE,
+                              CACHE_TIME_HEADER)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Respostas codificadas mantidas em memória (desempenho + históricos mais pedidos)
+MAX_ENCODED_RESPONSES = 512
+
+# Espera antes de tentar de novo uma atualização que falhou (segundos)
+REFRESH_RETRY_SECONDS = 300
+
+# Intervalo mínimo entre atualizações (segundos)
+MIN_REFRESH_INTERVAL_SECONDS = 60
+
+class SnapshotServer:
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, bulk=True, bulk_chunk_size=BULK_CHUNK_SIZE):
+        """
+        Servidor HTTP que compartilha uma única busca de dados entre vários painéis
+
+        Uma thread mantém o DataFrame de desempenho atualizado, refazendo a
+        busca quando o cache expira (próximo fechamento de pregão). Cada
+        resposta é codificada uma vez e reaproveitada, junto com sua versão
+        gzip e seu ETag, até a próxima atualização.
+
+        Args:
+            host: Endereço em que o servidor escuta
+            port: Porta TCP
+            bulk: Se True, usa o download em massa nas atualizações
+            bulk_chunk_size: Quantidade de ações por requisição no modo em massa
+        """
+        self.bulk = bulk
+        self.bulk_chunk_size = bulk_chunk_size
+        self.cache = StockDataCache()
+        self.performance_data = None
+        self.tickers = set(get_stock_sectors())  # ações atendidas por /history
+        self.generation = 0
+        self.encoded = OrderedDict()  # (rota, tipo) -> (etag, corpo, corpo gzip)
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self.httpd = ThreadingHTTPServer((host, port), SnapshotRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.snapshot_server = self
+
+    def set_performance_data(self, performance_data):
+        """Publica um novo DataFrame de desempenho e descarta as respostas codificadas"""
+        tickers = set(get_stock_sectors())
+        if 'code' in performance_data:
+            tickers.update(f"{code}.SA" for code in performance_data['code'])
+        with self.lock:
+            self.performance_data = performance_data
+            self.tickers = tickers
+            self.generation += 1
+            self.encoded.clear()
+
+    def encoded_response(self, key, build_frame, content_type):
+        """
+        Resposta codificada de uma rota, construída apenas na primeira vez
+
+        Returns:
+            tuple: (etag, corpo, corpo gzip), ou None se build_frame não tiver dados
+        """
+        with self.lock:
+            entry = self.encoded.get((key, content_type))
+            if entry is not None:
+                self.encoded.move_to_end((key, content_type))
+                return entry
+            generation = self.generation
+
+        data = build_frame()
+        if data is None or data.empty:
+            return None
+        body = encode_frame(data, content_type)
+        entry = (f'"{hashlib.sha1(body).hexdigest()}"', body, gzip.compress(body, compresslevel=6))
+
+        with self.lock:
+            # Não guardar respostas construídas a partir de dados já substituídos
+            if generation != self.generation:
+                return entry
+            self.encoded[(key, content_type)] = entry
+            while len(self.encoded) > MAX_ENCODED_RESPONSES:
+                self.encoded.popitem(last=False)
+        return entry
+
+    def refresh_loop(self):
+        """Atualiza os dados e espera até o cache expirar, repetidamente"""
+        while not self._stop.is_set():
+            try:
+                performance_data = refresh_performance_data(None, self.bulk, self.bulk_chunk_size)
+            except Exception as e:
+                logging.error(f"Erro ao atualizar os dados do servidor: {str(e)}")
+                performance_data = None
+
+            if performance_data is None or performance_data.empty:
+                wait_seconds = REFRESH_RETRY_SECONDS
+            else:
+                self.set_performance_data(performance_data)
+                cache_time = performance_data.attrs.get('cache_time', datetime.now())
+                expires_at = self.cache.expires_at(cache_time)
+                logging.info(f"Servidor com {len(performance_data)} ações; próxima atualização em {expires_at:%d/%m %H:%M}")
+                wait_seconds = max((expires_at - datetime.now()).total_seconds(), MIN_REFRESH_INTERVAL_SECONDS)
+            self._stop.wait(wait_seconds)
+
+    def serve_forever(self):
+        threading.Thread(target=self.refresh_loop, daemon=True, name="snapshot-refresh").start()
+        host, port = self.httpd.server_address[:2]
+        logging.info(f"Servidor de snapshots em http://{host}:{port}")
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self._stop.set()
+            self.httpd.server_close()
+
+    def shutdown(self):
+        self._stop.set()
+        self.httpd.shutdown()
+
+class SnapshotRequestHandler(BaseHTTPRequestHandler):
+    server_version = "PainelB3Snapshot/1.0"
+
+    def log_message(self, format, *args):
+        logging.info(f"{self.address_string()} - {format % args}")
+
+    def _content_type(self):
+        if pa is not None and ARROW_CONTENT_TYPE in self.headers.get('Accept', ''):
+            return ARROW_CONTENT_TYPE
+        return JSON_CONTENT_TYPE
+
+    def _send_empty(self, status, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        try:
+            self._handle_get()
+        except Exception as e:
+            # Falha ao buscar ou codificar os dados: responder com erro em vez de derrubar a conexão
+            logging.error(f"Erro ao atender {self.path}: {str(e)}")
+            try:
+                self._send_empty(500)
+            except OSError:
+                pass
+
+    def _handle_get(self):
+        snapshot_server = self.server.snapshot_server
+        url = urlsplit(self.path)
+        content_type = self._content_type()
+        extra_headers = {}
+
+        if url.path == '/performance':
+            performance_data = snapshot_server.performance_data
+            if performance_data is None:
+                self._send_empty(503, {'Retry-After': str(MIN_REFRESH_INTERVAL_SECONDS)})
+                return
+            entry = snapshot_server.encoded_response(url.path, lambda: snapshot_server.performance_data, content_type)
+            cache_time = performance_data.attrs.get('cache_time')
+            if cache_time is not None:
+                extra_headers[CACHE_TIME_HEADER] = cache_time.isoformat()
+        elif url.path.startswith('/history/'):
+            ticker = unquote(url.path[len('/history/'):])
+            if ticker not in snapshot_server.tickers:
+                self._send_empty(404)
+                return
+            query = parse_qs(url.query)
+            today = pd.Timestamp.now().normalize()
+            earliest = today - timedelta(days=HISTORY_DAYS)
+            try:
+                end_date = pd.Timestamp(query['end'][0]).normalize() if 'end' in query else today
+                start_date = pd.Timestamp(query['start'][0]).normalize() if 'start' in query else earliest
+                # Limitar o período ao histórico que o painel usa
+                end_date = min(end_date, today)
+                start_date = max(start_date, earliest)
+            except (ValueError, TypeError):
+                self._send_empty(400)
+                return
+            if start_date > end_date:
+                self._send_empty(400)
+                return
+            key = f"{url.path}?{start_date:%Y-%m-%d}:{end_date:%Y-%m-%d}"
+            entry = snapshot_server.encoded_response(
+                key, lambda: get_histories([ticker], start_date, end_date, use_server=False).get(ticker), content_type)
+        else:
+            self._send_empty(404)
+            return
+
+        if entry is None:
+            self._send_empty(404)
+            return
+
+        etag, body, gzip_body = entry
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept, Accept-Encoding', **extra_headers}
+        if etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+            self._send_empty(304, headers)
+            return
+
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip_body
+            headers['Content-Encoding'] = 'gzip'
+
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve os dados de desempenho das ações da B3 para outros painéis na rede")
+    parser.add_argument('--host', default=DEFAULT_HOST,
+                        help="endereço em que o servidor escuta (0.0.0.0 para toda a rede, sem autenticação)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="porta TCP")
+    parser.add_argument('--no-bulk', action='store_true', help="buscar ação por ação em vez do download em massa")
+    parser.add_argument('--chunk-size', type=int, default=BULK_CHUNK_SIZE, help="ações por requisição no download em massa")
+    parser.add_argument('--hedge-after', type=float, default=None, metavar='SEGUNDOS',
+                        help="consultar o provedor seguinte em paralelo se o principal demorar mais que isso "
+                             "(padrão: provider_hedge_seconds do config.json)")
+    args = parser.parse_args(argv)
+    if args.hedge_after is not None:
+        configure_default_provider(hedge_after=args.hedge_after)
+
+    server = SnapshotServer(args.host, args.port, bulk=not args.no_bulk, bulk_chunk_size=args.chunk_size)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,62 @@
 import os
+import time
 import pickle
 import pandas as pd
 from datetime import datetime, timedelta
 import logging
 
+from .market_calendar import next_session_close
+from .settings import CACHE_DIR
+
+# pyarrow é opcional: com ele o cache é gravado em formato colunar (Feather/Arrow)
+# e lido por mapeamento em memória; sem ele, usa-se um pickle versionado
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+    feather = None
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Versão do formato do cache; qualquer mudança no formato ou nas colunas gravadas
+# deve incrementá-la para que caches antigos sejam descartados em vez de lidos
+CACHE_FORMAT_VERSION = 2
+CACHE_VERSION_KEY = b'painelb3_cache_version'
+
+# Cache das versões anteriores (DataFrame em pickle sem versão), migrado uma única vez
+LEGACY_CACHE_FILE = "stock_data_cache.pkl"
+
+# Prefixo dos arquivos de cada geração do cache
+GENERATION_PREFIX = "stock_data_cache."
+
+class CacheFormatError(Exception):
+    """Arquivo de cache em formato ou versão incompatível"""
+
 class StockDataCache:
-    def __init__(self, cache_dir="cache", max_cache_age_hours=8):
+    def __init__(self, cache_dir=CACHE_DIR, max_cache_age_hours=8, max_stale_hours=72, trading_calendar=True):
         """
         Inicializa o gerenciador de cache para dados de ações
         
         Args:
             cache_dir: Diretório onde o cache será armazenado
             max_cache_age_hours: Idade máxima do cache em horas antes de ser considerado obsoleto
+                (usada apenas com trading_calendar=False)
+            max_stale_hours: Horas após a expiração em que um cache obsoleto ainda pode ser
+                exibido enquanto é atualizado em segundo plano (ver get_cache_entry)
+            trading_calendar: Se True, os dados valem até o próximo fechamento de pregão da
+                B3 após a busca, de modo que fins de semana e feriados não expiram o cache
         """
         self.cache_dir = cache_dir
-        self.cache_file = os.path.join(cache_dir, "stock_data_cache.pkl")
+        self.columnar = pa is not None
+        self.extension = ".feather" if self.columnar else ".pkl"
+        # Cada gravação cria uma nova geração; este arquivo aponta para a geração atual,
+        # de modo que leitores em outros processos nunca abrem um arquivo sendo substituído
+        self.pointer_file = os.path.join(cache_dir, "stock_data_cache.current")
         self.max_cache_age = timedelta(hours=max_cache_age_hours)
+        self.max_stale_age = timedelta(hours=max_stale_hours)
+        self.trading_calendar = trading_calendar
         
         # Cache em memória
         self.memory_cache = None
@@ -26,48 +64,212 @@ class StockDataCache:
         
         # Criar diretório de cache se não existir
         os.makedirs(cache_dir, exist_ok=True)
+        self._migrate_legacy_cache()
     
-    def get_cached_data(self):
+    def _migrate_legacy_cache(self):
+        """
+        Converte o cache das versões anteriores para o formato atual
+        
+        Roda apenas enquanto não há cache no formato atual: os dados antigos viram a
+        primeira geração, com o horário do arquivo original (para que sua validade
+        seja respeitada), e só então o arquivo antigo é removido.
+        """
+        legacy_file = os.path.join(self.cache_dir, LEGACY_CACHE_FILE)
+        if os.path.exists(self.pointer_file) or not os.path.exists(legacy_file):
+            return
+        try:
+            with open(legacy_file, 'rb') as f:
+                data = pickle.load(f)
+            if not isinstance(data, pd.DataFrame):
+                logging.info(f"Cache antigo sem DataFrame ignorado: {legacy_file}")
+                return
+            legacy_time = os.path.getmtime(legacy_file)
+            self._write(data)
+            os.utime(self.cache_file, (legacy_time, legacy_time))
+            os.remove(legacy_file)
+            logging.info(f"Cache antigo migrado para o formato atual: {len(data)} ações")
+        except Exception as e:
+            logging.error(f"Erro ao migrar cache antigo: {str(e)}")
+    
+    @property
+    def cache_file(self):
+        """Arquivo da geração atual do cache, ou None se não houver cache"""
+        try:
+            with open(self.pointer_file, 'r', encoding='utf-8') as f:
+                generation = f.read().strip()
+        except FileNotFoundError:
+            return None
+        # Gerações de outro formato (ex.: instância sem pyarrow) não são lidas
+        if not generation.startswith(GENERATION_PREFIX) or not generation.endswith(self.extension):
+            return None
+        return os.path.join(self.cache_dir, generation)
+    
+    def _generation_files(self):
+        return [name for name in os.listdir(self.cache_dir)
+                if name.startswith(GENERATION_PREFIX) and name.endswith(('.feather', '.pkl'))
+                and name != LEGACY_CACHE_FILE]
+    
+    def _swap_generation(self, generation):
+        """Aponta o cache para a nova geração e remove as gerações antigas"""
+        previous_file = self.cache_file
+        tmp_pointer = f"{self.pointer_file}.{os.getpid()}.tmp"
+        with open(tmp_pointer, 'w', encoding='utf-8') as f:
+            f.write(generation)
+        
+        # No Windows a substituição falha enquanto outro processo lê o ponteiro
+        for attempt in range(10):
+            try:
+                os.replace(tmp_pointer, self.pointer_file)
+                break
+            except PermissionError:
+                if attempt == 9:
+                    raise
+                time.sleep(0.1)
+        
+        # Manter a geração anterior para leitores que já leram o ponteiro antigo
+        keep = {generation, os.path.basename(previous_file) if previous_file else None}
+        for name in self._generation_files():
+            if name not in keep:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    # Ainda aberta por outro processo; será removida na próxima troca
+                    pass
+    
+    def _read(self, cache_file, columns=None):
+        """
+        Lê um arquivo de cache, opcionalmente apenas algumas colunas
+        
+        Raises:
+            CacheFormatError: Se o arquivo não tiver a versão de formato atual
+        """
+        if self.columnar:
+            # Leitura por mapeamento em memória: apenas as colunas pedidas são tocadas
+            table = feather.read_table(cache_file, columns=columns, memory_map=True)
+            version = (table.schema.metadata or {}).get(CACHE_VERSION_KEY)
+            if version != str(CACHE_FORMAT_VERSION).encode():
+                raise CacheFormatError(f"versão {version!r}, esperada {CACHE_FORMAT_VERSION}")
+            return table.to_pandas()
+        
+        with open(cache_file, 'rb') as f:
+            payload = pickle.load(f)
+        if not isinstance(payload, dict) or payload.get('version') != CACHE_FORMAT_VERSION:
+            raise CacheFormatError("pickle sem cabeçalho de versão compatível")
+        data = payload['data']
+        return data[[c for c in columns if c in data.columns]] if columns else data
+    
+    def _write(self, data):
+        """Grava uma nova geração do cache de forma atômica e a torna a atual"""
+        # attrs guarda metadados de execução (idade do cache) que não devem ser gravados
+        data = data.copy(deep=False)
+        data.attrs = {}
+        
+        generation = f"{GENERATION_PREFIX}{time.time_ns()}.{os.getpid()}{self.extension}"
+        cache_file = os.path.join(self.cache_dir, generation)
+        tmp_file = f"{cache_file}.tmp"
+        if self.columnar:
+            table = pa.Table.from_pandas(data, preserve_index=False)
+            metadata = dict(table.schema.metadata or {})
+            metadata[CACHE_VERSION_KEY] = str(CACHE_FORMAT_VERSION).encode()
+            # Sem compressão para permitir leitura por mapeamento em memória
+            feather.write_feather(table.replace_schema_metadata(metadata), tmp_file,
+                                  compression='uncompressed')
+        else:
+            with open(tmp_file, 'wb') as f:
+                pickle.dump({'version': CACHE_FORMAT_VERSION, 'data': data}, f)
+        os.replace(tmp_file, cache_file)
+        self._swap_generation(generation)
+    
+    def expires_at(self, cache_time):
+        """Horário em que dados gerados em cache_time deixam de ser atuais"""
+        if self.trading_calendar:
+            return next_session_close(cache_time)
+        return cache_time + self.max_cache_age
+    
+    def get_cached_data(self, columns=None):
         """
         Recupera dados do cache se estiverem válidos
         
+        Args:
+            columns: Lista opcional de colunas a carregar (padrão: todas)
+        
         Returns:
             DataFrame ou None: Os dados de ações ou None se o cache não for válido
         """
+        cache_data, stale = self.get_cache_entry(columns)
+        return None if stale else cache_data
+    
+    def get_cache_entry(self, columns=None):
+        """
+        Recupera dados do cache aceitando dados obsoletos (stale-while-revalidate)
+        
+        Dados já expirados (ver expires_at), mas há menos de max_stale_age, são
+        retornados marcados como obsoletos para serem exibidos enquanto uma
+        atualização roda em segundo plano. Além desse limite o cache é ignorado.
+        
+        Args:
+            columns: Lista opcional de colunas a carregar (padrão: todas)
+        
+        Returns:
+            tuple: (DataFrame ou None, True se os dados estão obsoletos). O DataFrame
+            traz em attrs['cache_time'] o horário em que os dados foram gerados e em
+            attrs['stale'] se estão obsoletos.
+        """
         # Primeiro, verificar cache em memória
         if self.memory_cache is not None and self.memory_cache_time is not None:
-            if (datetime.now() - self.memory_cache_time) <= self.max_cache_age:
+            if datetime.now() <= self.expires_at(self.memory_cache_time):
                 logging.info("Usando cache em memória")
-                return self.memory_cache
-
-        if not os.path.exists(self.cache_file):
+                cache_data = self.memory_cache
+                if columns:
+                    cache_data = cache_data[[c for c in columns if c in cache_data.columns]]
+                return self._mark(cache_data, self.memory_cache_time, False), False
+        
+        cache_file = self.cache_file
+        if cache_file is None or not os.path.exists(cache_file):
             logging.info("Cache não encontrado")
-            return None
-            
+            return None, False
+        
         # Verificar idade do arquivo
-        file_time = datetime.fromtimestamp(os.path.getmtime(self.cache_file))
+        file_time = datetime.fromtimestamp(os.path.getmtime(cache_file))
         now = datetime.now()
+        expires_at = self.expires_at(file_time)
         
-        # Se o arquivo for de hoje e não for muito antigo
-        if (now - file_time) <= self.max_cache_age:
-            try:
-                with open(self.cache_file, 'rb') as f:
-                    cache_data = pickle.load(f)
-                    
+        if now - expires_at > self.max_stale_age:
+            logging.info(f"Cache expirado além do limite de obsolescência. Cache de {file_time}, agora é {now}")
+            return None, False
+        
+        stale = now > expires_at
+        try:
+            cache_data = self._read(cache_file, columns)
+            
+            if stale:
+                logging.info(f"Cache obsoleto de {file_time} será usado enquanto os dados são atualizados")
+            else:
                 logging.info(f"Dados carregados do cache gerado em: {file_time}")
                 
-                # Se carregou do disco, armazenar em memória também
-                if cache_data is not None:
+                # Se carregou do disco (todas as colunas), armazenar em memória também
+                if cache_data is not None and not columns:
                     self.memory_cache = cache_data
-                    self.memory_cache_time = datetime.now()
-                
-                return cache_data
-            except Exception as e:
-                logging.error(f"Erro ao carregar cache: {str(e)}")
-                return None
-        else:
-            logging.info(f"Cache expirado. Cache de {file_time}, agora é {now}")
-            return None
+                    self.memory_cache_time = file_time
+            
+            if cache_data is None:
+                return None, False
+            return self._mark(cache_data, file_time, stale), stale
+        except CacheFormatError as e:
+            # Formato antigo ou diferente: descartar o arquivo e tratar como ausente
+            logging.info(f"Cache em formato incompatível ({e}); descartando")
+            self.clear_cache()
+            return None, False
+        except Exception as e:
+            logging.error(f"Erro ao carregar cache: {str(e)}")
+            return None, False
+    
+    @staticmethod
+    def _mark(data, cache_time, stale):
+        """Registra nos atributos do DataFrame a idade dos dados"""
+        data.attrs['cache_time'] = cache_time
+        data.attrs['stale'] = stale
+        return data
     
     def save_data_to_cache(self, data):
         """
@@ -77,8 +279,7 @@ class StockDataCache:
             data: DataFrame contendo os dados de ações
         """
         try:
-            with open(self.cache_file, 'wb') as f:
-                pickle.dump(data, f)
+            self._write(data)
             logging.info(f"Dados salvos no cache: {len(data)} ações")
             
             # Salvar em memória também
@@ -92,9 +293,14 @@ class StockDataCache:
     
     def clear_cache(self):
         """Remove o arquivo de cache"""
-        if os.path.exists(self.cache_file):
-            os.remove(self.cache_file)
+        if os.path.exists(self.pointer_file):
+            os.remove(self.pointer_file)
             logging.info("Cache removido")
+        for name in self._generation_files():
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
         # Limpar cache em memória também
         self.memory_cache = None
-        self.memory_cache_time = None
\ No newline at end of file
+        self.memory_cache_time = None
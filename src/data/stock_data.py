@@ -1,77 +1,57 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta, date
 import time
-import random
 import logging
-import requests
 import threading
+import queue
 
 # Importar o gerenciador de cache
 from .stock_cache import StockDataCache
+from .fetch_scheduler import get_fetch_scheduler, RetryLater
+from .providers import get_default_provider, is_not_found_error
+from .history_store import get_history_store
+from .returns import RETURN_KEYS, build_close_matrix, compute_returns, returns_for_history
+from .quality import detect_generic_data
+from .ticker_health import get_ticker_health_registry
+from .universe import discover_universe
+from .checkpoints import FetchCheckpoint
+from .cache_lock import CacheLease
+from .history_cache import get_history_cache
+from .snapshot_client import get_snapshot_client
 
 # Configurar logging
 logging.getLogger('yfinance').setLevel(logging.ERROR)
 
-# Lista de ações ignoradas (deslistadas ou com problemas)
+# Ações sabidamente deslistadas ou com problemas; usadas apenas para iniciar
+# o registro persistente de falhas (ver get_health_registry)
 IGNORED_STOCKS = ['LCAM3.SA', 'HAPV3.SA', 'VULC3.SA', 'GUAR3.SA']
 
+# Quantidade de ações pedidas em cada requisição do download em massa
+BULK_CHUNK_SIZE = 50
+
+# Janela de histórico usada nas buscas (~15 meses)
+HISTORY_DAYS = 450
+
+class NoHistoryError(Exception):
+    """Os provedores responderam, mas sem histórico para a ação"""
+
+def get_health_registry():
+    """Registro persistente de ações com falha, iniciado com IGNORED_STOCKS"""
+    return get_ticker_health_registry(IGNORED_STOCKS)
+
 def get_all_brazil_stocks():
     """
     Obtém lista completa de ações da B3
-    Combina uma lista base com outras ações detectadas por setor
+    Combina uma lista base com os componentes dos índices, usando o cache do universo
     """
     try:
         # Primeiro, obter nossa lista base de setores
         base_stocks = list(get_stock_sectors().keys())
         
-        # Segundo, tentar obter mais ações via Yahoo Finance
-        # Lista de índices brasileiros para extrair componentes
-        indices = ['IBOV', 'IBRX', 'SMLL', 'IDIV', 'MLCX']
-        additional_stocks = set()
-        
-        for index_code in indices:
-            try:
-                index = yf.Ticker(f"^{index_code}")
-                time.sleep(1)  # Evitar rate limiting
-                if hasattr(index, 'composition') and index.composition is not None:
-                    for stock in index.composition:
-                        if stock.endswith('.SA'):
-                            additional_stocks.add(stock)
-            except Exception as e:
-                print(f"Erro ao obter componentes do índice {index_code}: {e}")
-                
-        # Combinar as duas listas
-        all_stocks = list(set(base_stocks).union(additional_stocks))
-        
-        # Filtrar apenas ações válidas (tentar verificar se existem)
-        valid_stocks = []
-        batches = [all_stocks[i:i+20] for i in range(0, len(all_stocks), 20)]  # Processar em lotes de 20
+        # Segundo, combinar com os componentes dos índices (cacheados em disco)
+        valid_stocks = discover_universe(base_stocks)
         
-        for batch in batches:
-            try:
-                # Verificar rapidamente se as ações existem
-                data = yf.download(batch, period='1d', progress=False)
-                if isinstance(data, pd.DataFrame) and 'Close' in data.columns:
-                    for stock in batch:
-                        if stock in data['Close'].columns and not pd.isna(data['Close'][stock].iloc[-1]):
-                            valid_stocks.append(stock)
-                elif isinstance(data.columns, pd.MultiIndex):
-                    valid_in_batch = [stock for stock in batch if stock in data['Close'].columns 
-                                      and not data['Close'][stock].empty 
-                                      and not pd.isna(data['Close'][stock].iloc[-1])]
-                    valid_stocks.extend(valid_in_batch)
-            except Exception as e:
-                print(f"Erro ao verificar lote de ações: {e}")
-            
-            time.sleep(1)  # Evitar rate limiting
-        
-        # Adicionar manualmente as nossas ações principais se elas não foram detectadas
-        for stock in base_stocks:
-            if stock not in valid_stocks:
-                valid_stocks.append(stock)
-                
         # Criar DataFrame com as ações válidas
         stocks_df = pd.DataFrame({'symbol': valid_stocks})
         return stocks_df
@@ -270,42 +250,85 @@ def get_stock_sectors():
         print(f"Erro ao mapear setores: {e}")
         return {}
 
-# Modificar a função fetch_stock_data para buscar apenas dados necessários
-def fetch_stock_data(ticker, period="1y", retry_count=3, loading_screen=None, force_unique=True):
-    """Busca dados históricos com verificação de unicidade e registro detalhado"""
+def download_alternative_window(ticker, default_start, end_date):
+    """Baixa um período ligeiramente deslocado e substitui o histórico armazenado da ação"""
+    alternativo_start = default_start - timedelta(days=7)
+    alternativo_end = end_date - timedelta(days=1)
+    
+    stock_data = get_default_provider().get_history([ticker], alternativo_start, alternativo_end).get(ticker)
+    
+    if stock_data is None or stock_data.empty:
+        raise NoHistoryError(f"Dados alternativos não disponíveis para {ticker}")
+    
+    # O histórico armazenado era suspeito: substituir pelo período alternativo
+    return get_history_store().append(ticker, stock_data, replace=True)
+
+def fetch_stock_data(ticker, period="1y", retry_count=3, loading_screen=None, force_unique=True, force_refresh=False,
+                     attempt=0, defer_retries=False):
+    """
+    Busca dados históricos com verificação de unicidade e registro detalhado
+    
+    Com force_refresh=True o histórico armazenado é descartado e baixado de novo
+    com um período alternativo (usado para ações marcadas pelo detector em lote).
+    
+    Com defer_retries=True (execução dentro do agendador de buscas), uma falha
+    transitória não dorme na thread: levanta RetryLater para que a busca volte à
+    fila com horário mínimo, continuando da tentativa indicada em attempt.
+    """
     if loading_screen:
         loading_screen.log(f"Buscando dados para {ticker}...")
     
-    retries = 0
+    retries = attempt
     
     # Adicionar sufixo .SA se não estiver presente
     if not ticker.endswith('.SA'):
         ticker = f"{ticker}.SA"
     
+    # Ações com disjuntor aberto são ignoradas; após o prazo, apenas uma tentativa de teste
+    registry = get_health_registry()
+    if registry.is_open(ticker):
+        if loading_screen:
+            loading_screen.log(f"Ignorando {ticker} (falhas recentes registradas)")
+        return None
+    if registry.is_probe(ticker):
+        retry_count = 1
+    
+    last_error = None
+    not_found = False
+    
     while retries < retry_count:
         try:
-            # Pequeno delay entre requisições para não sobrecarregar a API
-            time.sleep(0.5)
-            
             # Use o período estendido para garantir dados suficientes
             end_date = datetime.now()
-            start_date = end_date - timedelta(days=450)  # ~15 meses
+            default_start = end_date - timedelta(days=HISTORY_DAYS)
             
-            if loading_screen:
-                loading_screen.log(f"Buscando dados de {ticker} ({start_date.date()} a {end_date.date()})")
+            history_store = get_history_store()
+            provider = get_default_provider()
             
-            # Buscar dados usando yfinance
-            stock_data = yf.download(
-                ticker, 
-                start=start_date, 
-                end=end_date, 
-                progress=False,
-                ignore_tz=True
-            )
+            if force_refresh:
+                # Busca direcionada: o histórico armazenado foi marcado como suspeito
+                if loading_screen:
+                    loading_screen.log(f"Buscando novamente o histórico completo de {ticker}")
+                stock_data = download_alternative_window(ticker, default_start, end_date)
+            else:
+                # Buscar apenas as barras que faltam desde a última execução
+                start_date = history_store.fetch_start(ticker, default_start)
+                
+                if loading_screen:
+                    loading_screen.log(f"Buscando dados de {ticker} ({start_date.date()} a {end_date.date()})")
+                
+                # Buscar dados pela cadeia de provedores (limitada pelo agendador global)
+                new_data = provider.get_history([ticker], start_date, end_date).get(ticker)
+                
+                # Juntar as barras novas ao histórico armazenado
+                if new_data is None or new_data.empty:
+                    stock_data = history_store.load(ticker)
+                else:
+                    stock_data = history_store.append(ticker, new_data)
             
             # Verificações detalhadas dos dados recebidos
-            if stock_data.empty:
-                raise Exception(f"Nenhum dado disponível para {ticker}")
+            if stock_data is None or stock_data.empty:
+                raise NoHistoryError(f"Nenhum dado disponível para {ticker}")
             
             # Verificar se realmente são dados da ação solicitada (comparar último preço com outras APIs)
             # Isso ajuda a identificar casos onde o Yahoo retorna dados genéricos
@@ -316,156 +339,177 @@ def fetch_stock_data(ticker, period="1y", retry_count=3, loading_screen=None, fo
                 print(f"AVISO: Dados de {ticker} cobrem apenas {data_span_days} dias")
             
             # Verificação adicional de unicidade
-            if force_unique and is_generic_data(stock_data, ticker):
+            if force_unique and not force_refresh and is_generic_data(stock_data, ticker):
                 # Se detectarmos dados genéricos, forçamos uma nova tentativa com outro intervalo
                 print(f"AVISO: Dados potencialmente genéricos detectados para {ticker}. Tentando período alternativo...")
-                
-                # Tentar um período ligeiramente diferente
-                alternativo_start = start_date - timedelta(days=7)
-                alternativo_end = end_date - timedelta(days=1)
-                
-                stock_data = yf.download(
-                    ticker, 
-                    start=alternativo_start, 
-                    end=alternativo_end, 
-                    progress=False,
-                    ignore_tz=True
-                )
-                
-                if stock_data.empty:
-                    raise Exception(f"Dados alternativos não disponíveis para {ticker}")
+                stock_data = download_alternative_window(ticker, default_start, end_date)
             
-            # Arquivo de log para diagnóstico
-            if ticker in ['ITUB4.SA', 'BBDC4.SA', 'BBAS3.SA', 'SANB11.SA', 'BPAC11.SA']:
-                print(f"DEBUG {ticker}: Dados dos últimos 5 dias:")
-                print(stock_data.tail(5))
-                
+            registry.record_success(ticker)
+            # Disponibilizar o histórico para gráficos e consultas sem nova busca
+            get_history_cache().put(ticker, stock_data, default_start, end_date)
             return stock_data
                 
         except Exception as e:
+            last_error = e
             retries += 1
-            delay = 2 ** retries  # Backoff exponencial
-            log_message = f"Tentativa {retries} falhou para {ticker}: {str(e)}. Aguardando {delay}s..."
-            print(log_message)
-            
-            if loading_screen:
-                loading_screen.log(log_message)
-            time.sleep(delay)
             
             # Se for erro 404, não insistir
-            if "404" in str(e):
+            if not isinstance(e, NoHistoryError) and is_not_found_error(e):
                 log_message = f"Ação {ticker} não encontrada (erro 404). Pulando..."
                 print(log_message)
                 if loading_screen:
                     loading_screen.log(log_message)
+                not_found = True
                 break
+            
+            if retries >= retry_count:
+                break
+            
+            delay = 2 ** retries  # Backoff exponencial
+            log_message = f"Tentativa {retries} falhou para {ticker}: {str(e)}. Nova tentativa em {delay}s..."
+            print(log_message)
+            if loading_screen:
+                loading_screen.log(log_message)
+            
+            # Dentro do agendador, devolver a busca à fila em vez de bloquear o worker
+            if defer_retries:
+                raise RetryLater(delay, {'attempt': retries})
+            time.sleep(delay)
     
+    # Apenas respostas sobre a própria ação contam para o disjuntor; erros de rede,
+    # DNS ou limite de requisições (ProviderUnavailable) não dizem nada sobre ela
+    if not_found or isinstance(last_error, NoHistoryError):
+        registry.record_failure(ticker, last_error, permanent=not_found)
+    else:
+        print(f"Falha transitória em {ticker} não registrada no disjuntor: {last_error}")
     log_message = f"Erro ao obter dados da ação {ticker} após {retry_count} tentativas."
     print(log_message)
     if loading_screen:
         loading_screen.log(log_message)
     return None
 
+def fetch_stock_data_bulk(tickers, chunk_size=BULK_CHUNK_SIZE, loading_screen=None, on_chunk=None):
+    """
+    Busca o histórico de várias ações com poucas requisições multi-ticker
+    
+    Args:
+        tickers: Lista de códigos de ações (com ou sem sufixo .SA)
+        chunk_size: Quantidade de ações por requisição
+        loading_screen: Tela de carregamento opcional para logs
+        on_chunk: Função opcional chamada com o dicionário ticker -> DataFrame de cada lote concluído
+    
+    Returns:
+        dict: Mapeia cada ticker ao seu DataFrame OHLCV (apenas ações com dados)
+    """
+    tickers = [t if t.endswith('.SA') else f"{t}.SA" for t in tickers]
+    
+    end_date = datetime.now()
+    default_start = end_date - timedelta(days=HISTORY_DAYS)
+    
+    # Agrupar as ações pela data inicial da busca incremental; numa execução
+    # diária quase todas compartilham a mesma última barra armazenada
+    history_store = get_history_store()
+    history_cache = get_history_cache()
+    provider = get_default_provider()
+    registry = get_health_registry()
+    groups = {}
+    for ticker in tickers:
+        groups.setdefault(history_store.fetch_start(ticker, default_start), []).append(ticker)
+    
+    chunks = [
+        (start_date, group[i:i+chunk_size])
+        for start_date, group in groups.items()
+        for i in range(0, len(group), chunk_size)
+    ]
+    
+    frames = {}
+    for chunk_idx, (start_date, chunk) in enumerate(chunks, 1):
+        if loading_screen:
+            loading_screen.log(f"Download em massa: lote {chunk_idx}/{len(chunks)} ({len(chunk)} ações desde {start_date.date()})")
+        try:
+            chunk_frames = {}
+            for ticker, new_data in provider.get_history(chunk, start_date, end_date).items():
+                chunk_frames[ticker] = history_store.append(ticker, new_data, flush_index=False)
+                history_cache.put(ticker, chunk_frames[ticker], default_start, end_date)
+                registry.record_success(ticker)
+            # Índice gravado uma vez por lote, não a cada ação
+            history_store.flush_index()
+            frames.update(chunk_frames)
+            if on_chunk:
+                on_chunk(chunk_frames)
+        except Exception as e:
+            print(f"Erro no download em massa do lote {chunk_idx}: {e}")
+            if loading_screen:
+                loading_screen.log(f"Erro no download em massa do lote {chunk_idx}: {e}")
+    
+    # Gravar o índice das ações salvas antes de um lote interrompido por erro
+    history_store.flush_index()
+    
+    missing = len(tickers) - len(frames)
+    if loading_screen:
+        loading_screen.log(f"Download em massa concluído: {len(frames)} ações com dados, {missing} sem dados")
+    
+    return frames
+
+def add_unique_variation(returns, latest_price):
+    """Adiciona uma variação única leve aos retornos para evitar valores idênticos"""
+    import hashlib, random
+    hash_obj = hashlib.md5(str(latest_price).encode())
+    seed_value = int(hash_obj.hexdigest(), 16)
+    rng = random.Random(seed_value)
+    for key in returns:
+        if abs(returns[key]) > 0.01:
+            returns[key] += rng.uniform(-0.1, 0.1)  # variação de até 0.1%
+    return returns
+
 def calculate_returns(historical_data):
     """Calcula os retornos para diferentes períodos usando datas reais para melhor precisão"""
-    returns = {
-        'daily': 0.0,
-        'weekly': 0.0,
-        'monthly': 0.0,
-        'quarterly': 0.0,
-        'yearly': 0.0,
-        'ytd_return': 0.0
-    }
+    returns = {key: 0.0 for key in RETURN_KEYS}
     
     try:
         if historical_data.empty or len(historical_data) < 2:
             print("Dados históricos insuficientes para calcular retornos")
             return returns
         
-        historical_data = historical_data.sort_index()
-        latest_date = historical_data.index[-1]
-        latest_price = float(historical_data['Close'].iloc[-1])
-        print(f"Data mais recente: {latest_date.date()}, Preço: {latest_price}")
-        
-        # Retorno diário (dia anterior)
-        try:
-            prev_date = historical_data.index[-2]
-            prev_price = float(historical_data['Close'].iloc[-2])
-            returns['daily'] = ((latest_price / prev_price) - 1) * 100
-            print(f"Retorno diário: {returns['daily']:.2f}% (Comparando {latest_date.date()} e {prev_date.date()})")
-        except Exception as e:
-            print(f"Erro no cálculo diário: {e}")
-        
-        # Definição dos períodos a serem calculados com base em dias
-        period_days = {
-            'weekly': 7,      # 7 dias atrás
-            'monthly': 30,    # 30 dias atrás
-            'quarterly': 90,  # 90 dias atrás
-            'yearly': 365     # 365 dias atrás
-        }
-        
-        # Função auxiliar para buscar o preço mais próximo da data alvo
-        def get_price_for_date(target_date):
-            idx = historical_data.index.get_indexer([target_date], method='nearest')[0]
-            return float(historical_data['Close'].iloc[idx]), historical_data.index[idx]
-        
-        for period_name, days in period_days.items():
-            target_date = latest_date - pd.Timedelta(days=days)
-            try:
-                past_price, past_date = get_price_for_date(target_date)
-                returns[period_name] = ((latest_price / past_price) - 1) * 100
-                print(f"Retorno {period_name}: {returns[period_name]:.2f}% (Comparando {latest_date.date()} com {past_date.date()})")
-            except Exception as e:
-                print(f"Erro ao calcular retorno {period_name}: {e}")
-        
-        # Cálculo do YTD (Desde o início do ano)
-        try:
-            current_year = latest_date.year
-            year_start = pd.Timestamp(year=current_year, month=1, day=1)
-            if historical_data.index[0] <= year_start:
-                if year_start in historical_data.index:
-                    ytd_price = float(historical_data.loc[year_start, 'Close'])
-                    used_date = year_start
-                else:
-                    ytd_price, used_date = get_price_for_date(year_start)
-                if ytd_price > 0:
-                    returns['ytd_return'] = ((latest_price / ytd_price) - 1) * 100
-                    print(f"Retorno YTD: {returns['ytd_return']:.2f}% (Comparando {latest_date.date()} com {used_date.date()})")
-            else:
-                print(f"Dados não disponíveis desde o início do ano. Inicial: {historical_data.index[0].date()}")
-        except Exception as e:
-            print(f"Erro ao calcular retorno YTD: {e}")
-        
-        # Adicionar uma variação única leve para evitar valores idênticos
-        import hashlib, random
-        hash_obj = hashlib.md5(str(latest_price).encode())
-        seed_value = int(hash_obj.hexdigest(), 16)
-        random.seed(seed_value)
-        for key in returns:
-            if abs(returns[key]) > 0.01:
-                variation = random.uniform(-0.1, 0.1)  # variação de até 0.1%
-                returns[key] += variation
-                print(f"{key} ajustado com variação {variation:.4f}%")
-        
-        return returns
+        # Mesmo kernel vetorizado usado no cálculo em lote do universo
+        returns.update(returns_for_history(historical_data))
+        latest_price = float(historical_data['Close'].sort_index().dropna().iloc[-1])
+        return add_unique_variation(returns, latest_price)
     except Exception as e:
         print(f"Erro global no cálculo de retornos: {e}")
         return returns
 
-def process_stock_thread(stock_code, results, index, stock_sectors, loading_screen=None):
-    """Função para processar uma ação em uma thread separada"""
+def process_stock_thread(stock_code, results, index, stock_sectors, loading_screen=None, historical_data=None,
+                         returns=None, suspicious=False, attempt=0, defer_retries=False):
+    """
+    Função para processar uma ação em uma thread separada
+    
+    Se historical_data vier do download em massa, a busca individual só é feita
+    quando o detector em lote marcou a ação como suspeita (suspicious=True). Se
+    returns vier do cálculo em lote, ele só é refeito quando o histórico muda.
+    attempt e defer_retries são repassados a fetch_stock_data (ver RetryLater).
+    """
     try:
-        # Verificar se a ação está na lista de ignoradas
-        if stock_code in IGNORED_STOCKS:
+        # Verificar se a ação está com o disjuntor aberto no registro de falhas
+        if get_health_registry().is_open(stock_code):
             if loading_screen:
-                loading_screen.log(f"Ignorando {stock_code} (ação deslistada ou com problemas conhecidos)")
+                loading_screen.log(f"Ignorando {stock_code} (ação deslistada ou com falhas recentes)")
             return
             
         if loading_screen:
             loading_screen.log(f"Processando {stock_code}")
         
-        # Obter dados históricos
-        historical_data = fetch_stock_data(stock_code, loading_screen=loading_screen)
+        # Ações marcadas pelo detector em lote recebem uma única busca direcionada
+        if suspicious:
+            historical_data = fetch_stock_data(stock_code, loading_screen=loading_screen, force_refresh=True,
+                                               attempt=attempt, defer_retries=defer_retries)
+            returns = None
+        
+        # Obter dados históricos individualmente se não vieram do download em massa
+        elif historical_data is None or historical_data.empty:
+            historical_data = fetch_stock_data(stock_code, loading_screen=loading_screen,
+                                               attempt=attempt, defer_retries=defer_retries)
+            returns = None
         if historical_data is None or historical_data.empty:
             return
         
@@ -475,8 +519,12 @@ def process_stock_thread(stock_code, results, index, stock_sectors, loading_scre
                 loading_screen.log(f"Dados insuficientes para {stock_code}. Necessários pelo menos 2 dias de dados.")
             return
             
-        # Calcular retornos com ticker adicional
-        returns = calculate_returns(historical_data)
+        # Calcular retornos, reaproveitando o cálculo em lote quando disponível
+        if returns is None:
+            returns = calculate_returns(historical_data)
+        else:
+            latest_price = float(historical_data['Close'].dropna().iloc[-1])
+            returns = add_unique_variation(dict(returns), latest_price)
         
         # Extrair dados do último dia
         latest_data = historical_data.iloc[-1]
@@ -514,13 +562,52 @@ def process_stock_thread(stock_code, results, index, stock_sectors, loading_scre
         # Armazenar no array de resultados
         results[index] = stock_data
         
+    except RetryLater:
+        # Deixar o agendador reagendar a ação
+        raise
     except Exception as e:
         if loading_screen:
             loading_screen.log(f"Erro ao processar {stock_code}: {str(e)}")
         print(f"Erro ao processar {stock_code}: {str(e)}")
 
-def get_stock_performance_data(loading_screen=None):
-    """Versão otimizada para obter dados de desempenho das ações da B3"""
+def get_stock_performance_data(loading_screen=None, bulk=True, bulk_chunk_size=BULK_CHUNK_SIZE, on_results=None,
+                               on_refresh=None, server_url=None):
+    """
+    Versão otimizada para obter dados de desempenho das ações da B3
+    
+    Cache obsoleto (ver StockDataCache.get_cache_entry) é retornado imediatamente,
+    com attrs['stale'] = True, e atualizado em segundo plano.
+    
+    Com um servidor de snapshots configurado (server_url ou a variável de ambiente
+    PAINELB3_SERVER), os dados são obtidos dele; se ele estiver indisponível, a
+    busca local é usada normalmente.
+    
+    Args:
+        loading_screen: Tela de carregamento opcional para logs e progresso
+        bulk: Se True, baixa o histórico de todas as ações em poucas requisições multi-ticker
+        bulk_chunk_size: Quantidade de ações por requisição no modo em massa
+        on_results: Função opcional chamada, durante uma busca, com uma lista de linhas
+            (dicionários) à medida que as ações ficam prontas, permitindo exibir
+            resultados parciais. É chamada da thread que executa esta função.
+        on_refresh: Função opcional chamada com o DataFrame atualizado (ou None em caso
+            de falha) quando a atualização em segundo plano de um cache obsoleto termina
+        server_url: URL do servidor de snapshots (ver data.snapshot_server)
+    """
+    client = get_snapshot_client(server_url)
+    if client is not None:
+        if loading_screen:
+            loading_screen.log(f"Obtendo dados do servidor {client.server_url}...")
+        try:
+            performance_data = client.get_performance_data()
+            if loading_screen:
+                loading_screen.log(f"Dados recebidos do servidor: {len(performance_data)} ações")
+                loading_screen.update_progress(100, 100)
+            return performance_data
+        except Exception as e:
+            if loading_screen:
+                loading_screen.log(f"Servidor indisponível ({str(e)}); buscando dados localmente")
+            logging.error(f"Erro ao obter dados do servidor de snapshots: {str(e)}")
+    
     # Inicializar gerenciador de cache
     cache = StockDataCache()
     
@@ -528,65 +615,208 @@ def get_stock_performance_data(loading_screen=None):
     if loading_screen:
         loading_screen.log("Verificando dados em cache...")
     
-    cached_data = cache.get_cached_data()
+    cached_data, stale = cache.get_cache_entry()
     if cached_data is not None:
         if loading_screen:
             loading_screen.log(f"Dados encontrados em cache: {len(cached_data)} ações")
             loading_screen.update_progress(100, 100)
+        if stale:
+            if loading_screen:
+                loading_screen.log(f"Dados de {cached_data.attrs['cache_time']:%d/%m %H:%M} desatualizados; atualizando em segundo plano...")
+            refresh_performance_data_in_background(cache, bulk, bulk_chunk_size, on_refresh)
         return cached_data
 
     if loading_screen:
         loading_screen.log("Cache não disponível ou expirado. Buscando dados atualizados...")
     
+    return _fetch_with_lease(cache, loading_screen, bulk, bulk_chunk_size, on_results)
+
+# Evita duas atualizações em segundo plano simultâneas
+_refresh_lock = threading.Lock()
+
+def refresh_performance_data_in_background(cache=None, bulk=True, bulk_chunk_size=BULK_CHUNK_SIZE, on_refresh=None):
+    """
+    Busca os dados de desempenho em uma thread separada e atualiza o cache
+    
+    Returns:
+        bool: False se já havia uma atualização em andamento
+    """
+    if not _refresh_lock.acquire(blocking=False):
+        if on_refresh:
+            on_refresh(None)
+        return False
+    
+    def refresh_thread():
+        try:
+            performance_data = _fetch_with_lease(cache or StockDataCache(), None, bulk, bulk_chunk_size)
+        finally:
+            _refresh_lock.release()
+        if on_refresh:
+            on_refresh(performance_data if not performance_data.empty else None)
+    
+    threading.Thread(target=refresh_thread, daemon=True, name="cache-refresh").start()
+    return True
+
+def refresh_performance_data(loading_screen=None, bulk=True, bulk_chunk_size=BULK_CHUNK_SIZE, force=False):
+    """
+    Atualiza o cache de desempenho sem interface gráfica (ex.: aquecimento agendado)
+    
+    Args:
+        loading_screen: Objeto opcional com log(mensagem) e update_progress(atual, total)
+        bulk: Se True, baixa o histórico de todas as ações em poucas requisições multi-ticker
+        bulk_chunk_size: Quantidade de ações por requisição no modo em massa
+        force: Se True, busca os dados mesmo que o cache atual ainda seja válido
+    
+    Returns:
+        DataFrame: Os dados de desempenho (vazio em caso de falha)
+    """
+    cache = StockDataCache()
+    if not force:
+        cached_data = cache.get_cached_data()
+        if cached_data is not None:
+            if loading_screen:
+                loading_screen.log(f"Cache ainda válido: {len(cached_data)} ações")
+            return cached_data
+    return _fetch_with_lease(cache, loading_screen, bulk, bulk_chunk_size, force=force)
+
+def _fetch_with_lease(cache, loading_screen=None, bulk=True, bulk_chunk_size=BULK_CHUNK_SIZE, on_results=None,
+                      force=False):
+    """
+    Busca os dados garantindo que apenas uma instância do programa atualize o cache
+    
+    Se outra instância já estiver buscando, espera ela terminar e usa o cache
+    gravado por ela em vez de repetir a busca.
+    """
+    lease = CacheLease(cache.cache_dir)
+    while not lease.acquire():
+        if loading_screen:
+            loading_screen.log("Outra instância está atualizando os dados; aguardando...")
+        lease.wait_released()
+        cached_data = cache.get_cached_data()
+        if cached_data is not None:
+            if loading_screen:
+                loading_screen.log(f"Dados atualizados por outra instância: {len(cached_data)} ações")
+                loading_screen.update_progress(100, 100)
+            return cached_data
+    
+    try:
+        # Outra instância pode ter concluído a atualização antes de obtermos a concessão
+        cached_data = None if force else cache.get_cached_data()
+        if cached_data is not None:
+            return cached_data
+        return _fetch_performance_data(cache, loading_screen, bulk, bulk_chunk_size, on_results)
+    finally:
+        lease.release()
+
+def _fetch_performance_data(cache, loading_screen=None, bulk=True, bulk_chunk_size=BULK_CHUNK_SIZE, on_results=None):
+    """Busca os dados de desempenho de todas as ações e grava o cache (ver get_stock_performance_data)"""
     try:
         # Obter lista de ações
         stock_sectors = get_stock_sectors()
         
         # Usar SEMPRE todas as ações disponíveis, sem limitação
         stock_list = list(stock_sectors.keys())
+        positions = {stock_code: i for i, stock_code in enumerate(stock_list)}
         if loading_screen:
             loading_screen.log(f"Buscando todas as {len(stock_list)} ações disponíveis")
         
-        # Processar ações em lotes
-        batch_size = 5  # Processar 5 ações por vez
-        batches = [stock_list[i:i+batch_size] for i in range(0, len(stock_list), batch_size)]
+        # Todas as ações vão ao pool compartilhado; cada worker livre pega a
+        # próxima ação, então uma ação lenta não segura as outras. Cada ação
+        # concluída avisa a fila pela sua posição em stock_list.
+        scheduler = get_fetch_scheduler()
+        results = [None] * len(stock_list)
+        completed = queue.Queue()
+        submitted = set()
+        
+        # Cada ação pronta é gravada em um ponto de controle; uma busca interrompida
+        # retoma apenas as ações que faltam ou cujo ponto de controle está corrompido
+        checkpoint = FetchCheckpoint(cache.cache_dir, cache.expires_at)
+        restored = checkpoint.load_all()
+        for stock_code, row in restored.items():
+            if stock_code in positions:
+                index = positions[stock_code]
+                results[index] = row
+                submitted.add(stock_code)
+                completed.put(index)
+        if restored and loading_screen:
+            loading_screen.log(f"Retomando busca anterior: {len(submitted)} ações já processadas")
+        
+        def on_done(stock_code, index):
+            if results[index]:
+                checkpoint.save(stock_code, results[index])
+            completed.put(index)
+        
+        def submit(stock_code, historical_data=None, returns=None, suspicious=False):
+            index = positions[stock_code]
+            submitted.add(stock_code)
+            future = scheduler.submit(process_stock_thread, stock_code, results, index, stock_sectors,
+                                      loading_screen, historical_data, returns, suspicious,
+                                      defer_retries=True)
+            future.add_done_callback(lambda _: on_done(stock_code, index))
         
-        all_data = []
         total_processed = 0
         
-        for batch_idx, batch in enumerate(batches):
-            # Criar threads para processamento paralelo do lote
-            threads = []
-            batch_results = [None] * len(batch)
-            
-            for i, stock_code in enumerate(batch):
-                # Criar thread para cada ação no lote
-                t = threading.Thread(
-                    target=process_stock_thread, 
-                    args=(stock_code, batch_results, i, stock_sectors, loading_screen)
-                )
-                threads.append(t)
-                t.start()
-            
-            # Esperar todas as threads terminarem
-            for t in threads:
-                t.join()
-            
-            # Adicionar resultados válidos aos dados
-            for result in batch_results:
-                if result:
-                    all_data.append(result)
-            
-            total_processed += len(batch)
-            if loading_screen:
+        def drain(block):
+            """Consome as ações concluídas e repassa as novas linhas a on_results"""
+            nonlocal total_processed
+            rows = []
+            processed_before = total_processed
+            while total_processed < len(stock_list):
+                try:
+                    index = completed.get(block=block)
+                except queue.Empty:
+                    break
+                # Depois da primeira, agrupar apenas as ações que já terminaram
+                block = False
+                total_processed += 1
+                if results[index]:
+                    rows.append(results[index])
+            if loading_screen and total_processed > processed_before:
                 loading_screen.update_progress(total_processed, len(stock_list))
+            if on_results and rows:
+                on_results(rows)
+        
+        def process_chunk(frames):
+            """Calcula retornos e qualidade do lote baixado e envia suas ações ao pool"""
+            close_matrix = build_close_matrix(frames)
+            batch_returns = compute_returns(close_matrix).to_dict('index')
+            quality = detect_generic_data(close_matrix)
+            suspicious = set(quality.index[quality['suspicious'].astype(bool)])
+            if suspicious:
+                print(f"AVISO: Dados potencialmente genéricos em {len(suspicious)} ações: {sorted(suspicious)}")
+                if loading_screen:
+                    loading_screen.log(f"{len(suspicious)} ações com dados suspeitos serão buscadas novamente")
+            for stock_code, historical_data in frames.items():
+                if stock_code in positions and stock_code not in submitted:
+                    submit(stock_code, historical_data, batch_returns.get(stock_code), stock_code in suspicious)
+            # Repassar o que já ficou pronto enquanto o próximo lote é baixado
+            drain(block=False)
+        
+        # Baixar o histórico do universo em lotes multi-ticker; cada lote é
+        # processado assim que chega, e ações sem dados caem na busca individual
+        if bulk:
+            registry = get_health_registry()
+            bulk_list = [code for code in stock_list if code not in submitted and not registry.is_open(code)]
+            fetch_stock_data_bulk(bulk_list, chunk_size=bulk_chunk_size, loading_screen=loading_screen,
+                                  on_chunk=process_chunk)
+        
+        for stock_code in stock_list:
+            if stock_code not in submitted:
+                submit(stock_code)
+        
+        while total_processed < len(stock_list):
+            drain(block=True)
+        
+        # Adicionar resultados válidos aos dados, preservando a ordem original
+        all_data = [result for result in results if result]
         
         # Criar DataFrame com todos os dados
         performance_data = pd.DataFrame(all_data)
         
-        # Salvar no cache após obter os dados
+        # Salvar no cache após obter os dados; os pontos de controle não são mais necessários
         if performance_data is not None and not performance_data.empty:
-            cache.save_data_to_cache(performance_data)
+            if cache.save_data_to_cache(performance_data):
+                checkpoint.clear()
             if loading_screen:
                 loading_screen.log(f"Dados salvos em cache: {len(performance_data)} ações")
         
@@ -629,34 +859,20 @@ def get_trades_count(historical_data):
     except:
         return 0.0
 
-def is_generic_data(data, ticker):
-    """Verifica se os dados parecem genéricos/preenchidos com valores padrão"""
-    # Verificar se há padrões suspeitos nos dados
+def is_generic_data(data, ticker, **thresholds):
+    """Verifica se os dados de uma ação parecem genéricos/preenchidos com valores padrão"""
     try:
-        # Calcular a variância dos retornos diários
-        # Dados genéricos frequentemente têm variância muito baixa
-        if len(data) >= 5:
-            returns = data['Close'].pct_change().dropna()
-            variance = returns.var()
-            
-            # Verificar se a variância é suspeita (muito baixa)
-            # O mercado financeiro real deveria ter alguma volatilidade
-            if abs(variance) < 0.00001:  # Valor arbitrário baixo
-                print(f"AVISO: {ticker} tem variância de retorno suspeitamente baixa: {variance}")
-                return True
-            
-            # Verificar se há muitos retornos idênticos em sequência
-            # Isso é muito incomum em dados reais
-            consecutive_identical = 0
-            for i in range(1, len(returns)):
-                if abs(returns.iloc[i] - returns.iloc[i-1]) < 0.0001:
-                    consecutive_identical += 1
-            
-            if consecutive_identical > len(returns) * 0.3:  # Se mais de 30% forem idênticos
-                print(f"AVISO: {ticker} tem muitos retornos idênticos consecutivos: {consecutive_identical}/{len(returns)}")
-                return True
+        verdict = detect_generic_data(build_close_matrix({ticker: data}), **thresholds).iloc[0]
         
-        return False
+        if verdict['low_variance']:
+            print(f"AVISO: {ticker} tem variância de retorno suspeitamente baixa: {verdict['variance']}")
+        if verdict['repeated_returns']:
+            print(f"AVISO: {ticker} tem muitos retornos idênticos consecutivos: "
+                  f"{verdict['identical_count']}/{verdict['bars'] - 1}")
+        if verdict['flat_segment']:
+            print(f"AVISO: {ticker} tem {verdict['longest_flat_run']} pregões seguidos sem variação de preço")
+        
+        return bool(verdict['suspicious'])
     except Exception as e:
         print(f"Erro ao verificar genericidade dos dados: {e}")
-        return False
\ No newline at end of file
+        return False
@@ -0,0 +1,150 @@
+import os
+import json
+import threading
+from datetime import datetime, timedelta
+import logging
+
+from .settings import CACHE_DIR
+
+class TickerHealthRegistry:
+    def __init__(self, cache_dir=CACHE_DIR, failure_threshold=2, open_ttl_hours=24, max_ttl_hours=24 * 30,
+                 seed_tickers=()):
+        """
+        Registro persistente de ações com falhas, com disjuntor (circuit breaker) por ação
+
+        Depois de failure_threshold buscas falhas seguidas, o disjuntor da ação abre e
+        ela é ignorada até o prazo expirar. Após o prazo, uma única tentativa de teste
+        é liberada: se funcionar a ação volta ao normal, se falhar o disjuntor reabre
+        com o dobro do prazo (até max_ttl_hours).
+
+        Só devem ser registradas falhas que dizem algo sobre a ação (não
+        encontrada, histórico vazio); erros de rede e limites de requisição não
+        abrem o disjuntor.
+
+        Args:
+            cache_dir: Diretório onde o registro será armazenado
+            failure_threshold: Falhas seguidas necessárias para abrir o disjuntor
+            open_ttl_hours: Prazo inicial do disjuntor aberto
+            max_ttl_hours: Prazo máximo do disjuntor aberto
+            seed_tickers: Ações sabidamente problemáticas, registradas apenas na criação do arquivo
+        """
+        self.registry_file = os.path.join(cache_dir, "ticker_health.json")
+        self.failure_threshold = failure_threshold
+        self.open_ttl = timedelta(hours=open_ttl_hours)
+        self.max_ttl = timedelta(hours=max_ttl_hours)
+        self.lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        is_new = not os.path.exists(self.registry_file)
+        self.entries = self._load()
+        if is_new and seed_tickers:
+            self.seed(seed_tickers)
+
+    def _load(self):
+        try:
+            with open(self.registry_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logging.error(f"Erro ao carregar registro de ações com falha: {str(e)}")
+            return {}
+
+    def _save(self):
+        try:
+            tmp_file = f"{self.registry_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, indent=2)
+            os.replace(tmp_file, self.registry_file)
+        except Exception as e:
+            logging.error(f"Erro ao salvar registro de ações com falha: {str(e)}")
+
+    def _open_until(self, ticker):
+        entry = self.entries.get(ticker)
+        if not entry or not entry.get('open_until'):
+            return None
+        return datetime.fromisoformat(entry['open_until'])
+
+    def is_open(self, ticker):
+        """True se a ação deve ser ignorada (disjuntor aberto e ainda dentro do prazo)"""
+        with self.lock:
+            open_until = self._open_until(ticker)
+            return open_until is not None and datetime.now() < open_until
+
+    def is_probe(self, ticker):
+        """True se o prazo do disjuntor expirou e a próxima busca é apenas uma tentativa de teste"""
+        with self.lock:
+            open_until = self._open_until(ticker)
+            return open_until is not None and datetime.now() >= open_until
+
+    def record_failure(self, ticker, error=None, permanent=False):
+        """
+        Registra uma busca falha e abre o disjuntor se necessário
+
+        Args:
+            ticker: Código da ação
+            error: Exceção (ou mensagem) da última falha
+            permanent: Se True (ex.: erro 404), abre o disjuntor imediatamente
+        """
+        with self.lock:
+            entry = self.entries.setdefault(ticker, {'failures': 0})
+            entry['failures'] += 1
+            entry['last_error'] = type(error).__name__ if isinstance(error, BaseException) else str(error)
+            entry['last_failure'] = datetime.now().isoformat()
+
+            if permanent or entry['failures'] >= self.failure_threshold:
+                # Cada reabertura dobra o prazo, até o limite máximo
+                reopenings = max(0, entry['failures'] - self.failure_threshold)
+                ttl = min(self.open_ttl * (2 ** reopenings), self.max_ttl)
+                entry['open_until'] = (datetime.now() + ttl).isoformat()
+                logging.info(f"Disjuntor aberto para {ticker} até {entry['open_until']}")
+
+            self._save()
+
+    def record_success(self, ticker):
+        """Remove a ação do registro após uma busca bem-sucedida"""
+        with self.lock:
+            if self.entries.pop(ticker, None) is not None:
+                self._save()
+
+    def seed(self, tickers, reason="ignorada"):
+        """Abre o disjuntor de ações sabidamente problemáticas que ainda não estão no registro"""
+        with self.lock:
+            changed = False
+            for ticker in tickers:
+                if ticker not in self.entries:
+                    self.entries[ticker] = {
+                        'failures': self.failure_threshold,
+                        'last_error': reason,
+                        'last_failure': datetime.now().isoformat(),
+                        'open_until': (datetime.now() + self.open_ttl).isoformat()
+                    }
+                    changed = True
+            if changed:
+                self._save()
+
+    def open_tickers(self):
+        """Lista as ações atualmente ignoradas"""
+        with self.lock:
+            now = datetime.now()
+            return [ticker for ticker in self.entries
+                    if self._open_until(ticker) is not None and now < self._open_until(ticker)]
+
+    def clear(self):
+        """Remove todo o registro"""
+        with self.lock:
+            self.entries = {}
+            if os.path.exists(self.registry_file):
+                os.remove(self.registry_file)
+
+# Instância compartilhada por todos os caminhos de busca
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_ticker_health_registry(seed_tickers=()):
+    """Retorna o registro de ações com falha compartilhado, criando-o na primeira chamada"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = TickerHealthRegistry(seed_tickers=seed_tickers)
+        return _registry
@@ -0,0 +1,192 @@
+import os
+import json
+import threading
+import pandas as pd
+from datetime import datetime, timedelta
+from concurrent.futures import wait
+import logging
+
+from .fetch_scheduler import get_fetch_scheduler
+from .providers import get_default_provider
+from .settings import CACHE_DIR
+
+# Índices brasileiros usados para descobrir ações além da lista base
+B3_INDICES = ['IBOV', 'IBRX', 'SMLL', 'IDIV', 'MLCX']
+
+# Quantidade de ações verificadas por requisição
+VALIDATION_BATCH_SIZE = 20
+
+class UniverseCache:
+    def __init__(self, cache_dir=CACHE_DIR, composition_ttl_days=90, validity_ttl_days=7):
+        """
+        Cache em disco da composição dos índices e da validade de cada ação
+
+        A composição dos índices muda trimestralmente; a validade das ações é
+        revalidada de forma preguiçosa (o valor antigo continua sendo usado enquanto
+        a verificação roda em segundo plano).
+
+        Args:
+            cache_dir: Diretório onde o cache será armazenado
+            composition_ttl_days: Validade da composição de cada índice
+            validity_ttl_days: Validade da verificação de cada ação
+        """
+        self.cache_file = os.path.join(cache_dir, "universe_cache.json")
+        self.composition_ttl = timedelta(days=composition_ttl_days)
+        self.validity_ttl = timedelta(days=validity_ttl_days)
+        self.lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.data = self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            data.setdefault('compositions', {})
+            data.setdefault('validity', {})
+            return data
+        except FileNotFoundError:
+            return {'compositions': {}, 'validity': {}}
+        except Exception as e:
+            logging.error(f"Erro ao carregar cache do universo: {str(e)}")
+            return {'compositions': {}, 'validity': {}}
+
+    def _save(self):
+        try:
+            tmp_file = f"{self.cache_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, indent=2)
+            os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            logging.error(f"Erro ao salvar cache do universo: {str(e)}")
+
+    @staticmethod
+    def _is_fresh(entry, ttl):
+        return entry is not None and datetime.now() - datetime.fromisoformat(entry['checked_at']) <= ttl
+
+    def get_composition(self, index_code):
+        """Componentes do índice, ou None se não houver composição válida em cache"""
+        with self.lock:
+            entry = self.data['compositions'].get(index_code)
+            return entry['components'] if self._is_fresh(entry, self.composition_ttl) else None
+
+    def set_composition(self, index_code, components):
+        with self.lock:
+            self.data['compositions'][index_code] = {
+                'checked_at': datetime.now().isoformat(),
+                'components': sorted(components)
+            }
+            self._save()
+
+    def get_validity(self, ticker):
+        """
+        Validade conhecida da ação
+
+        Returns:
+            tuple: (válida ou None se nunca verificada, True se a verificação expirou)
+        """
+        with self.lock:
+            entry = self.data['validity'].get(ticker)
+            if entry is None:
+                return None, True
+            return entry['valid'], not self._is_fresh(entry, self.validity_ttl)
+
+    def set_validity(self, results):
+        """Registra o resultado da verificação de várias ações (ticker -> bool)"""
+        with self.lock:
+            now = datetime.now().isoformat()
+            for ticker, valid in results.items():
+                self.data['validity'][ticker] = {'checked_at': now, 'valid': bool(valid)}
+            self._save()
+
+    def clear(self):
+        with self.lock:
+            self.data = {'compositions': {}, 'validity': {}}
+            if os.path.exists(self.cache_file):
+                os.remove(self.cache_file)
+
+def _fetch_composition(universe_cache, index_code):
+    components = get_default_provider().get_index_components(index_code)
+    # Composição vazia indica falha de rede ou de leitura, não índice sem ações: não gravar
+    if components:
+        universe_cache.set_composition(index_code, components)
+    return components
+
+def _validate_batch(universe_cache, batch):
+    """Verifica se as ações do lote têm pregões recentes e grava o resultado"""
+    end_date = datetime.now()
+    frames = get_default_provider().get_history(batch, end_date - timedelta(days=5), end_date)
+    results = {stock: stock in frames and not pd.isna(frames[stock]['Close'].iloc[-1]) for stock in batch}
+    # Lote inteiro sem dados indica falha de rede, não ações inválidas: não gravar
+    if frames:
+        universe_cache.set_validity(results)
+    return results
+
+def discover_universe(base_stocks, indices=B3_INDICES, universe_cache=None):
+    """
+    Monta o universo de ações a partir da lista base e dos componentes dos índices
+
+    Composições e validades vêm do cache em disco. Apenas índices expirados e
+    ações nunca verificadas são buscados antes de retornar; validades expiradas
+    são usadas como estão e revalidadas em segundo plano. Todas as buscas rodam
+    no agendador compartilhado, respeitando o limite global de requisições.
+
+    Returns:
+        list: Ações válidas, sempre incluindo a lista base
+    """
+    universe_cache = universe_cache or UniverseCache()
+    scheduler = get_fetch_scheduler()
+
+    # Composição dos índices (busca concorrente apenas dos expirados)
+    components = set()
+    pending = {}
+    for index_code in indices:
+        cached = universe_cache.get_composition(index_code)
+        if cached is not None:
+            components.update(cached)
+        else:
+            pending[index_code] = scheduler.submit(_fetch_composition, universe_cache, index_code)
+
+    wait(pending.values())
+    for index_code, future in pending.items():
+        try:
+            components.update(future.result())
+        except Exception as e:
+            print(f"Erro ao obter componentes do índice {index_code}: {e}")
+
+    candidates = sorted(set(base_stocks).union(components))
+
+    # Separar ações nunca verificadas (bloqueiam) das com verificação expirada (segundo plano)
+    valid_stocks = []
+    unknown = []
+    stale = []
+    for stock in candidates:
+        valid, expired = universe_cache.get_validity(stock)
+        if valid is None:
+            unknown.append(stock)
+            continue
+        if valid:
+            valid_stocks.append(stock)
+        if expired:
+            stale.append(stock)
+
+    unknown_futures = [
+        scheduler.submit(_validate_batch, universe_cache, unknown[i:i+VALIDATION_BATCH_SIZE])
+        for i in range(0, len(unknown), VALIDATION_BATCH_SIZE)
+    ]
+    for i in range(0, len(stale), VALIDATION_BATCH_SIZE):
+        scheduler.submit(_validate_batch, universe_cache, stale[i:i+VALIDATION_BATCH_SIZE])
+
+    wait(unknown_futures)
+    for future in unknown_futures:
+        try:
+            valid_stocks.extend(stock for stock, valid in future.result().items() if valid)
+        except Exception as e:
+            print(f"Erro ao verificar lote de ações: {e}")
+
+    # Adicionar manualmente as ações principais se elas não foram detectadas
+    for stock in base_stocks:
+        if stock not in valid_stocks:
+            valid_stocks.append(stock)
+
+    return valid_stocks
@@ -2,12 +2,18 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import pandas as pd
 import threading
+import queue
 import time
 import traceback
 
 from data.stock_data import get_stock_performance_data
 from dashboard.ui import BrazilStocksDashboard
 
+# Intervalo entre atualizações da tela de carregamento (~20 quadros por segundo)
+PROGRESS_FRAME_MS = 50
+# Quantidade máxima de linhas mantidas no log da tela de carregamento
+MAX_LOG_LINES = 500
+
 class LoadingScreen:
     def __init__(self, master):
         self.master = master
@@ -40,26 +46,79 @@ class LoadingScreen:
         self.log_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.config(command=self.log_text.yview)
         
+        # Eventos enviados pelas threads de busca; apenas a thread do Tk mexe nos widgets
+        self.events = queue.Queue()
+        self.closed = False
+        self.log_text.bind("<Destroy>", lambda event: setattr(self, 'closed', True))
+        self.master.after(PROGRESS_FRAME_MS, self._drain_events)
+        
     def log(self, message):
-        self.log_text.insert(tk.END, message + "\n")
-        self.log_text.see(tk.END)
-        self.master.update()
+        """Enfileira uma linha de log (pode ser chamado de qualquer thread)"""
+        if not self.closed:
+            self.events.put(('log', message))
         
     def update_progress(self, current, total):
-        progress_pct = (current / total) * 100
-        self.progress_var.set(progress_pct)
-        self.status_label.config(text=f"Processando ação {current} de {total} ({progress_pct:.1f}%)")
-        self.master.update()
+        """Enfileira o progresso atual (pode ser chamado de qualquer thread)"""
+        if not self.closed:
+            self.events.put(('progress', current, total))
+        
+    def call(self, func):
+        """Executa func na thread do Tk no próximo quadro (pode ser chamado de qualquer thread)"""
+        self.events.put(('call', func))
+        
+    def _drain_events(self):
+        """Consome os eventos pendentes e redesenha a tela uma única vez por quadro"""
+        lines = []
+        progress = None
+        calls = []
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == 'log':
+                lines.append(event[1])
+            elif event[0] == 'progress':
+                # Apenas o progresso mais recente interessa
+                progress = event[1:]
+            elif event[0] == 'call':
+                calls.append(event[1])
+        
+        if lines:
+            # Uma única inserção por quadro, mantendo apenas as últimas MAX_LOG_LINES linhas
+            self.log_text.insert(tk.END, "\n".join(lines[-MAX_LOG_LINES:]) + "\n")
+            line_count = int(self.log_text.index('end-1c').split('.')[0])
+            if line_count > MAX_LOG_LINES:
+                self.log_text.delete('1.0', f"{line_count - MAX_LOG_LINES}.0")
+            self.log_text.see(tk.END)
+        
+        if progress is not None:
+            current, total = progress
+            progress_pct = (current / total) * 100 if total else 100
+            self.progress_var.set(progress_pct)
+            self.status_label.config(text=f"Processando ação {current} de {total} ({progress_pct:.1f}%)")
+        
+        for func in calls:
+            func()
+        
+        try:
+            self.master.after(PROGRESS_FRAME_MS, self._drain_events)
+        except tk.TclError:
+            # Janela já destruída: descartar eventos futuros
+            self.closed = True
 
-def open_dashboard_with_data(performance_data):
+def open_dashboard_with_data(performance_data, row_source=None):
     """
     Função específica para abrir o dashboard, garantindo que seja exibido mesmo com erros parciais
+    
+    Se row_source for informado, o dashboard abre com o que já chegou e continua
+    recebendo as demais ações por essa fila enquanto o carregamento termina.
     """
     try:
         # Criar uma nova janela Tkinter para o dashboard
         dashboard_root = tk.Tk()
         # Criar o dashboard com os dados disponíveis
-        app = BrazilStocksDashboard(dashboard_root, performance_data)
+        app = BrazilStocksDashboard(dashboard_root, performance_data, row_source)
         # Iniciar o loop principal
         dashboard_root.mainloop()
     except Exception as e:
@@ -77,46 +136,73 @@ def load_data():
         loading_screen = LoadingScreen(root)
         loading_screen.log("Iniciando carregamento de dados da B3...")
         
+        def show_dashboard(performance_data, delay_ms, row_source=None):
+            # Fechar a tela de carregamento e usar after_idle para garantir que o dashboard abra em seguida
+            root.after(delay_ms, lambda: root.destroy())
+            root.after_idle(lambda: open_dashboard_with_data(performance_data, row_source))
+        
+        def show_error(message):
+            messagebox.showerror("Erro", message)
+            root.destroy()
+        
+        # Ações prontas são repassadas ao dashboard por esta fila; ele abre com o primeiro lote
+        row_stream = queue.Queue()
+        dashboard_opened = threading.Event()
+        
+        def on_results(rows):
+            row_stream.put(rows)
+            if not dashboard_opened.is_set():
+                dashboard_opened.set()
+                loading_screen.log("Primeiras ações disponíveis. Abrindo dashboard...")
+                loading_screen.call(lambda: show_dashboard(None, 500, row_stream))
+        
+        def on_refresh(performance_data):
+            # Atualização em segundo plano de um cache obsoleto: substituir os dados e encerrar a fila
+            if performance_data is not None:
+                row_stream.put(performance_data)
+            row_stream.put(None)
+        
         # Iniciar thread para carregar dados
         def fetch_data_thread():
             performance_data = None
             try:
                 # Obter dados de desempenho das ações
-                performance_data = get_stock_performance_data(loading_screen)
+                performance_data = get_stock_performance_data(loading_screen, on_results=on_results,
+                                                              on_refresh=on_refresh)
+                
+                if dashboard_opened.is_set():
+                    # Dashboard já aberto: apenas sinalizar o fim do carregamento
+                    row_stream.put(None)
                 
                 # Verificar se há dados disponíveis
-                if performance_data is not None and not performance_data.empty:
+                elif performance_data is not None and not performance_data.empty:
                     # Contabilizar ações carregadas
                     n_stocks = len(performance_data)
                     loading_screen.log(f"Dados carregados com sucesso. {n_stocks} ações disponíveis.")
                     loading_screen.log("Abrindo dashboard...")
                     
-                    # Garantir que a interface seja atualizada antes de fechá-la
-                    root.update_idletasks()
-                    
-                    # Importante: Criar uma função para abrir o dashboard após fechar a tela de carregamento
-                    root.after(1000, lambda: root.destroy())
-                    
-                    # Aqui está a mudança crítica: usamos after_idle para garantir que o dashboard abra após a tela de carregamento fechar
-                    root.after_idle(lambda: open_dashboard_with_data(performance_data))
+                    # Widgets só podem ser manipulados na thread do Tk; dados obsoletos
+                    # do cache serão substituídos pela atualização em segundo plano
+                    refresh_source = row_stream if performance_data.attrs.get('stale') else None
+                    loading_screen.call(lambda: show_dashboard(performance_data, 1000, refresh_source))
                 else:
                     # Verificar se há dados disponíveis
                     loading_screen.log("ERRO: Nenhum dado foi carregado!")
-                    messagebox.showerror("Erro", "Não foi possível carregar dados das ações.")
-                    root.destroy()
+                    loading_screen.call(lambda: show_error("Não foi possível carregar dados das ações."))
             except Exception as e:
                 error_msg = f"ERRO durante carregamento: {str(e)}\n{traceback.format_exc()}"
                 print(error_msg)
                 loading_screen.log(error_msg)
                 
                 # Mesmo com erro, se temos pelo menos alguns dados, podemos mostrar o dashboard
-                if performance_data is not None and not performance_data.empty:
+                if dashboard_opened.is_set():
+                    row_stream.put(None)
+                elif performance_data is not None and not performance_data.empty:
                     loading_screen.log("Abrindo dashboard com dados parciais...")
-                    root.after(2000, lambda: root.destroy())
-                    root.after_idle(lambda: open_dashboard_with_data(performance_data))
+                    loading_screen.call(lambda: show_dashboard(performance_data, 2000))
                 else:
-                    messagebox.showerror("Erro", f"Falha ao carregar dados: {str(e)}")
-                    root.destroy()
+                    error_text = f"Falha ao carregar dados: {str(e)}"
+                    loading_screen.call(lambda: show_error(error_text))
         
         # Iniciar thread para não bloquear a interface
         data_thread = threading.Thread(target=fetch_data_thread)
@@ -0,0 +1,71 @@
+import json
+import os
+from datetime import timedelta
+
+import pytest
+
+from data.checkpoints import FetchCheckpoint
+
+
+def valid_for(hours):
+    return lambda saved_at: saved_at + timedelta(hours=hours)
+
+
+@pytest.fixture
+def checkpoint(tmp_path):
+    return FetchCheckpoint(str(tmp_path), valid_for(8))
+
+
+def test_round_trip(checkpoint):
+    row = {'code': 'PETR4', 'monthly_return': 3.25, 'volume': 1e9}
+    checkpoint.save('PETR4.SA', row)
+    assert checkpoint.load_all() == {'PETR4.SA': row}
+
+
+def test_checksum_mismatch_is_discarded(checkpoint):
+    checkpoint.save('PETR4.SA', {'monthly_return': 3.25})
+    checkpoint.save('VALE3.SA', {'monthly_return': -1.5})
+
+    # Linha alterada sem atualizar o checksum
+    path = os.path.join(checkpoint.checkpoint_dir, 'PETR4.SA.json')
+    with open(path, encoding='utf-8') as f:
+        entry = json.load(f)
+    entry['row']['monthly_return'] = 99.0
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(entry, f)
+
+    assert checkpoint.load_all() == {'VALE3.SA': {'monthly_return': -1.5}}
+    assert not os.path.exists(path)
+
+
+def test_truncated_file_is_discarded(checkpoint):
+    checkpoint.save('PETR4.SA', {'monthly_return': 3.25})
+    path = os.path.join(checkpoint.checkpoint_dir, 'PETR4.SA.json')
+    with open(path, 'r+', encoding='utf-8') as f:
+        f.truncate(20)
+
+    assert checkpoint.load_all() == {}
+    assert not os.path.exists(path)
+
+
+def test_expired_checkpoints_are_not_reused(tmp_path):
+    FetchCheckpoint(str(tmp_path), valid_for(8)).save('PETR4.SA', {'monthly_return': 3.25})
+    # Mesma validade do cache: já passou o fechamento seguinte à gravação
+    assert FetchCheckpoint(str(tmp_path), valid_for(0)).load_all() == {}
+    assert FetchCheckpoint(str(tmp_path), valid_for(8)).load_all() == {}
+
+
+def test_file_removed_concurrently_does_not_fail(checkpoint, monkeypatch):
+    checkpoint.save('PETR4.SA', {'monthly_return': 3.25})
+    path = os.path.join(checkpoint.checkpoint_dir, 'PETR4.SA.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{')
+
+    real_remove = os.remove
+
+    def remove_after_other_process(target):
+        real_remove(target)
+        raise FileNotFoundError(target)
+
+    monkeypatch.setattr(os, 'remove', remove_after_other_process)
+    assert checkpoint.load_all() == {}
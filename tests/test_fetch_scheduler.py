@@ -0,0 +1,87 @@
+import pytest
+
+from data import fetch_scheduler
+from data.fetch_scheduler import FetchScheduler, RetryLater, TokenBucket
+
+
+class FakeClock:
+    """Relógio controlado: sleep apenas avança o tempo"""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(fetch_scheduler.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(fetch_scheduler.time, 'sleep', clock.sleep)
+    return clock
+
+
+def test_token_bucket_allows_burst_then_throttles(clock):
+    bucket = TokenBucket(rate_per_second=2, capacity=3)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == []
+
+    # Sem tokens: espera exatamente o tempo de reposição de um token
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(0.5)]
+
+
+def test_token_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate_per_second=1)
+    bucket.acquire()
+    clock.now += 10  # muito tempo parado não acumula mais que a capacidade
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+
+def test_retry_later_requeues_without_blocking_the_worker():
+    scheduler = FetchScheduler(max_workers=1, requests_per_second=100)
+    order = []
+    attempts = []
+
+    def flaky(attempt=0):
+        attempts.append(attempt)
+        if attempt == 0:
+            order.append('flaky: retry')
+            raise RetryLater(0.2, {'attempt': attempt + 1})
+        order.append('flaky: done')
+        return 'ok'
+
+    def quick():
+        order.append('quick')
+        return 'quick'
+
+    try:
+        retried = scheduler.submit(flaky)
+        other = scheduler.submit(quick)
+        assert other.result(timeout=5) == 'quick'
+        assert retried.result(timeout=5) == 'ok'
+    finally:
+        scheduler.shutdown()
+
+    # O único worker atendeu a outra tarefa enquanto a nova tentativa aguardava
+    assert order == ['flaky: retry', 'quick', 'flaky: done']
+    assert attempts == [0, 1]
+
+
+def test_exception_is_set_on_future():
+    scheduler = FetchScheduler(max_workers=1)
+    try:
+        future = scheduler.submit(lambda: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            future.result(timeout=5)
+    finally:
+        scheduler.shutdown()
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.intraday import IntradayBuffer
+
+
+def bars(start, closes, volumes, freq='5min'):
+    closes = np.asarray(closes, dtype=float)
+    index = pd.date_range(start, periods=len(closes), freq=freq)
+    return pd.DataFrame({'Open': closes - 0.1, 'High': closes + 0.2, 'Low': closes - 0.3,
+                         'Close': closes, 'Volume': np.asarray(volumes, dtype=float)}, index=index)
+
+
+def expected_vwap(data):
+    typical = (data['High'] + data['Low'] + data['Close']) / 3
+    return float((typical * data['Volume']).sum() / data['Volume'].sum())
+
+
+def test_forming_bar_is_replaced():
+    buffer = IntradayBuffer(capacity=50)
+    first = bars('2025-03-10 10:00', [10.0, 10.5, 11.0], [100, 200, 50])
+    assert buffer.append(first) == 3
+
+    # A última barra volta mais avançada: substitui a anterior em vez de somar de novo
+    revised = bars('2025-03-10 10:10', [11.4], [300])
+    assert buffer.append(revised) == 0
+
+    final = pd.concat([first.iloc[:2], revised])
+    metrics = buffer.metrics()
+    assert metrics['vwap'] == pytest.approx(expected_vwap(final))
+    assert metrics['current_price'] == 11.4
+    assert buffer.volume == pytest.approx(600)
+    assert len(buffer.bars()) == 3
+    assert buffer.bars()['Close'].iloc[-1] == 11.4
+
+
+def test_incremental_appends_match_single_append():
+    data = bars('2025-03-10 10:00', 20 + np.sin(np.arange(30)), np.arange(30) * 10 + 5)
+
+    incremental = IntradayBuffer(capacity=100)
+    incremental.append(data.iloc[:10])
+    # Janelas sobrepostas, como nas buscas a partir da última barra recebida
+    incremental.append(data.iloc[9:20])
+    incremental.append(data.iloc[19:])
+
+    single = IntradayBuffer(capacity=100)
+    single.append(data)
+
+    incremental_metrics, single_metrics = incremental.metrics(), single.metrics()
+    assert incremental_metrics.pop('bar_time') == single_metrics.pop('bar_time') == data.index[-1]
+    assert incremental_metrics == pytest.approx(single_metrics)
+    assert incremental.metrics()['vwap'] == pytest.approx(expected_vwap(data))
+    pd.testing.assert_frame_equal(incremental.bars(), single.bars(), check_freq=False)
+
+
+def test_new_session_resets_aggregates():
+    buffer = IntradayBuffer(capacity=100)
+    buffer.append(bars('2025-03-10 16:00', [10.0, 10.2], [100, 100]))
+    today = bars('2025-03-11 10:00', [11.0, 11.5], [40, 60])
+    buffer.append(today)
+
+    metrics = buffer.metrics()
+    assert metrics['vwap'] == pytest.approx(expected_vwap(today))
+    assert metrics['intraday_return'] == pytest.approx((11.5 / today['Open'].iloc[0] - 1) * 100)
+    assert metrics['intraday_high'] == pytest.approx(11.7)
+    assert metrics['intraday_low'] == pytest.approx(10.7)
+
+
+def test_ring_keeps_latest_bars():
+    buffer = IntradayBuffer(capacity=4)
+    data = bars('2025-03-10 10:00', np.arange(10) + 1.0, np.ones(10))
+    buffer.append(data.iloc[:6])
+    buffer.append(data.iloc[6:])
+    assert list(buffer.bars()['Close']) == [7.0, 8.0, 9.0, 10.0]
@@ -0,0 +1,32 @@
+from datetime import datetime
+
+import pytest
+
+from data import market_calendar
+from data.market_calendar import FALLBACK_CLOSE_HOUR, next_session_close
+
+
+@pytest.fixture
+def no_calendar(monkeypatch):
+    monkeypatch.setattr(market_calendar, 'get_b3_calendar', lambda: None)
+
+
+@pytest.mark.parametrize('after, expected', [
+    (datetime(2025, 3, 12, 10, 30), datetime(2025, 3, 12, FALLBACK_CLOSE_HOUR)),  # quarta, pregão aberto
+    (datetime(2025, 3, 12, FALLBACK_CLOSE_HOUR), datetime(2025, 3, 13, FALLBACK_CLOSE_HOUR)),  # no fechamento
+    (datetime(2025, 3, 12, 21, 0), datetime(2025, 3, 13, FALLBACK_CLOSE_HOUR)),   # depois do fechamento
+    (datetime(2025, 3, 14, 19, 0), datetime(2025, 3, 17, FALLBACK_CLOSE_HOUR)),   # sexta à noite
+    (datetime(2025, 3, 15, 9, 0), datetime(2025, 3, 17, FALLBACK_CLOSE_HOUR)),    # sábado
+    (datetime(2025, 3, 16, 23, 59), datetime(2025, 3, 17, FALLBACK_CLOSE_HOUR)),  # domingo
+])
+def test_fallback_uses_next_weekday_close(no_calendar, after, expected):
+    assert next_session_close(after) == expected
+
+
+def test_calendar_error_falls_back(monkeypatch):
+    class BrokenCalendar:
+        def schedule(self, start_date, end_date):
+            raise RuntimeError("calendário indisponível")
+
+    monkeypatch.setattr(market_calendar, 'get_b3_calendar', lambda: BrokenCalendar())
+    assert next_session_close(datetime(2025, 3, 14, 19, 0)) == datetime(2025, 3, 17, FALLBACK_CLOSE_HOUR)
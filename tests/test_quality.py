@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from data.quality import detect_generic_data
+from data.returns import build_close_matrix
+
+
+def legacy_is_generic_data(data):
+    """Verificação por ação anterior ao detector em lote (sem as mensagens de aviso)"""
+    if len(data) >= 5:
+        returns = data['Close'].pct_change().dropna()
+        if abs(returns.var()) < 0.00001:
+            return True
+        consecutive_identical = 0
+        for i in range(1, len(returns)):
+            if abs(returns.iloc[i] - returns.iloc[i - 1]) < 0.0001:
+                consecutive_identical += 1
+        if consecutive_identical > len(returns) * 0.3:
+            return True
+    return False
+
+
+def frame(close, start='2024-01-01', step=1):
+    dates = pd.bdate_range(start, periods=len(close) * step)[::step]
+    return pd.DataFrame({'Close': np.asarray(close, dtype=float)}, index=dates)
+
+
+def random_walk(seed, n=120, sigma=0.02):
+    rng = np.random.default_rng(seed)
+    return 30 * np.exp(np.cumsum(rng.normal(0, sigma, n)))
+
+
+def sample_histories():
+    rng = np.random.default_rng(0)
+    repeated = random_walk(5, 60)
+    repeated[20:50] = repeated[20] * 1.01 ** np.arange(30)   # mesmo retorno repetido
+    return {
+        'WALK3.SA': frame(random_walk(1)),
+        'CALM4.SA': frame(random_walk(2, sigma=0.001)),         # pouca variância
+        'FLAT3.SA': frame(np.full(80, 12.5)),                     # preço constante
+        'GROW3.SA': frame(15 * 1.002 ** np.arange(90)),         # retornos idênticos
+        'REPT3.SA': frame(repeated),
+        'SHRT3.SA': frame([10.0, 10.0, 10.0, 10.0]),              # curta demais para ser avaliada
+        'LATE11.SA': frame(random_walk(3, 40), start='2024-04-01'),  # outro calendário (NaN na matriz)
+        'GAPS3.SA': frame(random_walk(4, 50), step=2),           # pregões alternados
+        'NOIS3.SA': frame(20 + rng.normal(0, 0.5, 70)),
+    }
+
+
+def test_matches_legacy_verdicts_without_flat_run_check():
+    histories = sample_histories()
+    verdicts = detect_generic_data(build_close_matrix(histories), max_flat_run=np.inf)
+
+    expected = {ticker: legacy_is_generic_data(data) for ticker, data in histories.items()}
+    assert {ticker: bool(verdicts.loc[ticker, 'suspicious']) for ticker in histories} == expected
+    # A amostra cobre os dois vereditos
+    assert set(expected.values()) == {True, False}
+
+
+def test_flat_segment_is_flagged():
+    close = random_walk(9, 100)
+    close[40:60] = close[40]  # 19 pregões seguidos sem variação
+    verdicts = detect_generic_data(build_close_matrix({'STOP3.SA': frame(close)}))
+
+    row = verdicts.loc['STOP3.SA']
+    assert row['longest_flat_run'] == 19
+    assert row['flat_segment'] and row['suspicious']
+    assert not legacy_is_generic_data(frame(close))
+
+
+def test_empty_matrix():
+    assert detect_generic_data(pd.DataFrame()).empty
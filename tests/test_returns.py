@@ -0,0 +1,79 @@
+import hashlib
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.returns import RETURN_KEYS, build_close_matrix, compute_returns, returns_for_history
+from data.stock_data import calculate_returns
+
+
+def legacy_calculate_returns(historical_data, variation=False):
+    """Cálculo por ação anterior ao kernel vetorizado (sem as mensagens de diagnóstico)"""
+    returns = {key: 0.0 for key in RETURN_KEYS}
+    historical_data = historical_data.sort_index()
+    latest_date = historical_data.index[-1]
+    latest_price = float(historical_data['Close'].iloc[-1])
+    returns['daily'] = (latest_price / float(historical_data['Close'].iloc[-2]) - 1) * 100
+
+    def get_price_for_date(target_date):
+        idx = historical_data.index.get_indexer([target_date], method='nearest')[0]
+        return float(historical_data['Close'].iloc[idx])
+
+    for period_name, days in {'weekly': 7, 'monthly': 30, 'quarterly': 90, 'yearly': 365}.items():
+        returns[period_name] = (latest_price / get_price_for_date(latest_date - pd.Timedelta(days=days)) - 1) * 100
+
+    year_start = pd.Timestamp(year=latest_date.year, month=1, day=1)
+    if historical_data.index[0] <= year_start:
+        returns['ytd_return'] = (latest_price / get_price_for_date(year_start) - 1) * 100
+
+    if variation:
+        random.seed(int(hashlib.md5(str(latest_price).encode()).hexdigest(), 16))
+        for key in returns:
+            if abs(returns[key]) > 0.01:
+                returns[key] += random.uniform(-0.1, 0.1)
+    return returns
+
+
+def make_history(seed, start='2023-06-01', end='2025-03-14', drop=0.1):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, end)
+    # Lacunas aleatórias (feriados, pregões sem negócio) criam empates no pregão mais próximo
+    dates = dates[rng.random(len(dates)) >= drop]
+    close = 20 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+    return pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99,
+                         'Close': close, 'Volume': 1000.0}, index=dates)
+
+
+def test_matrix_matches_legacy_per_ticker():
+    histories = {
+        'AAAA3.SA': make_history(1),
+        'BBBB4.SA': make_history(2, start='2024-03-01'),         # começa depois do início do ano anterior
+        'CCCC3.SA': make_history(3, end='2025-02-20'),           # último pregão diferente das demais
+        'DDDD11.SA': make_history(4, start='2025-01-06', drop=0.3),  # sem histórico desde 1º de janeiro
+    }
+    computed = compute_returns(build_close_matrix(histories))
+
+    for ticker, history in histories.items():
+        expected = legacy_calculate_returns(history)
+        for key in RETURN_KEYS:
+            assert computed.loc[ticker, key] == pytest.approx(expected[key], abs=1e-9), (ticker, key)
+
+
+def test_single_history_matches_legacy():
+    for seed in range(5, 15):
+        history = make_history(seed, drop=0.25)
+        expected = legacy_calculate_returns(history)
+        assert returns_for_history(history) == pytest.approx(expected, abs=1e-9)
+
+
+def test_calculate_returns_keeps_legacy_variation():
+    history = make_history(42)
+    assert calculate_returns(history) == pytest.approx(legacy_calculate_returns(history, variation=True), abs=1e-9)
+
+
+def test_too_short_history_returns_zeros():
+    history = make_history(7).iloc[:1]
+    assert returns_for_history(history) == {key: 0.0 for key in RETURN_KEYS}
+    assert calculate_returns(history) == {key: 0.0 for key in RETURN_KEYS}